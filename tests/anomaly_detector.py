@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+anomaly_detector.py - Live p95 and error-rate shift detection during a run
+
+Add this file to the locustfile list (on the master and every worker).
+Every second of the run is summarized as its request count, failure count
+and p95, and each series is watched by a two-sided CUSUM against an EWMA
+baseline: a sustained move of a standard deviation or more is caught
+within seconds, single noisy seconds are not, and moves too small to
+matter (under 20% in p95, one point of error rate) are not reported. The
+error rate is tracked as pooled failures over requests, since a rate per
+second is too skewed to average; `python anomaly_detector.py` replays
+synthetic stationary traffic and fails if any shift is reported.
+Once the new level has settled (10s) the shift is printed and
+fired as a failed "ANOMALY" request, so it lands in the stats and failure
+CSVs next to the requests it disrupted:
+
+    [anomaly] p95 shift up at t=412s: 180ms -> 420ms
+    [anomaly] error rate shift up at t=655s: 0.2% -> 8.5%
+
+    locust -f locust_availability.py,anomaly_detector.py --headless -t 30m ...
+
+Workers bucket their responses per second (a coarse HdrHistogram each) and
+ship the buckets at every report; the master merges them per second and
+evaluates a second once no more reports can touch it. Memory and work per
+second of test are constant: a few open seconds, and O(1) state per detector.
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+import gevent
+from locust import events
+from locust.runners import WORKER_REPORT_INTERVAL, MasterRunner, WorkerRunner
+
+from hdr_histogram import HdrHistogram
+
+
+class AnomalyDetected(Exception):
+    pass
+
+
+class ShiftDetector:
+    """EWMA baseline plus two-sided CUSUM on standardized residuals.
+
+    The baseline only learns from samples within three standard deviations,
+    so a shift is not absorbed before the CUSUM crosses its threshold. Once
+    it does, the next `settle` samples give the new level; the shift is
+    reported if it moved by at least min_change, and either way the baseline
+    restarts from the new level.
+    """
+
+    def __init__(self, alpha=0.05, slack=0.5, threshold=8.0, warmup=30, settle=10, min_sd=0.0, min_change=0.0):
+        self.alpha = alpha
+        self.slack = slack
+        self.threshold = threshold
+        self.warmup = warmup
+        self.settle = settle
+        self.min_sd = min_sd
+        self.min_change = min_change
+        self.mean = None
+        self.var = 0.0
+        self.samples = 0
+        self.high = self.low = 0.0
+        self.high_start = self.low_start = None
+        self.settling = None
+
+    def _learn(self, value):
+        if self.mean is None:
+            self.mean = value
+            return
+        # A plain running average until there are 1/alpha samples, so the
+        # first (ramp-up) seconds do not anchor the baseline
+        alpha = max(self.alpha, 1 / self.samples)
+        delta = value - self.mean
+        self.mean += alpha * delta
+        self.var = (1 - alpha) * (self.var + alpha * delta * delta)
+
+    def update(self, at, value):
+        """Feed one sample; returns (direction, start, before, after) once a shift has settled, else None"""
+        self.samples += 1
+        if self.samples <= self.warmup:
+            self._learn(value)
+            return None
+        if self.settling is not None:
+            start, before, values = self.settling
+            values.append(value)
+            if len(values) < self.settle:
+                return None
+            after = sum(values) / len(values)
+            self.settling = None
+            self.mean = after
+            if abs(after - before) < self.min_change:
+                return None
+            return ("up" if after > before else "down", start, before, after)
+
+        sd = max(math.sqrt(self.var), self.min_sd)
+        z = (value - self.mean) / sd if sd > 0 else 0.0
+        if self.high == 0.0:
+            self.high_start = at
+        if self.low == 0.0:
+            self.low_start = at
+        self.high = max(0.0, self.high + z - self.slack)
+        self.low = max(0.0, self.low - z - self.slack)
+        if self.high > self.threshold or self.low > self.threshold:
+            start = self.high_start if self.high > self.threshold else self.low_start
+            # The settle window starts after the sample that tipped the CUSUM, which is extreme by selection
+            self.settling = (start, self.mean, [])
+            self.high = self.low = 0.0
+        elif abs(z) < 3:
+            self._learn(value)
+        return None
+
+
+class RateShiftDetector:
+    """Two-sided CUSUM on a failure rate against a baseline of pooled counts.
+
+    A per-second failure rate is right-skewed, so dropping outlying seconds
+    (as ShiftDetector does) would drop only high ones and pull the baseline
+    below the true rate. Here the baseline is failures over requests in
+    exponentially decayed sums, learned from every second outside a settle
+    window. A shift is reported only if the rate over the `settle` seconds
+    after detection differs from the baseline by min_change and by more
+    than `noise` binomial standard deviations of the two pooled counts.
+    """
+
+    def __init__(self, alpha=0.05, slack=0.5, threshold=8.0, warmup=30, settle=10, min_rate=0.001,
+                 min_change=0.01, noise=3.0):
+        self.alpha = alpha
+        self.slack = slack
+        self.threshold = threshold
+        self.warmup = warmup
+        self.settle = settle
+        self.min_rate = min_rate
+        self.min_change = min_change
+        self.noise = noise
+        self.failures = self.requests = 0.0
+        self.samples = 0
+        self.high = self.low = 0.0
+        self.high_start = self.low_start = None
+        self.settling = None
+
+    @property
+    def rate(self):
+        return self.failures / self.requests if self.requests else 0.0
+
+    def _learn(self, failures, requests):
+        self.failures = (1 - self.alpha) * self.failures + failures
+        self.requests = (1 - self.alpha) * self.requests + requests
+
+    def update(self, at, failures, requests):
+        """Feed one second; returns (direction, start, before, after) rates once a shift has settled, else None"""
+        self.samples += 1
+        if self.samples <= self.warmup or not self.requests:
+            self._learn(failures, requests)
+            return None
+        if self.settling is not None:
+            start, before, base_requests, counts = self.settling
+            counts[0] += failures
+            counts[1] += requests
+            counts[2] += 1
+            if counts[2] < self.settle:
+                return None
+            self.settling = None
+            after = counts[0] / counts[1]
+            # Both estimates under the hypothesis of no change, from the pooled rate
+            pooled = (before * base_requests + counts[0]) / (base_requests + counts[1])
+            pooled = min(max(pooled, self.min_rate), 1 - self.min_rate)
+            sd = math.sqrt(pooled * (1 - pooled) * (1 / base_requests + 1 / counts[1]))
+            # The baseline restarts from the new level
+            self.failures, self.requests = counts[0], counts[1]
+            if abs(after - before) < max(self.min_change, self.noise * sd):
+                return None
+            return ("up" if after > before else "down", start, before, after)
+
+        rate = min(max(self.rate, self.min_rate), 1 - self.min_rate)
+        z = (failures - requests * rate) / math.sqrt(requests * rate * (1 - rate))
+        # Each arm remembers when it started and the baseline then, which the
+        # seconds it accumulated over (already the new level) have not touched
+        if self.high == 0.0:
+            self.high_start = (at, self.failures, self.requests)
+        if self.low == 0.0:
+            self.low_start = (at, self.failures, self.requests)
+        self.high = max(0.0, self.high + z - self.slack)
+        self.low = max(0.0, self.low - z - self.slack)
+        if self.high > self.threshold or self.low > self.threshold:
+            start, base_failures, base_requests = self.high_start if self.high > self.threshold else self.low_start
+            self.settling = (start, base_failures / base_requests, base_requests, [0, 0, 0])
+            self.high = self.low = 0.0
+        else:
+            self._learn(failures, requests)
+        return None
+
+
+def simulate(seconds, rps, error_rate, seed, shift_at=None, shift_to=None, warmup=30, threshold=8.0):
+    """Shifts a Watch reports for synthetic seconds: Bernoulli failures, lognormal latencies"""
+    rng = random.Random(seed)
+    watch = Watch(0, warmup, threshold, min_requests=1)
+    for second in range(seconds):
+        rate = shift_to if shift_at is not None and second >= shift_at else error_rate
+        histogram = HdrHistogram(significant_figures=2)
+        failures = 0
+        for _ in range(rps):
+            failures += rng.random() < rate
+            histogram.record(int(rng.lognormvariate(math.log(100_000), 0.3)))
+        watch.observe(second, rps, failures, histogram)
+    return watch.shifts
+
+
+class SecondStats:
+    """Requests, failures and a coarse latency histogram per wall-clock second"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, second, response_time, failed):
+        entry = self.seconds.get(second)
+        if entry is None:
+            entry = self.seconds[second] = [0, 0, HdrHistogram(significant_figures=2)]
+        entry[0] += 1
+        entry[1] += failed
+        entry[2].record(int(response_time * 1000))
+
+    def merge(self, second, requests, failures, histogram):
+        entry = self.seconds.get(second)
+        if entry is None:
+            self.seconds[second] = [requests, failures, histogram]
+            return
+        entry[0] += requests
+        entry[1] += failures
+        entry[2].merge(histogram)
+
+    def pop_until(self, second):
+        """Remove and return the seconds up to and including second, in order"""
+        closed = sorted(key for key in self.seconds if key <= second)
+        return [(key, *self.seconds.pop(key)) for key in closed]
+
+
+class Watch:
+    """The detectors for one run and the shifts they found"""
+
+    def __init__(self, started, warmup, threshold, min_requests):
+        self.started = started
+        self.min_requests = min_requests
+        # p95 is watched as log(p95), so its min_change is relative: 20% either way
+        self.p95 = ShiftDetector(threshold=threshold, warmup=warmup, min_sd=0.05, min_change=math.log(1.2))
+        self.errors = RateShiftDetector(threshold=threshold, warmup=warmup, min_change=0.01)
+        self.shifts = []
+
+    def observe(self, second, requests, failures, histogram):
+        if requests < self.min_requests:
+            return []
+        at = second - self.started
+        found = []
+        shift = self.p95.update(at, math.log(max(histogram.value_at(95), 1)))
+        if shift:
+            direction, start, before, after = shift
+            found.append(f"p95 shift {direction} at t={start:.0f}s: "
+                         f"{math.exp(before) / 1000:.0f}ms -> {math.exp(after) / 1000:.0f}ms")
+        shift = self.errors.update(at, failures, requests)
+        if shift:
+            direction, start, before, after = shift
+            found.append(f"error rate shift {direction} at t={start:.0f}s: {before:.1%} -> {after:.1%}")
+        self.shifts.extend(found)
+        return found
+
+
+_seconds = SecondStats()
+_watch = None
+_loop = None
+
+
+def _announce(environment, message):
+    print(f"[anomaly] {message}", flush=True)
+    environment.events.request.fire(
+        request_type="ANOMALY",
+        name=message.split(" at ")[0],
+        response_time=0,
+        response_length=0,
+        exception=AnomalyDetected(message),
+        context={},
+    )
+
+
+def _evaluate_loop(environment, lag):
+    while True:
+        gevent.sleep(1.0 - time.time() % 1.0)
+        for second, requests, failures, histogram in _seconds.pop_until(int(time.time()) - lag):
+            for message in _watch.observe(second, requests, failures, histogram):
+                _announce(environment, message)
+
+
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument("--anomaly-warmup", type=int, default=30,
+                        help="Seconds of traffic the baselines learn from before shifts are flagged")
+    parser.add_argument("--anomaly-threshold", type=float, default=8.0,
+                        help="CUSUM decision threshold in standard deviations (lower flags sooner)")
+    parser.add_argument("--anomaly-min-requests", type=int, default=20,
+                        help="Seconds with fewer requests than this are not evaluated")
+
+
+@events.request.add_listener
+def on_request(request_type, response_time=None, exception=None, **kwargs):
+    if request_type == "ANOMALY":
+        return
+    _seconds.add(int(time.time()), response_time or 0, exception is not None)
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    closed = _seconds.pop_until(int(time.time()))
+    data["anomaly_seconds"] = [[second, requests, failures, histogram.encode()]
+                               for second, requests, failures, histogram in closed]
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    for second, requests, failures, payload in data.get("anomaly_seconds", []):
+        _seconds.merge(second, requests, failures, HdrHistogram.decode(payload))
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global _watch, _loop
+    _seconds.seconds.clear()
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    options = environment.parsed_options
+    _watch = Watch(time.time(), getattr(options, "anomaly_warmup", 30), getattr(options, "anomaly_threshold", 8.0),
+                   getattr(options, "anomaly_min_requests", 20))
+    if _loop is None:
+        # A second is final once every worker has reported past it
+        lag = 2 * WORKER_REPORT_INTERVAL + 1 if isinstance(environment.runner, MasterRunner) else 1
+        _loop = gevent.spawn(_evaluate_loop, environment, lag)
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    global _loop
+    if _loop is not None:
+        _loop.kill(block=False)
+        _loop = None
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner) or _watch is None:
+        return
+    print("\n=== Latency and error-rate shifts ===")
+    for message in _watch.shifts or ["none detected"]:
+        print(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the detectors on synthetic traffic (stationary unless --shift-at)")
+    parser.add_argument("--seconds", type=int, default=3600)
+    parser.add_argument("--rps", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--seeds", type=int, default=6)
+    parser.add_argument("--shift-at", type=int, help="Second at which the error rate moves to --shift-to")
+    parser.add_argument("--shift-to", type=float, default=0.05)
+    args = parser.parse_args()
+
+    reported = 0
+    for seed in range(args.seeds):
+        shifts = simulate(args.seconds, args.rps, args.error_rate, seed, args.shift_at, args.shift_to)
+        reported += len(shifts)
+        print(f"seed {seed}: {'; '.join(shifts) or 'no shifts'}")
+    if args.shift_at is None and reported:
+        # Every report on stationary input is a false alarm
+        print(f"FAIL: {reported} shifts reported on stationary input")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
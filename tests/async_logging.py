@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+async_logging.py - Queue-based, batched logging for load generators and setup scripts
+
+Records are filtered (sampling and a per-type rate limit) and queued by the
+caller; a background OS thread formats them and writes each batch with one
+write and one flush per destination. Under gevent the thread is a real
+thread, so log I/O never runs on the hub.
+
+    logger = async_logging.install(logging.getLogger(__name__), per_type_rate=5,
+                                   sample={"booking_created": 0.01})
+    logger.info("Booking %s created", booking_id, extra={"kind": "booking_created"})
+
+A record's type is its "kind" extra if given, else its call site
+(module:line). Warnings and errors are never sampled, only rate limited;
+a record that gets through after others of its type were dropped says how
+many. Progress replaces one print per operation with a periodic line:
+
+    progress = async_logging.Progress("populate", interval=5)
+    progress.tick("users")
+    ...
+    progress.close()
+"""
+
+import importlib
+import logging
+import random
+import sys
+import time
+
+
+DEFAULT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def _native(module, name):
+    """The original object even if gevent has monkey-patched module"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(importlib.import_module(module), name)
+    return monkey.get_original(module, name)
+
+
+# Raw OS threads and locks: under gevent a threading.Thread would be a greenlet
+start_new_thread = _native("_thread", "start_new_thread")
+allocate_lock = _native("_thread", "allocate_lock")
+SimpleQueue = _native("queue", "SimpleQueue")
+Empty = _native("queue", "Empty")
+sleep = _native("time", "sleep")
+
+
+class _TypeLimiter:
+    """Producer-side sampling and token-bucket rate limit per record type"""
+
+    def __init__(self, per_type_rate=None, sample=None, default_sample=1.0):
+        self.rate = per_type_rate
+        self.sample = sample or {}
+        self.default_sample = default_sample
+        self.buckets = {}
+        self.dropped = {}
+
+    def admit(self, record):
+        kind = getattr(record, "kind", None) or f"{record.module}:{record.lineno}"
+        if record.levelno < logging.WARNING:
+            fraction = self.sample.get(kind, self.default_sample)
+            if fraction < 1.0 and random.random() >= fraction:
+                self.dropped[kind] = self.dropped.get(kind, 0) + 1
+                return False
+
+        if self.rate:
+            now = time.monotonic()
+            tokens, last = self.buckets.get(kind, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - last) * self.rate)
+            if tokens < 1.0:
+                self.buckets[kind] = (tokens, now)
+                self.dropped[kind] = self.dropped.get(kind, 0) + 1
+                return False
+            self.buckets[kind] = (tokens - 1.0, now)
+
+        dropped = self.dropped.pop(kind, 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class AsyncHandler(logging.Handler):
+    """Puts admitted records on a queue drained in batches by a background thread"""
+
+    def __init__(self, streams, fmt=DEFAULT_FORMAT, per_type_rate=None, sample=None, default_sample=1.0,
+                 batch_size=512, flush_interval=0.5, capacity=100_000):
+        super().__init__()
+        self.setFormatter(logging.Formatter(fmt))
+        self.streams = streams
+        self.limiter = _TypeLimiter(per_type_rate, sample, default_sample)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.capacity = capacity
+        self.overflow = 0
+        self._queue = SimpleQueue()
+        self._running = allocate_lock()
+        self._start()
+
+    def _start(self):
+        self._running.acquire()
+        start_new_thread(self._drain, ())
+
+    # Called on the hot path: no formatting, no I/O, no lock
+    def handle(self, record):
+        if not self.filter(record) or not self.limiter.admit(record):
+            return False
+        if self._queue.qsize() >= self.capacity:
+            self.overflow += 1
+            return False
+        if not self._running.locked():
+            # logging.config closes every handler when it reconfigures; keep going
+            self._start()
+        self._queue.put(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+    def _format(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            line = f"unformattable log record from {record.module}:{record.lineno}"
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" [{suppressed} similar suppressed]"
+        return line
+
+    def _drain(self):
+        try:
+            self._drain_batches()
+        finally:
+            self._running.release()
+
+    def _drain_batches(self):
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [record for record in batch if record is not None]
+            if self.overflow:
+                dropped, self.overflow = self.overflow, 0
+                batch.append(logging.makeLogRecord({
+                    "msg": f"log queue full, dropped {dropped} records", "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                }))
+            if batch:
+                self._write("\n".join(self._format(record) for record in batch) + "\n")
+
+    def _write(self, text):
+        for stream in self.streams:
+            try:
+                stream.write(text)
+                stream.flush()
+            except Exception:
+                pass
+
+    def close(self):
+        """Write out everything queued so far and stop the thread (restarted on the next record)"""
+        if self._running.locked():
+            self._queue.put(None)
+            # released by the drain thread once the queue is written out
+            if self._running.acquire(timeout=5):
+                self._running.release()
+        super().close()
+
+
+def install(logger=None, level=logging.INFO, stream=sys.stderr, log_file=None, **options):
+    """Route logger (the root logger by default) through an AsyncHandler; returns the logger.
+
+    options are passed to AsyncHandler (fmt, per_type_rate, sample, ...).
+    """
+    logger = logger if logger is not None else logging.getLogger()
+    streams = [stream] if stream is not None else []
+    if log_file:
+        streams.append(open(log_file, "a", buffering=64 * 1024))
+    handler = AsyncHandler(streams, **options)
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    if logger.name != "root":
+        logger.propagate = False
+    return logger
+
+
+class Progress:
+    """Counts operations and prints one line per interval from a background thread"""
+
+    def __init__(self, label, interval=5.0, stream=sys.stdout):
+        self.label = label
+        self.interval = interval
+        self.stream = stream
+        self.counts = {}
+        self._last = {}
+        self._started = time.monotonic()
+        self._done = False
+        start_new_thread(self._run, ())
+
+    def tick(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def line(self):
+        elapsed = time.monotonic() - self._started
+        parts = []
+        for name, count in list(self.counts.items()):
+            delta = count - self._last.get(name, 0)
+            self._last[name] = count
+            parts.append(f"{name} {count}" + (f" (+{delta})" if delta != count else ""))
+        return f"[{self.label} {elapsed:6.1f}s] " + (", ".join(parts) or "waiting")
+
+    def _run(self):
+        while not self._done:
+            sleep(self.interval)
+            if not self._done:
+                self.stream.write(self.line() + "\n")
+                self.stream.flush()
+
+    def close(self):
+        """Stop the periodic line and print the final counts"""
+        if self._done:
+            return
+        self._done = True
+        self.stream.write(self.line() + "\n")
+        self.stream.flush()
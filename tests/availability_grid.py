@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+availability_grid.py - Bitset availability per space and date for generating valid bookings
+
+Each (space, date) is one integer with a bit per 15-minute slot of the day
+(bit 0 is 00:00-00:15), set while the slot is taken. Finding every place a
+window of k slots fits is a handful of shift-and operations on that
+integer, so choosing a free slot costs about the same however full the day
+is, and thousands of spaces cost nothing until they are booked:
+
+    grid = AvailabilityGrid(open_hour=8, close_hour=22)
+    start, end = grid.take(space_id, date, 60)       # reserve a free window (minutes)
+    # send the booking, then on the response
+    grid.confirm(booking_id, space_id, date, start, end)   # 201
+    grid.conflict(space_id, date, start, end)              # CONFLICT: someone else holds it, keep it taken
+    grid.release(space_id, date, start, end)               # any other rejection
+    grid.cancel(booking_id)                                # after a successful DELETE
+
+    generator = BookingGenerator(grid, space_ids, dates, user_id)
+    body, slot = generator.next()                    # serialized POST /booking body, or None when full
+
+The grid only knows what this process booked or was refused; with several
+Locust workers give each its own spaces (or dates), or expect a CONFLICT
+the first time another worker's booking is hit. overlap="map_db" follows
+the map_db services, which reject any second booking of a space on a date,
+so a booking takes the whole day. Plain module, no Locust listeners.
+
+    python availability_grid.py --spaces 5000 --dates 7 --seconds 5
+"""
+
+import argparse
+import json
+import random
+import time
+
+from slot_allocator import minute_to_iso
+
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def _bits(first, count):
+    return ((1 << count) - 1) << first
+
+
+def fits(free, k):
+    """Bits i of free where slots i..i+k-1 are all free (shift-and, doubling the run length)"""
+    length = 1
+    while length < k:
+        step = min(length, k - length)
+        free &= free >> step
+        length += step
+    return free
+
+
+def nth_bit(bits, n):
+    """Index of the n-th (0-based) set bit"""
+    for _ in range(n):
+        bits &= bits - 1
+    return (bits & -bits).bit_length() - 1
+
+
+class AvailabilityGrid:
+    """Taken 15-minute slots per (space, date), as one integer bitset each"""
+
+    def __init__(self, open_hour=8, close_hour=22, overlap="dynamo_db"):
+        if overlap not in ("map_db", "dynamo_db"):
+            raise ValueError(f"unknown overlap rule {overlap!r}")
+        self.open_slot = open_hour * 60 // SLOT_MINUTES
+        self.close_slot = close_hour * 60 // SLOT_MINUTES
+        self.open_mask = _bits(self.open_slot, self.close_slot - self.open_slot)
+        self.overlap = overlap
+        self.taken = {}
+        self.bookings = {}
+
+    def _mask(self, start, end):
+        """Bits covering [start, end) minutes, widened to whole slots (the whole day for map_db)"""
+        if self.overlap == "map_db":
+            return self.open_mask
+        first = start // SLOT_MINUTES
+        return _bits(first, -(-end // SLOT_MINUTES) - first)
+
+    def free(self, space_id, date):
+        """Bitset of the free slots within opening hours"""
+        taken = self.taken.get((space_id, date), 0)
+        if self.overlap == "map_db" and taken:
+            return 0
+        return self.open_mask & ~taken
+
+    def windows(self, space_id, date, minutes):
+        """Bitset of the slots where a window of this many minutes can start"""
+        return fits(self.free(space_id, date), -(-minutes // SLOT_MINUTES))
+
+    def free_windows(self, space_ids, date, minutes):
+        """{space_id: start-slot bitset} for every space with room for the window"""
+        found = {}
+        for space_id in space_ids:
+            bits = self.windows(space_id, date, minutes)
+            if bits:
+                found[space_id] = bits
+        return found
+
+    def mark(self, space_id, date, start, end):
+        key = (space_id, date)
+        self.taken[key] = self.taken.get(key, 0) | self._mask(start, end)
+
+    def unmark(self, space_id, date, start, end):
+        key = (space_id, date)
+        taken = self.taken.get(key, 0) & ~self._mask(start, end)
+        if taken:
+            self.taken[key] = taken
+        else:
+            self.taken.pop(key, None)
+
+    def take(self, space_id, date, minutes):
+        """Reserve a random free window and return its (start, end) in minutes, or None"""
+        bits = self.windows(space_id, date, minutes)
+        if not bits:
+            return None
+        slot = nth_bit(bits, random.randrange(bin(bits).count("1")))
+        start = slot * SLOT_MINUTES
+        self.mark(space_id, date, start, start + minutes)
+        return start, start + minutes
+
+    def confirm(self, booking_id, space_id, date, start, end):
+        """A reserved window was booked; remember it so a delete can free it"""
+        self.bookings[booking_id] = (space_id, date, start, end)
+
+    def conflict(self, space_id, date, start, end):
+        """The service already holds a booking there: keep the window taken"""
+        self.mark(space_id, date, start, end)
+
+    def release(self, space_id, date, start, end):
+        """A reserved window was rejected for another reason; free it again"""
+        self.unmark(space_id, date, start, end)
+
+    def cancel(self, booking_id):
+        """Free the window of a confirmed booking that has been deleted"""
+        slot = self.bookings.pop(booking_id, None)
+        if slot is not None:
+            self.unmark(*slot)
+        return slot is not None
+
+
+class BookingGenerator:
+    """Serialized POST /booking bodies for windows the grid says are free.
+
+    Spaces without room on a date are dropped from that date's candidates,
+    so picking stays cheap as the grid fills; release() or cancel() on the
+    grid puts capacity back, and refill() makes the spaces candidates again.
+    """
+
+    def __init__(self, grid, space_ids, dates, user_id, durations=(60, 120), occupants=(1, 4)):
+        self.grid = grid
+        self.space_ids = list(space_ids)
+        self.dates = list(dates)
+        self.user_id = user_id
+        self.durations = durations
+        self.occupants = occupants
+        self.candidates = {}
+        self.refill()
+
+    def refill(self):
+        self.candidates = {date: list(self.space_ids) for date in self.dates}
+
+    def next(self):
+        """(body bytes, (space_id, date, start, end)) for a free window, or None once every space is full"""
+        duration = random.choice(self.durations)
+        while self.candidates:
+            date = random.choice(list(self.candidates))
+            spaces = self.candidates[date]
+            while spaces:
+                i = random.randrange(len(spaces))
+                space_id = spaces[i]
+                window = self.grid.take(space_id, date, duration)
+                if window is not None:
+                    start, end = window
+                    body = json.dumps({
+                        "spaceID": space_id,
+                        "date": date,
+                        "userID": self.user_id,
+                        "occupants": random.randint(*self.occupants),
+                        "startTime": minute_to_iso(date, start),
+                        "endTime": minute_to_iso(date, end),
+                    }).encode()
+                    return body, (space_id, date, start, end)
+                # No room for this duration; shorter ones may still fit, but dropping
+                # the space keeps the pick O(1) and refill() brings it back
+                spaces[i] = spaces[-1]
+                spaces.pop()
+            del self.candidates[date]
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure booking generation rate from the availability grid")
+    parser.add_argument("--spaces", type=int, default=5000)
+    parser.add_argument("--dates", type=int, default=7)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--cancel-rate", type=float, default=0.2,
+                        help="Fraction of generated bookings cancelled again, to exercise frees")
+    parser.add_argument("--overlap", choices=("map_db", "dynamo_db"), default="dynamo_db")
+    args = parser.parse_args()
+
+    grid = AvailabilityGrid(overlap=args.overlap)
+    space_ids = [f"BENCH-{i}" for i in range(args.spaces)]
+    dates = [f"2030-01-{day + 1:02d}" for day in range(args.dates)]
+    generator = BookingGenerator(grid, space_ids, dates, user_id=1)
+
+    generated = 0
+    seen = {}
+    deadline = time.perf_counter() + args.seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        item = generator.next()
+        if item is None:
+            break
+        _, (space_id, date, start, end) = item
+        # Check against the bookings generated so far: nothing may overlap
+        for other_start, other_end in seen.get((space_id, date), ()):
+            if start < other_end and end > other_start or args.overlap == "map_db":
+                raise AssertionError(f"overlapping window generated for {space_id} on {date}")
+        generated += 1
+        if random.random() < args.cancel_rate:
+            grid.release(space_id, date, start, end)
+        else:
+            seen.setdefault((space_id, date), []).append((start, end))
+    elapsed = time.perf_counter() - started
+
+    kept = sum(len(windows) for windows in seen.values())
+    print(f"Generated {generated} bookings in {elapsed:.2f}s ({generated / elapsed:,.0f}/s), "
+          f"{kept} kept across {len(seen)} space-days, none overlapping")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+booking_audit.py - Post-run audit for overlapping bookings in the store
+
+The booking service has no "list bookings" endpoint (booking IDs are random),
+so bookings come from one of:
+
+    # a dump: JSON lines, a JSON array, or a DynamoDB export ({"Item": {...}} lines)
+    python booking_audit.py bookings.jsonl [more.jsonl ...]
+
+    # the DynamoDB table itself, through the DateIndex the service queries
+    python booking_audit.py --dynamodb --dates 2026-10-19,2026-10-20 --save bookings.jsonl
+
+    # the booking API, one GET /booking/<date>/<id> per line of a "date,id" file
+    # (booking_oracle.py --record-bookings writes one during a run)
+    python booking_audit.py --host http://<alb_dns_name> --ids held.csv
+
+Bookings are grouped per (space, date) like the service's own check, sorted
+with NumPy and swept once: every pair where a later booking starts before an
+earlier one ends is printed (or written with --out). Exits 1 if any pair is found.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from request_meta import timestamp
+
+
+TABLE_NAME = "ReservationsTable"
+INDEX_NAME = "DateIndex"
+
+
+def _from_dynamodb_json(value):
+    """Unwrap a typed DynamoDB attribute ({"S": ...}, {"N": ...})"""
+    if isinstance(value, dict) and len(value) == 1:
+        kind, inner = next(iter(value.items()))
+        if kind == "N":
+            return int(inner) if inner.lstrip("-").isdigit() else float(inner)
+        if kind in ("S", "BOOL"):
+            return inner
+    return value
+
+
+def normalize(record):
+    """Return {"bookingid", "spaceid", "date", "starttime", "endtime"} from any dump flavour"""
+    if "Item" in record and isinstance(record["Item"], dict):
+        record = {k: _from_dynamodb_json(v) for k, v in record["Item"].items()}
+    record = {str(k).lower(): v for k, v in record.items()}
+    return {
+        "bookingid": record.get("bookingid"),
+        "spaceid": record.get("spaceid"),
+        "date": record.get("date"),
+        "starttime": record.get("starttime"),
+        "endtime": record.get("endtime"),
+    }
+
+
+def read_dump(path):
+    """Yield bookings from a JSON array or JSON lines file"""
+    with open(path) as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == "[":
+            for record in json.load(f):
+                yield normalize(record)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield normalize(json.loads(line))
+
+
+def fetch_dynamodb(dates, table=TABLE_NAME, region=None):
+    """Yield every booking on the given dates by querying the DateIndex"""
+    import boto3
+
+    client = boto3.client(
+        "dynamodb",
+        region_name=region or os.getenv("AWS_REGION", "us-west-2"),
+        endpoint_url=os.getenv("DYNAMODB_ENDPOINT") or None,
+    )
+    paginator = client.get_paginator("query")
+    for date in dates:
+        pages = paginator.paginate(
+            TableName=table,
+            IndexName=INDEX_NAME,
+            KeyConditionExpression="#d = :d",
+            ExpressionAttributeNames={"#d": "date"},
+            ExpressionAttributeValues={":d": {"S": date}},
+        )
+        for page in pages:
+            for item in page.get("Items", []):
+                yield normalize({"Item": item})
+
+
+def fetch_api(host, ids, workers=32):
+    """GET /booking/<date>/<id> for each (date, id); bookings that are gone are skipped"""
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def get(date_id):
+        date, booking_id = date_id
+        response = session.get(f"{host.rstrip('/')}/booking/{date}/{booking_id}", timeout=30)
+        if response.status_code != 200:
+            return None
+        return normalize(response.json())
+
+    missing = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for booking in pool.map(get, ids):
+            if booking is None:
+                missing += 1
+            else:
+                yield booking
+    if missing:
+        print(f"{missing} of the listed bookings no longer exist")
+
+
+def read_ids(path):
+    with open(path, newline="") as f:
+        return [(row[0], int(row[1])) for row in csv.reader(f) if len(row) >= 2 and row[1].strip().isdigit()]
+
+
+def _to_seconds(values):
+    """Vectorized RFC 3339 parsing, falling back per value for non-UTC offsets"""
+    try:
+        return np.array([v[:-1] if v.endswith("Z") else v for v in values], dtype="datetime64[s]").astype(np.int64)
+    except ValueError:
+        return np.array([timestamp(v) for v in values], dtype=np.int64)
+
+
+def load_arrays(bookings):
+    """Turn booking dicts into (ids, group labels, group codes, starts, ends) arrays"""
+    ids, keys, starts, ends = [], [], [], []
+    skipped = 0
+    for b in bookings:
+        if None in (b["bookingid"], b["spaceid"], b["date"], b["starttime"], b["endtime"]):
+            skipped += 1
+            continue
+        ids.append(b["bookingid"])
+        keys.append(f"{b['spaceid']}\t{b['date']}")
+        starts.append(b["starttime"])
+        ends.append(b["endtime"])
+    if skipped:
+        print(f"Skipped {skipped} records without space, date or times")
+
+    labels, codes = np.unique(np.array(keys, dtype=str), return_inverse=True)
+    return (
+        np.array(ids, dtype=np.int64),
+        labels,
+        codes.astype(np.int64),
+        _to_seconds(starts),
+        _to_seconds(ends),
+    )
+
+
+def find_overlaps(codes, starts, ends):
+    """Return index arrays (a, b) of every overlapping pair within a group.
+
+    Sorting by (group, start) puts every booking that can overlap booking i
+    right after it: exactly those j > i in the same group with start_j < end_i.
+    A searchsorted over the packed (group, start) keys finds that run for all
+    bookings at once.
+    """
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    base = min(starts.min(), ends.min())
+    span = int(max(starts.max(), ends.max()) - base) + 1
+    order = np.lexsort((starts, codes))
+    packed_start = codes[order] * span + (starts[order] - base)
+    packed_end = codes[order] * span + (ends[order] - base)
+
+    upper = np.searchsorted(packed_start, packed_end, side="left")
+    first = np.arange(len(order)) + 1
+    counts = np.maximum(upper - first, 0)
+
+    left = np.repeat(np.arange(len(order)), counts)
+    # offsets 0..count-1 within each run, without a Python loop
+    run_starts = np.repeat(np.cumsum(counts) - counts, counts)
+    right = left + 1 + (np.arange(counts.sum()) - run_starts)
+    # start_j < end_i holds by construction; the service's other half of the test
+    keep = ends[order][right] > starts[order][left]
+    return order[left[keep]], order[right[keep]]
+
+
+def _iso(seconds):
+    return np.datetime_as_string(np.datetime64(int(seconds), "s")) + "Z"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit the booking store for overlapping bookings")
+    parser.add_argument("dumps", nargs="*", help="Dump files (JSON lines, JSON array or DynamoDB export)")
+    parser.add_argument("--dynamodb", action="store_true", help="Query the DynamoDB table for --dates")
+    parser.add_argument("--table", default=TABLE_NAME, help="DynamoDB table name")
+    parser.add_argument("--dates", default="", help="Comma separated dates (YYYY-MM-DD) for --dynamodb")
+    parser.add_argument("--host", default="", help="Booking service base URL for --ids")
+    parser.add_argument("--ids", default="", help="CSV of date,bookingId to fetch through the API")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent API requests for --ids")
+    parser.add_argument("--save", default="", help="Also write the fetched bookings here as JSON lines")
+    parser.add_argument("--out", default="", help="Write violating pairs to this CSV instead of stdout")
+    args = parser.parse_args()
+
+    sources = []
+    for path in args.dumps:
+        sources.append(read_dump(path))
+    if args.dynamodb:
+        dates = [d.strip() for d in args.dates.split(",") if d.strip()]
+        if not dates:
+            parser.error("--dynamodb needs --dates")
+        sources.append(fetch_dynamodb(dates, args.table))
+    if args.ids:
+        if not args.host:
+            parser.error("--ids needs --host")
+        sources.append(fetch_api(args.host, read_ids(args.ids), args.workers))
+    if not sources:
+        parser.error("give dump files, --dynamodb --dates or --host --ids")
+
+    t0 = time.perf_counter()
+    bookings = [b for source in sources for b in source]
+    if args.save:
+        with open(args.save, "w") as f:
+            for b in bookings:
+                f.write(json.dumps(b) + "\n")
+    t1 = time.perf_counter()
+
+    ids, labels, codes, starts, ends = load_arrays(bookings)
+    del bookings
+    t2 = time.perf_counter()
+    a, b = find_overlaps(codes, starts, ends)
+    t3 = time.perf_counter()
+
+    print(f"Loaded {len(ids)} bookings in {len(labels)} space/date groups ({t1 - t0:.2f}s fetch, {t2 - t1:.2f}s parse)")
+    print(f"Sweep took {t3 - t2:.3f}s; overlapping pairs: {len(a)}")
+    if len(a):
+        affected = len(np.unique(codes[a]))
+        print(f"Affected space/date groups: {affected}")
+
+    rows = (
+        (*labels[codes[i]].split("\t"), ids[i], _iso(starts[i]), _iso(ends[i]), ids[j], _iso(starts[j]), _iso(ends[j]))
+        for i, j in zip(a.tolist(), b.tolist())
+    )
+    header = ("space", "date", "booking_a", "start_a", "end_a", "booking_b", "start_b", "end_b")
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Wrote {len(a)} pairs to {args.out}")
+    elif len(a):
+        print("\t".join(header))
+        for row in rows:
+            print("\t".join(str(v) for v in row))
+
+    sys.exit(1 if len(a) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+booking_oracle.py - Live double-booking detector for Locust runs
+
+Add this file to the locustfile list. Every successful POST /booking is
+checked against the bookings accepted so far for the same space and date;
+an overlap fires a failed "ORACLE double-booking" request (so it shows up in
+the Locust stats and failure CSVs) and bumps the violation counter. A
+successful DELETE /booking/<date>/<id> removes the booking again.
+
+    locust -f locust_ramp_users.py,booking_oracle.py --headless ...
+
+Bookings made before the run started are not known to the oracle.
+--record-bookings PATH writes the bookings still held at the end as
+"date,id" lines for a post-run booking_audit.py --ids pass.
+
+Each worker checks its own bookings the moment they are accepted and ships
+them to the master, which checks across workers (a few seconds later, at
+the report interval). Reports from different workers interleave, so the
+master applies bookings and deletes in the order they completed, and only
+up to the time every worker has reported past; a booking accepted after a
+delete on another worker is not taken for a clash with the deleted one.
+The worker clocks are assumed to agree to well within a request.
+"""
+
+import heapq
+import itertools
+import random
+import time
+
+from locust import events
+from locust.runners import WORKER_REPORT_INTERVAL, MasterRunner, WorkerRunner
+
+from request_meta import booking_id, booking_request, status_code, timestamp, url_path
+
+
+# Overlapping pairs kept for the summary; violations counts them all
+PAIRS_KEPT = 20
+# A worker silent for this long no longer holds back the master's ordering
+STALE_AFTER = 3 * WORKER_REPORT_INTERVAL
+
+
+class DoubleBookingError(Exception):
+    pass
+
+
+class _Node:
+    __slots__ = ("key", "start", "end", "value", "priority", "left", "right", "max_end")
+
+    def __init__(self, key, start, end, value):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.value = value
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.max_end = end
+
+
+def _update(node):
+    node.max_end = node.end
+    if node.left is not None and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+
+
+def _split(node, key):
+    """Split into (keys < key, keys >= key)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        _update(node)
+        return node, right
+    left, node.left = _split(node.left, key)
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _insert(node, new):
+    if node is None:
+        return new
+    if new.priority > node.priority:
+        new.left, new.right = _split(node, new.key)
+        _update(new)
+        return new
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+    else:
+        node.right = _insert(node.right, new)
+    _update(node)
+    return node
+
+
+def _delete(node, key):
+    if node is None:
+        return None, False
+    if node.key == key:
+        return _merge(node.left, node.right), True
+    if key < node.key:
+        node.left, removed = _delete(node.left, key)
+    else:
+        node.right, removed = _delete(node.right, key)
+    if removed:
+        _update(node)
+    return node, removed
+
+
+class IntervalTree:
+    """[start, end) intervals in a treap keyed by (start, id) and augmented with max end.
+
+    insert, remove and the first overlap lookup are O(log n) expected.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def insert(self, start, end, key, value=None):
+        self.root = _insert(self.root, _Node((start, key), start, end, value))
+        self.size += 1
+
+    def remove(self, start, key):
+        self.root, removed = _delete(self.root, (start, key))
+        self.size -= removed
+        return removed
+
+    def overlapping(self, start, end):
+        """Return (start, end, key, value) for every interval overlapping [start, end)"""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            # Nothing in this subtree ends after start
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            # Everything right of a node starting at or after end starts later still
+            if node.start < end:
+                if node.end > start:
+                    found.append((node.start, node.end, node.key[1], node.value))
+                stack.append(node.right)
+        return found
+
+    def __len__(self):
+        return self.size
+
+
+class DoubleBookingOracle:
+    """Accepted bookings per (space, date); reports the ones that overlap"""
+
+    def __init__(self):
+        self.trees = {}
+        self.index = {}
+        self.checked = 0
+        self.violations = 0
+        self.pairs = []
+
+    def add(self, space_id, date, start, end, booking_id, source=None):
+        """Record an accepted booking; return the (booking_id, source) pairs it overlaps"""
+        tree = self.trees.get((space_id, date))
+        if tree is None:
+            tree = self.trees[(space_id, date)] = IntervalTree()
+        clashes = [(key, value) for _, _, key, value in tree.overlapping(start, end)]
+        tree.insert(start, end, booking_id, source)
+        self.index[(date, booking_id)] = (space_id, start)
+        self.checked += 1
+        return clashes
+
+    def remove(self, date, booking_id):
+        entry = self.index.pop((date, booking_id), None)
+        if entry is None:
+            return False
+        space_id, start = entry
+        tree = self.trees[(space_id, date)]
+        tree.remove(start, booking_id)
+        if not len(tree):
+            del self.trees[(space_id, date)]
+        return True
+
+    def violation(self, space_id, date, booking_id, other_id):
+        self.violations += 1
+        if len(self.pairs) < PAIRS_KEPT:
+            self.pairs.append((space_id, date, other_id, booking_id))
+
+
+class WorkerMerge:
+    """Worker entries held until every live worker has reported past their time, then released in time order"""
+
+    def __init__(self, stale_after=STALE_AFTER):
+        self.stale_after = stale_after
+        self.heap = []
+        self.sequence = itertools.count()
+        self.reported = {}
+
+    def push(self, client_id, entries, reported_at):
+        for entry in entries:
+            heapq.heappush(self.heap, (entry[1], next(self.sequence), client_id, entry))
+        self.reported[client_id] = (reported_at, time.time())
+
+    def ready(self, workers=(), flush=False):
+        """Pop the (client_id, entry) pairs no report still to come can precede"""
+        now = time.time()
+        for client_id in workers:
+            # Connected but not reported yet: hold everything until it does (or goes stale)
+            self.reported.setdefault(client_id, (0.0, now))
+        live = [at for at, received in self.reported.values() if now - received <= self.stale_after]
+        watermark = float("inf") if flush or not live else min(live)
+        while self.heap and self.heap[0][0] <= watermark:
+            _, _, client_id, entry = heapq.heappop(self.heap)
+            yield client_id, entry
+
+
+_oracle = DoubleBookingOracle()
+_worker_entries = WorkerMerge()
+_pending = []
+
+
+def _report(environment, space_id, date, new_id, clashes):
+    for other_id, _ in clashes:
+        _oracle.violation(space_id, date, new_id, other_id)
+        if isinstance(environment.runner, WorkerRunner):
+            _pending.append(["pair", time.time(), space_id, date, other_id, new_id])
+    environment.events.request.fire(
+        request_type="ORACLE",
+        name="double-booking",
+        response_time=0,
+        response_length=0,
+        exception=DoubleBookingError(f"{space_id} on {date}: accepted booking overlaps an existing one"),
+        context={},
+    )
+
+
+def _accepted_booking(response):
+    payload = booking_request(response)
+    new_id = booking_id(response)
+    if payload is None or new_id is None:
+        return None
+    try:
+        return (
+            payload["spaceid"],
+            payload["date"],
+            timestamp(payload["starttime"]),
+            timestamp(payload["endtime"]),
+            new_id,
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument(
+        "--record-bookings",
+        type=str,
+        default="",
+        help="Write the bookings still held at the end of the run to this date,id CSV",
+    )
+
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    @environment.events.request.add_listener
+    def on_request(request_type, name, response=None, url=None, exception=None, **kwargs):
+        if request_type not in ("POST", "DELETE") or url is None or response is None:
+            return
+        if not 200 <= status_code(response) < 300:
+            return
+        path = url_path(url).split("?")[0].rstrip("/")
+
+        if request_type == "POST" and path == "/booking":
+            booking = _accepted_booking(response)
+            if booking is None:
+                return
+            clashes = _oracle.add(*booking)
+            if clashes:
+                _report(environment, booking[0], booking[1], booking[4], clashes)
+            if isinstance(environment.runner, WorkerRunner):
+                _pending.append(["add", time.time(), *booking])
+        elif request_type == "DELETE" and path.startswith("/booking/"):
+            parts = path.split("/")
+            if len(parts) != 4:
+                return
+            try:
+                deleted = int(parts[3])
+            except ValueError:
+                return
+            _oracle.remove(parts[2], deleted)
+            if isinstance(environment.runner, WorkerRunner):
+                _pending.append(["remove", time.time(), parts[2], deleted])
+
+    if isinstance(environment.runner, MasterRunner):
+        @environment.events.worker_report.add_listener
+        def on_worker_report(client_id, data):
+            if "oracle_bookings" not in data:
+                return
+            _worker_entries.push(client_id, data["oracle_bookings"], data.get("oracle_reported_at", time.time()))
+            _apply(environment)
+
+
+def _apply(environment, flush=False):
+    """Check the worker entries that are ready, in the order they happened"""
+    workers = list(environment.runner.clients) if isinstance(environment.runner, MasterRunner) else ()
+    for client_id, entry in _worker_entries.ready(workers, flush):
+        if entry[0] == "remove":
+            _oracle.remove(entry[2], entry[3])
+            continue
+        if entry[0] == "pair":
+            _oracle.violation(entry[2], entry[3], entry[5], entry[4])
+            continue
+        space_id, date, start, end, new_id = entry[2:]
+        # Same-worker overlaps were already reported by that worker
+        clashes = [c for c in _oracle.add(space_id, date, start, end, new_id, client_id) if c[1] != client_id]
+        if clashes:
+            _report(environment, space_id, date, new_id, clashes)
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    data["oracle_bookings"] = list(_pending)
+    data["oracle_reported_at"] = time.time()
+    _pending.clear()
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global _oracle, _worker_entries
+    _oracle = DoubleBookingOracle()
+    _worker_entries = WorkerMerge()
+    _pending.clear()
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    _apply(environment, flush=True)
+    print("\n=== Double-booking oracle ===")
+    print(f"Bookings checked: {_oracle.checked}, still held: {len(_oracle.index)}")
+    print(f"Double bookings detected: {_oracle.violations}")
+    for space_id, date, first, second in _oracle.pairs:
+        print(f"  {space_id} {date}: booking {second} overlaps {first}")
+    if _oracle.violations > len(_oracle.pairs):
+        print(f"  ... and {_oracle.violations - len(_oracle.pairs)} more")
+
+    path = getattr(environment.parsed_options, "record_bookings", "")
+    if path:
+        with open(path, "w") as f:
+            for date, held_id in _oracle.index:
+                f.write(f"{date},{held_id}\n")
+        print(f"Wrote {len(_oracle.index)} held bookings to {path}")
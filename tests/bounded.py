@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+bounded.py - Fixed-capacity stand-ins for the lists and sets locustfiles grow
+
+Module and user state that only ever grows (created IDs, latency samples,
+bookings to read back) is harmless in a 10-minute run and inflates RSS and
+GC pauses over a 24-hour soak. These containers keep the interface the
+locustfiles already use and cap the size:
+
+    CREATED_USER_IDS = Reservoir(1000, name="created_user_ids")   # list.append, uniform sample of all
+    self.created_bookings = RingBuffer(500, name="created_bookings")  # list.append, the newest kept
+    bookings = BoundedSet(10000, name="known_bookings")             # set.add/discard, oldest evicted
+    random.choice(bookings)                                          # O(1) on all three
+
+Named containers are counted by tracked(), which memory_stats.py reports
+per worker next to RSS. Plain module, no Locust listeners.
+"""
+
+import random
+import weakref
+from collections import deque
+
+
+_registry = weakref.WeakSet()
+
+
+def tracked():
+    """{name: [items held, capacity, items ever added]} summed over live named containers"""
+    totals = {}
+    for container in list(_registry):
+        entry = totals.setdefault(container.name, [0, 0, 0])
+        entry[0] += len(container)
+        entry[1] += container.capacity
+        entry[2] += container.seen
+    return totals
+
+
+class _Bounded:
+    def __init__(self, capacity, name=None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.name = name
+        self.seen = 0
+        if name:
+            _registry.add(self)
+
+    def choice(self):
+        return self[random.randrange(len(self))]
+
+
+class Reservoir(_Bounded):
+    """A uniform random sample of everything appended (Algorithm R).
+
+    Statistics over it (sum / len, percentiles) estimate those of the full
+    stream; len() is the sample size and seen the stream length.
+    """
+
+    def __init__(self, capacity, name=None):
+        super().__init__(capacity, name)
+        self._items = []
+
+    def append(self, item):
+        self.seen += 1
+        if len(self._items) < self.capacity:
+            self._items.append(item)
+            return
+        i = random.randrange(self.seen)
+        if i < self.capacity:
+            self._items[i] = item
+
+    def clear(self):
+        self._items.clear()
+        self.seen = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class RingBuffer(_Bounded):
+    """The last capacity items appended"""
+
+    def __init__(self, capacity, name=None):
+        super().__init__(capacity, name)
+        self._items = []
+        self._next = 0
+
+    def append(self, item):
+        self.seen += 1
+        if len(self._items) < self.capacity:
+            self._items.append(item)
+            return
+        self._items[self._next] = item
+        self._next = (self._next + 1) % self.capacity
+
+    def clear(self):
+        self._items.clear()
+        self._next = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        # Index 0 is the oldest item still held
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError("ring buffer index out of range")
+        return self._items[(self._next + index) % len(self._items)]
+
+    def __iter__(self):
+        return iter(self._items[self._next:] + self._items[:self._next])
+
+
+class BoundedSet(_Bounded):
+    """A set that forgets its oldest member when full.
+
+    add, discard, membership and a random member are all O(1): members sit
+    in a list (swap-removed on discard) for choice(), and in an insertion
+    queue, compacted as it fills with discarded entries, for eviction.
+    """
+
+    def __init__(self, capacity, name=None):
+        super().__init__(capacity, name)
+        self._items = []
+        self._where = {}
+        self._order = deque()
+        self._sequence = 0
+
+    def add(self, item):
+        if item in self._where:
+            return
+        self.seen += 1
+        while len(self._items) >= self.capacity:
+            oldest, sequence = self._order.popleft()
+            entry = self._where.get(oldest)
+            if entry is not None and entry[1] == sequence:
+                self.discard(oldest)
+        self._sequence += 1
+        self._where[item] = [len(self._items), self._sequence]
+        self._items.append(item)
+        self._order.append((item, self._sequence))
+        if len(self._order) > 2 * self.capacity:
+            self._order = deque(entry for entry in self._order
+                                if self._where.get(entry[0], (None, None))[1] == entry[1])
+
+    def discard(self, item):
+        entry = self._where.pop(item, None)
+        if entry is None:
+            return
+        index = entry[0]
+        last = self._items.pop()
+        if index < len(self._items):
+            self._items[index] = last
+            self._where[last][0] = index
+
+    def remove(self, item):
+        if item not in self._where:
+            raise KeyError(item)
+        self.discard(item)
+
+    def clear(self):
+        self._items.clear()
+        self._where.clear()
+        self._order.clear()
+
+    def __contains__(self, item):
+        return item in self._where
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        # Positional access in no particular order, for random.choice
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(list(self._items))
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+capacity_sim.py - Discrete-event capacity model of the user, space and booking services
+
+Predicts latency percentiles against ECS task count (ecs_count in terraform/)
+without an AWS run. Every service has a pool of tasks behind the ALB (round
+robin), each task a FIFO queue served by --concurrency workers. Requests
+follow the map_db handlers:
+
+    create_space, create_booking    auth call to the user service (GET /user/{id}), then the handler
+    create_booking                  + date-index query cost per booking already on that date
+    everything else                 the handler alone
+
+Service times are lognormal, fitted from measurements taken without
+queueing: the sample outputs latency_test.py prints ({status: [(start, end,
+ms), ...]}) or a Locust *_stats.csv row from a low-user run. For
+create_booking fitted from a latency_test.py output, the per-booking index
+cost is the slope of latency over the (same-date) bookings in order, and
+the auth call's median is taken off before fitting the handler itself.
+
+    python capacity_sim.py --rate 40 --tasks 1,2,3,4,6 --duration 7200
+    python capacity_sim.py --fit create_booking=booking_output.txt --fit validate=run_stats.csv:GET /user/[id] \\
+        --mix create_booking=5,get_booking=4,validate=1 --rate 120 --slo-ms 500
+    python capacity_sim.py --rate 80 --tasks 2 --autoscale 0.6:10:60 --profile "0:40,1800:120,5400:40"
+
+Hours of traffic at a few hundred requests per second take seconds; the
+table gives p50/p99/p99.9 per task count, worst per-operation p99, mean
+utilization per service and, with --slo-ms, the smallest count that meets it.
+"""
+
+import argparse
+import ast
+import csv
+import heapq
+import math
+import random
+import statistics
+import time
+from bisect import bisect
+from collections import defaultdict, deque
+
+from service_standin import parse_latency
+
+
+SERVICES = ("user", "space", "booking")
+# operation: (service, needs the auth call first)
+OPERATIONS = {
+    "create_user": ("user", False),
+    "login": ("user", False),
+    "validate": ("user", False),
+    "create_space": ("space", True),
+    "get_space": ("space", False),
+    "create_booking": ("booking", True),
+    "get_booking": ("booking", False),
+}
+# create_user and login come from the sample output in latency_test.py (bcrypt
+# on a 256-CPU task); the others are placeholders until fitted with --fit
+DEFAULT_SERVICE_TIMES = {
+    "create_user": "lognormal:4630:0.02",
+    "login": "lognormal:4630:0.02",
+    "validate": "lognormal:8:0.5",
+    "create_space": "lognormal:15:0.5",
+    "get_space": "lognormal:10:0.5",
+    "create_booking": "lognormal:25:0.5",
+    "get_booking": "lognormal:10:0.5",
+}
+DEFAULT_MIX = "create_booking=4,get_booking=4,get_space=1,validate=1"
+LOCUST_QUANTILES = ("50%", "66%", "75%", "80%", "90%", "95%", "98%", "99%")
+SCALE_PERIOD = 60.0
+
+
+# Fitting
+
+def load_latency_test_samples(path):
+    """(start, end, ms, status) per request, in request order, from a latency_test.py sample output"""
+    with open(path) as f:
+        text = f.read()
+    data = ast.literal_eval(text[text.index("{"):text.rindex("}") + 1])
+    return sorted((start, end, ms, int(status)) for status, rows in data.items() for start, end, ms in rows)
+
+
+def load_latency_test_output(path):
+    """Successful latencies (ms) in request order from a latency_test.py sample output"""
+    return [ms for _, _, ms, status in load_latency_test_samples(path) if 200 <= status < 300]
+
+
+def fit_samples(latencies_ms):
+    """lognormal:MEDIAN:SIGMA by maximum likelihood"""
+    logs = [math.log(max(ms, 0.01)) for ms in latencies_ms]
+    return f"lognormal:{math.exp(statistics.fmean(logs)):.3f}:{statistics.pstdev(logs):.4f}"
+
+
+def fit_quantiles(quantiles_ms):
+    """lognormal:MEDIAN:SIGMA by least squares of log latency on the normal quantile"""
+    normal = statistics.NormalDist()
+    points = [(normal.inv_cdf(p), math.log(ms)) for p, ms in quantiles_ms if ms > 0 and 0 < p < 1]
+    if len(points) < 2:
+        raise ValueError("need at least two positive quantiles to fit")
+    sigma, mu = statistics.linear_regression([z for z, _ in points], [log for _, log in points])
+    return f"lognormal:{math.exp(mu):.3f}:{max(sigma, 0.0):.4f}"
+
+
+def load_locust_row(path, name):
+    """(percent, ms) pairs of one Name row in a Locust *_stats.csv"""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if row.get("Name") == name or f"{row.get('Type')} {row.get('Name')}" == name:
+                return [(float(column.rstrip("%")) / 100, float(row[column]))
+                        for column in LOCUST_QUANTILES if row.get(column) not in (None, "", "N/A")]
+    raise ValueError(f"no row named {name!r} in {path}")
+
+
+def fit(specs, service_times, index_cost_ms):
+    """Apply --fit OP=PATH[:ROW] specs; returns the (possibly fitted) index cost"""
+    booking_samples = None
+    for spec in specs:
+        operation, _, source = spec.partition("=")
+        if operation not in OPERATIONS:
+            raise ValueError(f"unknown operation {operation!r}; one of {', '.join(OPERATIONS)}")
+        path, _, row = source.partition(":")
+        if path.endswith(".csv"):
+            service_times[operation] = fit_quantiles(load_locust_row(path, row))
+        elif operation == "create_booking":
+            booking_samples = load_latency_test_output(path)
+        else:
+            service_times[operation] = fit_samples(load_latency_test_output(path))
+    if booking_samples:
+        # latency_test.py books every room on one date, so latency climbs with the index
+        if index_cost_ms is None and len(booking_samples) > 2:
+            slope, _ = statistics.linear_regression(range(len(booking_samples)), booking_samples)
+            index_cost_ms = max(slope, 0.0)
+        auth_sampler = parse_latency(service_times["validate"])
+        auth_ms = statistics.median(auth_sampler() for _ in range(1001)) * 1000
+        own = [ms - auth_ms - (index_cost_ms or 0.0) * position for position, ms in enumerate(booking_samples)]
+        service_times["create_booking"] = fit_samples(own)
+    return index_cost_ms or 0.0
+
+
+# Simulation
+
+class Task:
+    __slots__ = ("busy", "queue", "busy_time", "online")
+
+    def __init__(self):
+        self.busy = 0
+        self.queue = deque()
+        self.busy_time = 0.0
+        self.online = True
+
+
+class Pool:
+    """The tasks of one service and the ALB's round robin over them"""
+
+    def __init__(self, tasks):
+        self.tasks = [Task() for _ in range(tasks)]
+        self.turn = 0
+        self.pending = 0
+
+    def online(self):
+        return [task for task in self.tasks if task.online]
+
+    def pick(self):
+        tasks = self.tasks
+        for _ in range(len(tasks)):
+            self.turn = (self.turn + 1) % len(tasks)
+            if tasks[self.turn].online:
+                return tasks[self.turn]
+        raise RuntimeError("no task online")
+
+
+class Simulation:
+    """One run: Poisson arrivals at a (piecewise constant) rate through the three pools"""
+
+    def __init__(self, service_times, mix, tasks, concurrency=1, index_cost_ms=0.0, dates=30, preload=0,
+                 autoscale=None, seed=None):
+        self.samplers = {operation: parse_latency(spec) for operation, spec in service_times.items()}
+        self.operations = list(mix)
+        total = sum(mix.values())
+        self.cumulative = []
+        running = 0.0
+        for operation in self.operations:
+            running += mix[operation] / total
+            self.cumulative.append(running)
+        self.tasks = tasks
+        self.concurrency = concurrency
+        self.index_cost = index_cost_ms / 1000
+        self.dates = dates
+        self.bookings = [preload] * dates
+        self.autoscale = autoscale
+        self.random = random.Random(seed)
+        if seed is not None:
+            # the service-time samplers draw from the module's generator
+            random.seed(seed)
+        self.pools = {service: Pool(tasks) for service in SERVICES}
+        self.events = []
+        self.sequence = 0
+        self.latencies = defaultdict(list)
+        self.busy = {service: 0.0 for service in SERVICES}
+        self.capacity = {service: 0.0 for service in SERVICES}
+        self.peak_tasks = {service: tasks for service in SERVICES}
+        self.warmup = 0.0
+
+    def _push(self, at, kind, payload):
+        self.sequence += 1
+        heapq.heappush(self.events, (at, self.sequence, kind, payload))
+
+    def _stages(self, operation):
+        service, auth = OPERATIONS[operation]
+        return (("user", "validate"), (service, operation)) if auth else ((service, operation),)
+
+    def _service_time(self, operation, request):
+        seconds = self.samplers[operation]()
+        if operation == "create_booking":
+            seconds += self.index_cost * self.bookings[request[3]]
+        return seconds
+
+    def _start(self, now, task, request):
+        service, operation = request[1][request[2]]
+        seconds = self._service_time(operation, request)
+        task.busy += 1
+        task.busy_time += seconds
+        if now > self.warmup:
+            self.busy[service] += seconds
+        self._push(now + seconds, "done", (task, request))
+
+    def _enter(self, now, request):
+        task = self.pools[request[1][request[2]][0]].pick()
+        if task.busy < self.concurrency:
+            self._start(now, task, request)
+        else:
+            task.queue.append(request)
+
+    def _scale(self, now, target, maximum, delay):
+        for service, pool in self.pools.items():
+            online = pool.online()
+            used = sum(task.busy_time for task in online)
+            for task in pool.tasks:
+                task.busy_time = 0.0
+            utilization = used / (len(online) * self.concurrency * SCALE_PERIOD)
+            # ECS target tracking: desired = ceil(current * metric / target)
+            desired = min(maximum, max(self.tasks, math.ceil(len(online) * utilization / target)))
+            grow = desired - len(online) - pool.pending
+            if grow > 0:
+                pool.pending += grow
+                for _ in range(grow):
+                    self._push(now + delay, "online", service)
+            elif desired < len(online) and not pool.pending:
+                # Scale in one task per period, like the slower scale-in cooldown
+                online[-1].online = False
+
+    def _account(self, now):
+        """Add worker-seconds available since the last change of online tasks"""
+        span = now - max(self.marked, self.warmup)
+        if span > 0:
+            for service, pool in self.pools.items():
+                self.capacity[service] += span * len(pool.online()) * self.concurrency
+        self.marked = now
+
+    def run(self, profile, duration, warmup=0.0):
+        """Simulate duration seconds; profile is [(start second, requests/s), ...]"""
+        clock_start = time.perf_counter()
+        self.warmup = warmup
+        starts = [start for start, _ in profile]
+
+        def rate_at(now):
+            return profile[max(bisect(starts, now) - 1, 0)][1]
+
+        self._push(self.random.expovariate(rate_at(0.0)) if rate_at(0.0) else 1.0, "arrive", None)
+        if self.autoscale:
+            self._push(SCALE_PERIOD, "scale", None)
+        self.marked = 0.0
+        events, random_value, operations, cumulative = self.events, self.random.random, self.operations, self.cumulative
+        while events:
+            now, _, kind, payload = heapq.heappop(events)
+            if now > duration:
+                break
+            if kind == "done":
+                task, request = payload
+                task.busy -= 1
+                if task.queue:
+                    self._start(now, task, task.queue.popleft())
+                service, operation = request[1][request[2]]
+                if operation == "create_booking":
+                    self.bookings[request[3]] += 1
+                request[2] += 1
+                if request[2] < len(request[1]):
+                    self._enter(now, request)
+                elif request[0] > warmup:
+                    self.latencies[request[4]].append(now - request[0])
+            elif kind == "arrive":
+                operation = operations[min(bisect(cumulative, random_value()), len(operations) - 1)]
+                # [arrival, stages, current stage, date, operation]
+                self._enter(now, [now, self._stages(operation), 0, int(random_value() * self.dates), operation])
+                rate = rate_at(now)
+                self._push(now + (self.random.expovariate(rate) if rate else 1.0), "arrive", None)
+            elif kind == "scale":
+                self._account(now)
+                self._scale(now, *self.autoscale)
+                self._push(now + SCALE_PERIOD, "scale", None)
+            elif kind == "online":
+                self._account(now)
+                pool = self.pools[payload]
+                pool.pending -= 1
+                idle = next((task for task in pool.tasks if not task.online), None)
+                if idle is not None:
+                    idle.online = True
+                else:
+                    pool.tasks.append(Task())
+                self.peak_tasks[payload] = max(self.peak_tasks[payload], len(pool.online()))
+        self._account(duration)
+        self.wall = time.perf_counter() - clock_start
+        return self
+
+    def utilization(self):
+        """Busy fraction of each service's workers after the warmup"""
+        return {service: self.busy[service] / self.capacity[service] if self.capacity[service] else 0.0
+                for service in SERVICES}
+
+
+def percentile(ordered, point):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * point / 100))] if ordered else 0.0
+
+
+def _mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        operation, _, weight = part.partition("=")
+        if operation not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {operation!r}")
+        mix[operation] = float(weight or 1)
+    return mix
+
+
+def _profile(spec):
+    profile = []
+    for part in spec.split(","):
+        start, _, rate = part.partition(":")
+        profile.append((float(start), float(rate)))
+    return sorted(profile)
+
+
+def _autoscale(spec):
+    target, _, rest = spec.partition(":")
+    maximum, _, delay = rest.partition(":")
+    return float(target), int(maximum or 20), float(delay or 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict latency against ECS task count with a discrete-event model")
+    parser.add_argument("--rate", type=float, default=50, help="Requests per second at the ALB")
+    parser.add_argument("--profile", type=_profile, metavar="START:RATE,...",
+                        help="Piecewise constant rate instead of --rate, e.g. 0:40,1800:120,5400:40")
+    parser.add_argument("--mix", type=_mix, default=_mix(DEFAULT_MIX), help=f"Operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--tasks", default="1,2,3,4,6,8", help="Comma-separated task counts per service to compare")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests a task serves at once")
+    parser.add_argument("--duration", type=float, default=7200, help="Simulated seconds")
+    parser.add_argument("--warmup", type=float, default=120, help="Simulated seconds left out of the percentiles")
+    parser.add_argument("--fit", action="append", default=[], metavar="OP=PATH[:ROW]",
+                        help="Fit OP from a latency_test.py output or a Locust *_stats.csv row (repeatable)")
+    parser.add_argument("--service", action="append", default=[], metavar="OP=SPEC",
+                        help="Service time for OP, e.g. get_booking=lognormal:12:0.4 (repeatable)")
+    parser.add_argument("--index-cost-ms", type=float, help="Date-index query cost per booking on the date")
+    parser.add_argument("--dates", type=int, default=30, help="Dates bookings are spread over")
+    parser.add_argument("--preload", type=int, default=0, help="Bookings already on every date")
+    parser.add_argument("--autoscale", type=_autoscale, metavar="TARGET[:MAX[:DELAY]]",
+                        help="Target-tracking scaling on utilization; tasks start DELAY seconds after scale-out")
+    parser.add_argument("--slo-ms", type=float, help="p99 objective; the smallest count meeting it is marked")
+    parser.add_argument("--seed", type=int, help="Random seed for repeatable runs")
+    args = parser.parse_args()
+
+    service_times = dict(DEFAULT_SERVICE_TIMES)
+    index_cost_ms = fit(args.fit, service_times, args.index_cost_ms)
+    for spec in args.service:
+        operation, _, distribution = spec.partition("=")
+        parse_latency(distribution)
+        service_times[operation] = distribution
+    profile = args.profile or [(0.0, args.rate)]
+
+    print("=== Model ===")
+    for operation in args.mix:
+        print(f"{operation:16}\t{service_times[operation]}\t{args.mix[operation] / sum(args.mix.values()):.0%} of traffic")
+    print(f"Date-index cost {index_cost_ms:.4f}ms per booking, {args.dates} dates, {args.concurrency} worker(s) per task")
+    rates = ", ".join(f"{rate:g}/s from {start:g}s" for start, rate in profile)
+    print(f"Traffic: {rates}; {args.duration:g}s simulated, first {args.warmup:g}s left out")
+
+    print(f"\n{'tasks':>6}\t{'p50 ms':>8}\t{'p99 ms':>9}\t{'p99.9 ms':>9}\t{'worst op p99':>24}\t"
+          f"{'util user/space/booking':>24}\t{'sim s':>6}")
+    chosen = None
+    for tasks in [int(count) for count in args.tasks.split(",")]:
+        simulation = Simulation(service_times, args.mix, tasks, args.concurrency, index_cost_ms, args.dates,
+                                args.preload, args.autoscale, args.seed).run(profile, args.duration, args.warmup)
+        everything = sorted(latency for latencies in simulation.latencies.values() for latency in latencies)
+        worst_op, worst = max(((operation, percentile(sorted(latencies), 99))
+                               for operation, latencies in simulation.latencies.items()), key=lambda item: item[1],
+                              default=("-", 0.0))
+        utilization = simulation.utilization()
+        label = f"{tasks}" + (f"->{max(simulation.peak_tasks.values())}" if args.autoscale else "")
+        p99 = percentile(everything, 99) * 1000
+        meets = args.slo_ms is not None and p99 <= args.slo_ms
+        if meets and chosen is None:
+            chosen = label
+        print(f"{label:>6}\t{percentile(everything, 50) * 1000:>8.1f}\t{p99:>9.1f}\t"
+              f"{percentile(everything, 99.9) * 1000:>9.1f}\t{worst_op + f' {worst * 1000:.0f}':>24}\t"
+              f"{'/'.join(f'{utilization[service]:.0%}' for service in SERVICES):>24}\t{simulation.wall:>6.1f}"
+              + ("\tmeets SLO" if meets else ""))
+    if args.slo_ms is not None:
+        print(f"\nSmallest task count with p99 <= {args.slo_ms:g}ms: {chosen or 'none of those tried'}")
+
+
+if __name__ == "__main__":
+    main()
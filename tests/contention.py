@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+contention.py - Barrier-synchronized request storms for race testing
+
+N contender threads each open a keep-alive connection first (warm_path),
+then for every round wait on one threading.Barrier and write their
+pre-serialized request the moment it releases, so all N requests reach the
+target within a short window instead of whenever each thread got started.
+
+    storm = ContentionStorm(base_url, 200, warm_path="/booking/health")
+    rounds = storm.run(len(slots), lambda i, n: ("POST", "/booking", payload(i, n), auth_header(i)))
+    print_report(rounds, "Same slot, 200 contenders")
+
+The report gives how many requests won (2xx) per round, how often each
+winner count occurred, and the race window: time between the first and
+the last request of a round being sent. Plain module, no Locust listeners.
+"""
+
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+class Attempt:
+    """One contender's request in one round"""
+
+    __slots__ = ("contender", "sent", "received", "status", "err_code", "error")
+
+    def __init__(self, contender, sent, received, status=0, err_code="", error=None):
+        self.contender = contender
+        self.sent = sent
+        self.received = received
+        self.status = status
+        self.err_code = err_code
+        self.error = error
+
+    @property
+    def won(self):
+        return 200 <= self.status < 300
+
+
+def _err_code(body):
+    try:
+        parsed = json.loads(body)
+    except ValueError:
+        return ""
+    return parsed.get("ErrCode", "") if isinstance(parsed, dict) else ""
+
+
+class ContentionStorm:
+    """Fires one request per contender per round, all released by a barrier.
+
+    Requests are serialized to bytes before the barrier and written straight
+    to an already open connection after it, so the race window is not
+    stretched by each thread building its request once it wakes up.
+    """
+
+    def __init__(self, base_url, contenders, warm_path=None, timeout=30):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.contenders = contenders
+        self.warm_path = warm_path
+        self.timeout = timeout
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        connection = connection_class(self.host, self.port, timeout=self.timeout)
+        if self.warm_path:
+            connection.request("GET", self.prefix + self.warm_path)
+            connection.getresponse().read()
+        else:
+            connection.connect()
+        return connection
+
+    def _raw(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        body = body if isinstance(body, bytes) or body is None else json.dumps(body).encode()
+        if body is not None:
+            headers.setdefault("Content-Type", "application/json")
+        headers["Content-Length"] = str(len(body or b""))
+        headers.setdefault("Host", f"{self.host}:{self.port}")
+        lines = [f"{method} {self.prefix}{path} HTTP/1.1"] + [f"{key}: {value}" for key, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b"")
+
+    def run(self, rounds, build):
+        """Run rounds of the storm and return one list of Attempts per round.
+
+        build(contender, round) returns (method, path, body, headers) for one
+        request; body is bytes or a JSON-serializable value.
+        """
+        results = [[None] * self.contenders for _ in range(rounds)]
+        # Nobody is released before every contender has its connection open; one
+        # barrier per round, so a contender failing aborts only its round
+        releases = [threading.Barrier(self.contenders, timeout=self.timeout) for _ in range(rounds)]
+
+        def contender(index):
+            connection = None
+            for n in range(rounds):
+                release = releases[n]
+                try:
+                    method, path, body, headers = build(index, n)
+                    raw = self._raw(method, path, body, headers)
+                except Exception as e:
+                    results[n][index] = Attempt(index, None, None, error=type(e).__name__)
+                    release.abort()
+                    continue
+                if connection is None:
+                    try:
+                        connection = self._connect()
+                    except Exception as e:
+                        # Nothing can be sent this round; don't leave the others waiting
+                        results[n][index] = Attempt(index, None, None, error=type(e).__name__)
+                        release.abort()
+                        continue
+                try:
+                    release.wait()
+                except threading.BrokenBarrierError:
+                    results[n][index] = Attempt(index, None, None, error="BrokenBarrierError")
+                    continue
+                sent = time.perf_counter()
+                try:
+                    connection.sock.sendall(raw)
+                    response = http.client.HTTPResponse(connection.sock, method=method)
+                    response.begin()
+                    data = response.read()
+                    received = time.perf_counter()
+                    results[n][index] = Attempt(index, sent, received, response.status,
+                                                _err_code(data) if response.status >= 400 else "")
+                    if response.will_close:
+                        connection.close()
+                        connection = None
+                except Exception as e:
+                    results[n][index] = Attempt(index, sent, time.perf_counter(), error=type(e).__name__)
+                    if connection is not None:
+                        connection.close()
+                    connection = None
+            if connection is not None:
+                connection.close()
+
+        threads = [threading.Thread(target=contender, args=(i,), daemon=True) for i in range(self.contenders)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+
+def race_window(attempts):
+    """Seconds between the first and the last request of a round being sent"""
+    sent = [attempt.sent for attempt in attempts if attempt.sent is not None]
+    return max(sent) - min(sent) if sent else 0.0
+
+
+def summarize(rounds):
+    """Winner counts, their distribution, race windows and loser outcomes over all rounds"""
+    winners = [sum(attempt.won for attempt in attempts) for attempts in rounds]
+    # Rounds aborted before anything was sent have no window
+    windows = sorted(race_window(attempts) * 1000 for attempts in rounds
+                     if any(attempt.sent is not None for attempt in attempts)) or [0.0]
+    outcomes = Counter(
+        (attempt.status, attempt.err_code or attempt.error or "")
+        for attempts in rounds for attempt in attempts if not attempt.won
+    )
+    latencies = sorted((attempt.received - attempt.sent) * 1000 for attempts in rounds for attempt in attempts
+                       if attempt.sent is not None) or [0.0]
+    return {
+        "winners": winners,
+        "distribution": dict(sorted(Counter(winners).items())),
+        "window_ms": {
+            "median": statistics.median(windows),
+            "p95": windows[min(len(windows) - 1, int(len(windows) * 0.95))],
+            "max": windows[-1],
+        },
+        "latency_ms": {
+            "median": statistics.median(latencies),
+            "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        },
+        "losers": {f"{status} {code}".strip(): count for (status, code), count in outcomes.most_common()},
+    }
+
+
+def print_report(rounds, title, exclusive=True):
+    """Print the summary; with exclusive, any round with more than one winner is a double booking"""
+    summary = summarize(rounds)
+    contenders = len(rounds[0]) if rounds else 0
+    print(f"  {title}: {len(rounds)} rounds x {contenders} contenders")
+    print("  Winners per round: " + ", ".join(f"{winners} won in {count} rounds"
+                                                for winners, count in summary["distribution"].items()))
+    window = summary["window_ms"]
+    print(f"  Race window (first to last send): median {window['median']:.2f}ms, "
+          f"p95 {window['p95']:.2f}ms, max {window['max']:.2f}ms")
+    latency = summary["latency_ms"]
+    print(f"  Response time: median {latency['median']:.1f}ms, p99 {latency['p99']:.1f}ms")
+    for outcome, count in summary["losers"].items():
+        print(f"  Rejected/failed: {outcome or 'no status'} x{count}")
+    if exclusive:
+        doubled = sum(1 for winners in summary["winners"] if winners > 1)
+        if doubled:
+            print(f"  DOUBLE BOOKING in {doubled}/{len(rounds)} rounds")
+    return summary
@@ -6,6 +6,7 @@ import matplotlib.pyplot as plt
 import statistics
 import numpy as np
 import base64
+import os
 
 from pathlib import Path
 
@@ -179,7 +180,7 @@ def new_booking(url, admin_id, room_id):
 
 
 # Replace with your EC2 public IP
-ALB_DNS = "http://CS6650L2-alb-1619864770.us-east-1.elb.amazonaws.com:80"
+ALB_DNS = os.getenv("ALB_DNS", "http://CS6650L2-alb-1619864770.us-east-1.elb.amazonaws.com:80")
 USERS_URL = f"{ALB_DNS}/user"
 SPACES_URL = f"{ALB_DNS}/space"
 BOOKING_URL = f"{ALB_DNS}/booking"
@@ -2,186 +2,290 @@
 """
 error_handling_test.py - Test error responses and invalid request handling
 Tests all services for proper error codes and messages
+
+The suites register their cases with @test_case; main collects them and runs
+them concurrently over pooled keep-alive connections. Each case records the
+latency of its response, and an error-path case slower than --slo-ms fails.
+
+    python errors.py --workers 8 --slo-ms 1000
 """
 
+import argparse
 import requests
 import json
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from colorama import init, Fore, Style
+from requests.adapters import HTTPAdapter
 import traceback
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import contention
 
 # Initialize colorama for colored output
 init(autoreset=True)
 
 # Configuration
 ALB_URL = "http://CS6650L2-alb-243173383.us-east-1.elb.amazonaws.com" 
+DEFAULT_WORKERS = 8
+DEFAULT_SLO_MS = 1000
 
 # Test results storage
 test_results = {
     "passed": [],
     "failed": [],
-    "unexpected": []
+    "unexpected": [],
+    "latency_ms": {}
 }
 
-def print_test_header(test_name):
-    """Print formatted test header"""
-    print(f"\n{Fore.CYAN}{'='*60}")
-    print(f"{test_name}")
-    print(f"{'='*60}{Style.RESET_ALL}")
+# Every @test_case, in definition order; filled by the suites' collect()
+registry = []
+_collecting = {"suite": None, "section": None}
+_print_lock = threading.Lock()
 
-def test_case(test_name, expected_status=None):
-    """Decorator for test cases"""
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            print(f"\n{Fore.YELLOW}► Testing: {test_name}{Style.RESET_ALL}")
+
+class PooledClient:
+    """requests with one keep-alive Session per worker thread"""
+
+    def __init__(self, pool_size=DEFAULT_WORKERS):
+        self.pool_size = pool_size
+        self._local = threading.local()
+
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url, **kwargs):
+        return self.session().get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.session().post(url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.session().delete(url, **kwargs)
+
+
+http = PooledClient()
+
+
+def suite(name):
+    """Cases defined from here on belong to suite name"""
+    _collecting["suite"] = name
+    _collecting["section"] = None
+
+def section(name):
+    """Cases defined from here on belong to section name of the current suite"""
+    _collecting["section"] = name
+
+
+class ErrorCase:
+    """One registered error-path check.
+
+    Cases with the same resource touch the same server-side state (a space,
+    a booking slot) and run one after another in definition order; any setup
+    a case needs (e.g. creating a user first) happens inside its function.
+    """
+
+    def __init__(self, name, func, expected_status=None, resource=None):
+        self.name = name
+        self.func = func
+        self.expected_status = expected_status
+        self.resource = resource
+        self.suite = _collecting["suite"]
+        self.section = _collecting["section"]
+        self.after = None
+        self.done = threading.Event()
+
+    @property
+    def label(self):
+        return f"{self.section}: {self.name}" if self.section else self.name
+
+    def run(self, slo_ms=None):
+        """Run the case and record its outcome; returns the response (or None)"""
+        if self.after is not None:
+            self.after.done.wait()
+        lines = [f"\n{Fore.YELLOW}► Testing: {self.suite} / {self.label}{Style.RESET_ALL}"]
+        started = time.perf_counter()
+        try:
+            response = self.func()
+            # Latency of the request under test only, not of any setup requests before it
+            latency_ms = response.elapsed.total_seconds() * 1000 if response is not None else \
+                (time.perf_counter() - started) * 1000
+            test_results["latency_ms"][self.label] = round(latency_ms, 1)
+            status = response.status_code
+
+            # Check if we got expected status
+            if self.expected_status and status != self.expected_status:
+                lines.append(f"{Fore.RED}✗ Expected {self.expected_status}, got {status}{Style.RESET_ALL}")
+                test_results["failed"].append(f"{self.name} (got {status})")
+            elif slo_ms and (self.expected_status or status) >= 400 and latency_ms > slo_ms:
+                lines.append(f"{Fore.RED}✗ Error path took {latency_ms:.0f}ms (SLO {slo_ms}ms){Style.RESET_ALL}")
+                test_results["failed"].append(f"{self.name} (slow: {latency_ms:.0f}ms > {slo_ms}ms SLO)")
+            elif self.expected_status:
+                lines.append(f"{Fore.GREEN}✓ Expected {self.expected_status}: {status} in {latency_ms:.0f}ms{Style.RESET_ALL}")
+                test_results["passed"].append(self.name)
+            else:
+                lines.append(f"{Fore.BLUE}  Status: {status} in {latency_ms:.0f}ms{Style.RESET_ALL}")
+                test_results["passed"].append(self.name)
+
+            # Print response details
             try:
-                response = func(*args, **kwargs)
-                
-                # Check if we got expected status
-                if expected_status and response.status_code == expected_status:
-                    print(f"{Fore.GREEN}✓ Expected {expected_status}: {response.status_code}{Style.RESET_ALL}")
-                    test_results["passed"].append(test_name)
-                elif expected_status:
-                    print(f"{Fore.RED}✗ Expected {expected_status}, got {response.status_code}{Style.RESET_ALL}")
-                    test_results["failed"].append(f"{test_name} (got {response.status_code})")
-                else:
-                    print(f"{Fore.BLUE}  Status: {response.status_code}{Style.RESET_ALL}")
-                    test_results["passed"].append(test_name)
-                
-                # Print response details
-                try:
-                    response_json = response.json()
-                    print(f"  Response: {json.dumps(response_json, indent=2)}")
-                except:
-                    print(f"  Response: {response.text[:200]}")
-                
-                return response
-                
-            except Exception as e:
-                print(f"{Fore.RED}✗ Exception: {str(e)}{Style.RESET_ALL}")
-                test_results["unexpected"].append(f"{test_name}: {str(e)}")
-                return None
-        return wrapper
+                response_json = response.json()
+                lines.append(f"  Response: {json.dumps(response_json, indent=2)}")
+            except:
+                lines.append(f"  Response: {response.text[:200]}")
+            return response
+
+        except Exception as e:
+            lines.append(f"{Fore.RED}✗ Exception: {str(e)}{Style.RESET_ALL}")
+            test_results["unexpected"].append(f"{self.name}: {str(e)}")
+            return None
+        finally:
+            self.done.set()
+            with _print_lock:
+                print("\n".join(lines))
+
+    def __call__(self):
+        return self.run()
+
+
+def test_case(test_name, expected_status=None, resource=None):
+    """Decorator registering a test case; the function returns the response to check"""
+    def decorator(func):
+        case = ErrorCase(test_name, func, expected_status, resource)
+        registry.append(case)
+        return case
     return decorator
 
+
+def run_registry(cases, workers=DEFAULT_WORKERS, slo_ms=DEFAULT_SLO_MS):
+    """Run cases concurrently, keeping cases that share a resource in definition order"""
+    last_by_resource = {}
+    for case in cases:
+        if case.resource is not None:
+            case.after = last_by_resource.get(case.resource)
+            last_by_resource[case.resource] = case
+    # Cases are submitted in definition order, so whatever a case waits on has
+    # already been picked up by another worker and the pool cannot deadlock
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda case: case.run(slo_ms), cases))
+
 class UserServiceErrorTests:
     """Test error handling for User Service"""
     
     def __init__(self, base_url):
         self.base_url = base_url
         
-    def run_all(self):
-        print_test_header("USER SERVICE ERROR TESTS")
+    def collect(self):
+        suite("USER SERVICE ERROR TESTS")
         self.test_create_user_errors()
         self.test_login_errors()
         self.test_session_errors()
     
     def test_create_user_errors(self):
-        print(f"\n{Fore.CYAN}=== Create User Error Cases ==={Style.RESET_ALL}")
+        section("Create User Error Cases")
         
         @test_case("Missing required fields", expected_status=400)
         def missing_username():
-            return requests.post(f"{self.base_url}/user", json={
+            return http.post(f"{self.base_url}/user", json={
                 "userPassword": "test123"
                 # Missing username
             })
-        missing_username()
         
         @test_case("Empty username", expected_status=400)
         def empty_username():
-            return requests.post(f"{self.base_url}/user", json={
+            return http.post(f"{self.base_url}/user", json={
                 "username": "",
                 "userPassword": "test123"
             })
-        empty_username()
         
         @test_case("Missing password", expected_status=400)
         def missing_password():
-            return requests.post(f"{self.base_url}/user", json={
+            return http.post(f"{self.base_url}/user", json={
                 "username": "testuser"
                 # Missing password
             })
-        missing_password()
         
         @test_case("Invalid JSON", expected_status=400)
         def invalid_json():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/user",
                 data="not valid json",
                 headers={"Content-Type": "application/json"}
             )
-        invalid_json()
         
         @test_case("Duplicate username (if implemented)")
         def duplicate_user():
             # First create a user
             username = f"dup_test_{random.randint(1000, 9999)}"
-            requests.post(f"{self.base_url}/user", json={
+            http.post(f"{self.base_url}/user", json={
                 "username": username,
                 "userPassword": "test123"
             })
             # Try to create again
-            return requests.post(f"{self.base_url}/user", json={
+            return http.post(f"{self.base_url}/user", json={
                 "username": username,
                 "userPassword": "test123"
             })
-        duplicate_user()
     
     def test_login_errors(self):
-        print(f"\n{Fore.CYAN}=== Login Error Cases ==={Style.RESET_ALL}")
+        section("Login Error Cases")
         
         @test_case("Non-existent user", expected_status=404)
         def nonexistent_user():
-            return requests.post(f"{self.base_url}/user/999999999", json={
+            return http.post(f"{self.base_url}/user/999999999", json={
                 "username": "nonexistent",
                 "userPassword": "test123"
             })
-        nonexistent_user()
         
         @test_case("Wrong password", expected_status=404)  # Your code returns 404 for wrong password
         def wrong_password():
             # Create a user first
-            response = requests.post(f"{self.base_url}/user", json={
+            response = http.post(f"{self.base_url}/user", json={
                 "username": f"pwtest_{random.randint(1000, 9999)}",
                 "userPassword": "correct123"
             })
             if response.status_code == 201:
                 user_id = response.text.strip('"')
-                return requests.post(f"{self.base_url}/user/{user_id}", json={
+                return http.post(f"{self.base_url}/user/{user_id}", json={
                     "username": f"pwtest_{random.randint(1000, 9999)}",
                     "userPassword": "wrong123"
                 })
-        wrong_password()
         
         @test_case("Invalid user ID format", expected_status=400)
         def invalid_userid():
-            return requests.post(f"{self.base_url}/user/not_a_number", json={
+            return http.post(f"{self.base_url}/user/not_a_number", json={
                 "username": "test",
                 "userPassword": "test123"
             })
-        invalid_userid()
         
         @test_case("Missing credentials", expected_status=400)
         def missing_credentials():
-            return requests.post(f"{self.base_url}/user/12345", json={})
-        missing_credentials()
+            return http.post(f"{self.base_url}/user/12345", json={})
     
     def test_session_errors(self):
-        print(f"\n{Fore.CYAN}=== Session Validation Error Cases ==={Style.RESET_ALL}")
+        section("Session Validation Error Cases")
         
         @test_case("Invalid session format", expected_status=400)
         def invalid_session_format():
-            return requests.get(f"{self.base_url}/user/invalid_format")
-        invalid_session_format()
+            return http.get(f"{self.base_url}/user/invalid_format")
         
         @test_case("Expired session", expected_status=400)
         def expired_session():
             # This would need a user with an expired session
             # For now, just test non-existent user
-            return requests.get(f"{self.base_url}/user/888888888")
-        expired_session()
+            return http.get(f"{self.base_url}/user/888888888")
 
 class SpaceServiceErrorTests:
     """Test error handling for Space/Availability Service"""
@@ -189,34 +293,33 @@ class SpaceServiceErrorTests:
     def __init__(self, base_url):
         self.base_url = base_url
         
-    def run_all(self):
-        print_test_header("SPACE SERVICE ERROR TESTS")
+    def collect(self):
+        suite("SPACE SERVICE ERROR TESTS")
         self.test_create_space_errors()
         self.test_get_space_errors()
         self.test_authorization_errors()
     
     def test_create_space_errors(self):
-        print(f"\n{Fore.CYAN}=== Create Space Error Cases ==={Style.RESET_ALL}")
+        section("Create Space Error Cases")
         
-        @test_case("No authentication", expected_status=400)
+        @test_case("No authentication", expected_status=400, resource="space Test-999")
         def no_auth():
-            return requests.post(f"{self.base_url}/space", json={
+            return http.post(f"{self.base_url}/space", json={
                 "roomCode": 999,
                 "buildingCode": "Test",
                 "capacity": 4
             })
-        no_auth()
         
-        @test_case("Non-admin user", expected_status=400)
+        @test_case("Non-admin user", expected_status=400, resource="space Test-999")
         def non_admin():
             # Create regular user
-            resp = requests.post(f"{self.base_url}/user", json={
+            resp = http.post(f"{self.base_url}/user", json={
                 "username": f"regular_{random.randint(1000, 9999)}",
                 "userPassword": "test123"
             })
             if resp.status_code == 201:
                 user_id = resp.text.strip('"')
-                return requests.post(
+                return http.post(
                     f"{self.base_url}/space",
                     json={
                         "roomCode": 999,
@@ -225,11 +328,10 @@ class SpaceServiceErrorTests:
                     },
                     auth=(f"regular_{random.randint(1000, 9999)}", str(user_id))
                 )
-        non_admin()
         
-        @test_case("Invalid auth format", expected_status=400)
+        @test_case("Invalid auth format", expected_status=400, resource="space Test-999")
         def invalid_auth():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/space",
                 json={
                     "roomCode": 999,
@@ -238,11 +340,10 @@ class SpaceServiceErrorTests:
                 },
                 auth=("", "")  # Empty auth
             )
-        invalid_auth()
         
         @test_case("Missing required fields", expected_status=400)
         def missing_fields():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/space",
                 json={
                     "capacity": 4
@@ -250,12 +351,11 @@ class SpaceServiceErrorTests:
                 },
                 auth=("admin", "12345")
             )
-        missing_fields()
         
         @test_case("Duplicate space", expected_status=400)
         def duplicate_space():
             # Assuming Library-101 exists
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/space",
                 json={
                     "roomCode": 101,
@@ -264,32 +364,28 @@ class SpaceServiceErrorTests:
                 },
                 auth=("admin", "12345")
             )
-        duplicate_space()
     
     def test_get_space_errors(self):
-        print(f"\n{Fore.CYAN}=== Get Space Error Cases ==={Style.RESET_ALL}")
+        section("Get Space Error Cases")
         
         @test_case("Non-existent space", expected_status=404)
         def nonexistent_space():
-            return requests.get(f"{self.base_url}/space/NonExistent-999")
-        nonexistent_space()
+            return http.get(f"{self.base_url}/space/NonExistent-999")
         
         @test_case("Invalid space ID format")
         def invalid_format():
-            return requests.get(f"{self.base_url}/space/")
-        invalid_format()
+            return http.get(f"{self.base_url}/space/")
         
         @test_case("Special characters in space ID")
         def special_chars():
-            return requests.get(f"{self.base_url}/space/Test<script>alert(1)</script>")
-        special_chars()
+            return http.get(f"{self.base_url}/space/Test<script>alert(1)</script>")
     
     def test_authorization_errors(self):
-        print(f"\n{Fore.CYAN}=== Authorization Error Cases ==={Style.RESET_ALL}")
+        section("Authorization Error Cases")
         
-        @test_case("Expired admin session", expected_status=400)
+        @test_case("Expired admin session", expected_status=400, resource="space Test-999")
         def expired_admin():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/space",
                 json={
                     "roomCode": 999,
@@ -298,7 +394,6 @@ class SpaceServiceErrorTests:
                 },
                 auth=("admin", "99999999")  # Invalid admin ID
             )
-        expired_admin()
 
 class BookingServiceErrorTests:
     """Test error handling for Booking Service"""
@@ -306,29 +401,28 @@ class BookingServiceErrorTests:
     def __init__(self, base_url):
         self.base_url = base_url
         
-    def run_all(self):
-        print_test_header("BOOKING SERVICE ERROR TESTS")
+    def collect(self):
+        suite("BOOKING SERVICE ERROR TESTS")
         self.test_create_booking_errors()
         self.test_conflict_errors()
         self.test_invalid_data_errors()
     
     def test_create_booking_errors(self):
-        print(f"\n{Fore.CYAN}=== Create Booking Error Cases ==={Style.RESET_ALL}")
+        section("Create Booking Error Cases")
         
-        @test_case("No authentication", expected_status=401)
+        @test_case("No authentication", expected_status=401, resource="booking Library-101 2025-12-20")
         def no_auth():
-            return requests.post(f"{self.base_url}/booking", json={
+            return http.post(f"{self.base_url}/booking", json={
                 "spaceID": "Library-101",
                 "date": "2025-12-20",
                 "startTime": "2025-12-20T10:00:00Z",
                 "endTime": "2025-12-20T12:00:00Z",
                 "occupants": 4
             })
-        no_auth()
         
-        @test_case("Invalid time range (end before start)", expected_status=400)
+        @test_case("Invalid time range (end before start)", expected_status=400, resource="booking Library-101 2025-12-20")
         def invalid_time():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/booking",
                 json={
                     "spaceID": "Library-101",
@@ -339,11 +433,10 @@ class BookingServiceErrorTests:
                 },
                 auth=("testuser", "12345")
             )
-        invalid_time()
         
         @test_case("Invalid date format", expected_status=400)
         def invalid_date():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/booking",
                 json={
                     "spaceID": "Library-101",
@@ -354,11 +447,10 @@ class BookingServiceErrorTests:
                 },
                 auth=("testuser", "12345")
             )
-        invalid_date()
         
         @test_case("Missing required fields", expected_status=400)
         def missing_fields():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/booking",
                 json={
                     "spaceID": "Library-101"
@@ -366,11 +458,10 @@ class BookingServiceErrorTests:
                 },
                 auth=("testuser", "12345")
             )
-        missing_fields()
         
         @test_case("Non-existent space", expected_status=404)
         def nonexistent_space():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/booking",
                 json={
                     "spaceID": "NonExistent-999",
@@ -381,11 +472,10 @@ class BookingServiceErrorTests:
                 },
                 auth=("testuser", "12345")
             )
-        nonexistent_space()
         
-        @test_case("Exceeding space capacity")
+        @test_case("Exceeding space capacity", resource="booking Library-101 2025-12-20")
         def exceed_capacity():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/booking",
                 json={
                     "spaceID": "Library-101",
@@ -396,10 +486,9 @@ class BookingServiceErrorTests:
                 },
                 auth=("testuser", "12345")
             )
-        exceed_capacity()
     
     def test_conflict_errors(self):
-        print(f"\n{Fore.CYAN}=== Booking Conflict Error Cases ==={Style.RESET_ALL}")
+        section("Booking Conflict Error Cases")
         
         @test_case("Double booking same time slot", expected_status=409)
         def double_booking():
@@ -412,26 +501,25 @@ class BookingServiceErrorTests:
             }
             
             # First booking (should succeed)
-            requests.post(
+            http.post(
                 f"{self.base_url}/booking",
                 json=booking_data,
                 auth=("user1", "11111")
             )
             
             # Second booking (should conflict)
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/booking",
                 json=booking_data,
                 auth=("user2", "22222")
             )
-        double_booking()
     
     def test_invalid_data_errors(self):
-        print(f"\n{Fore.CYAN}=== Invalid Data Error Cases ==={Style.RESET_ALL}")
+        section("Invalid Data Error Cases")
         
-        @test_case("Negative occupants", expected_status=400)
+        @test_case("Negative occupants", expected_status=400, resource="booking Library-101 2025-12-20")
         def negative_occupants():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/booking",
                 json={
                     "spaceID": "Library-101",
@@ -442,11 +530,10 @@ class BookingServiceErrorTests:
                 },
                 auth=("testuser", "12345")
             )
-        negative_occupants()
         
         @test_case("Booking in the past")
         def past_booking():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/booking",
                 json={
                     "spaceID": "Library-101",
@@ -457,7 +544,6 @@ class BookingServiceErrorTests:
                 },
                 auth=("testuser", "12345")
             )
-        past_booking()
 
 class EdgeCaseTests:
     """Test edge cases and boundary conditions"""
@@ -465,58 +551,52 @@ class EdgeCaseTests:
     def __init__(self, base_url):
         self.base_url = base_url
         
-    def run_all(self):
-        print_test_header("EDGE CASE TESTS")
+    def collect(self):
+        suite("EDGE CASE TESTS")
         self.test_boundary_values()
         self.test_injection_attempts()
-        self.test_concurrent_requests()
     
     def test_boundary_values(self):
-        print(f"\n{Fore.CYAN}=== Boundary Value Tests ==={Style.RESET_ALL}")
+        section("Boundary Value Tests")
         
         @test_case("Very long username", expected_status=400)
         def long_username():
-            return requests.post(f"{self.base_url}/user", json={
+            return http.post(f"{self.base_url}/user", json={
                 "username": "a" * 10000,
                 "userPassword": "test123"
             })
-        long_username()
         
         @test_case("Unicode characters in username")
         def unicode_username():
-            return requests.post(f"{self.base_url}/user", json={
+            return http.post(f"{self.base_url}/user", json={
                 "username": "测试用户_🚀",
                 "userPassword": "test123"
             })
-        unicode_username()
         
         @test_case("Maximum integer user ID")
         def max_userid():
-            return requests.get(f"{self.base_url}/user/{2**63-1}")
-        max_userid()
+            return http.get(f"{self.base_url}/user/{2**63-1}")
     
     def test_injection_attempts(self):
-        print(f"\n{Fore.CYAN}=== Injection Attack Tests ==={Style.RESET_ALL}")
+        section("Injection Attack Tests")
         
         @test_case("SQL injection attempt")
         def sql_injection():
-            return requests.post(f"{self.base_url}/user", json={
+            return http.post(f"{self.base_url}/user", json={
                 "username": "admin'; DROP TABLE users; --",
                 "userPassword": "test123"
             })
-        sql_injection()
         
         @test_case("NoSQL injection attempt")
         def nosql_injection():
-            return requests.post(f"{self.base_url}/user", json={
+            return http.post(f"{self.base_url}/user", json={
                 "username": {"$ne": None},
                 "userPassword": "test123"
             })
-        nosql_injection()
         
         @test_case("XSS attempt in space creation")
         def xss_attempt():
-            return requests.post(
+            return http.post(
                 f"{self.base_url}/space",
                 json={
                     "roomCode": 999,
@@ -525,42 +605,26 @@ class EdgeCaseTests:
                 },
                 auth=("admin", "12345")
             )
-        xss_attempt()
         
         @test_case("Command injection in parameters")
         def command_injection():
-            return requests.get(f"{self.base_url}/space/Library-101; ls -la")
-        command_injection()
+            return http.get(f"{self.base_url}/space/Library-101; ls -la")
     
-    def test_concurrent_requests(self):
+    def test_concurrent_requests(self, contenders=10, rounds=1):
+        """Not a registered case: it is itself concurrent, so main runs it after the registry"""
         print(f"\n{Fore.CYAN}=== Concurrent Request Tests ==={Style.RESET_ALL}")
         
-        import threading
-        results = []
-        
-        def make_request():
-            try:
-                resp = requests.post(f"{self.base_url}/user", json={
-                    "username": f"concurrent_{random.randint(100000, 999999)}",
-                    "userPassword": "test123"
-                })
-                results.append(resp.status_code)
-            except Exception as e:
-                results.append(f"Error: {e}")
-        
-        # Create 10 concurrent requests
-        threads = []
-        for _ in range(10):
-            t = threading.Thread(target=make_request)
-            threads.append(t)
-            t.start()
-        
-        for t in threads:
-            t.join()
+        def make_request(contender, round_):
+            return "POST", "/user", {
+                "username": f"concurrent_{random.randint(100000, 999999)}",
+                "userPassword": "test123"
+            }, None
         
-        print(f"  Concurrent request results: {results}")
-        success_count = sum(1 for r in results if r == 201)
-        print(f"  Successful: {success_count}/10")
+        # All contenders connect first, then fire together on a barrier each round
+        storm = contention.ContentionStorm(self.base_url, contenders, warm_path="/user/health")
+        summary = contention.print_report(storm.run(rounds, make_request), "User creation", exclusive=False)
+        success_count = sum(summary["winners"])
+        print(f"  Successful: {success_count}/{contenders * rounds}")
 
 def print_summary():
     """Print test summary"""
@@ -588,6 +652,13 @@ def print_summary():
         pass_rate = (len(test_results['passed']) / total) * 100
         print(f"\n{Fore.CYAN}Pass Rate: {pass_rate:.1f}%{Style.RESET_ALL}")
     
+    # Slowest responses
+    latencies = sorted(test_results['latency_ms'].items(), key=lambda item: -item[1])
+    if latencies:
+        print(f"\n{Fore.CYAN}Slowest responses:{Style.RESET_ALL}")
+        for label, latency_ms in latencies[:5]:
+            print(f"  {latency_ms:8.1f}ms  {label}")
+    
     # Save results to file
     with open(f"error_test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", 'w') as f:
         json.dump(test_results, f, indent=2)
@@ -595,27 +666,40 @@ def print_summary():
 
 def main():
     """Run all error handling tests"""
+    parser = argparse.ArgumentParser(description="Run the error handling suites concurrently")
+    parser.add_argument("--url", default=ALB_URL, help="Target base URL")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Cases run at once (1 runs them one by one)")
+    parser.add_argument("--slo-ms", type=float, default=DEFAULT_SLO_MS,
+                        help="Fail an error-path case whose response takes longer (0 disables)")
+    parser.add_argument("--contenders", type=int, default=10,
+                        help="Users created at once in the concurrent request test")
+    parser.add_argument("--rounds", type=int, default=1, help="Rounds of the concurrent request test")
+    args = parser.parse_args()
+    http.pool_size = args.workers
+
     print(f"\n{Fore.CYAN}{'='*60}")
     print("COMPREHENSIVE ERROR HANDLING TEST SUITE")
-    print(f"Target: {ALB_URL}")
+    print(f"Target: {args.url}")
     print(f"Time: {datetime.now()}")
     print(f"{'='*60}{Style.RESET_ALL}")
     
-    # Run all test suites
-    user_tests = UserServiceErrorTests(ALB_URL)
-    user_tests.run_all()
-    
-    space_tests = SpaceServiceErrorTests(ALB_URL)
-    space_tests.run_all()
+    # Collect all test suites into the registry
+    UserServiceErrorTests(args.url).collect()
+    SpaceServiceErrorTests(args.url).collect()
+    BookingServiceErrorTests(args.url).collect()
+    edge_tests = EdgeCaseTests(args.url)
+    edge_tests.collect()
     
-    booking_tests = BookingServiceErrorTests(ALB_URL)
-    booking_tests.run_all()
+    print(f"{len(registry)} cases, {args.workers} at a time, error-path SLO {args.slo_ms:g}ms")
+    started = time.perf_counter()
+    run_registry(registry, workers=args.workers, slo_ms=args.slo_ms)
+    print(f"\nRan {len(registry)} cases in {time.perf_counter() - started:.2f}s")
     
-    edge_tests = EdgeCaseTests(ALB_URL)
-    edge_tests.run_all()
+    edge_tests.test_concurrent_requests(args.contenders, args.rounds)
     
     # Print summary
     print_summary()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+fuzz.py - Malformed-payload fuzzer for the user, space and booking services
+
+Starts from valid payloads for POST /user, POST /user/{id}, POST /space and
+POST /booking and mutates them: missing and null fields, wrong types,
+integer and time boundaries, unicode, huge strings, broken JSON and
+impossible booking combinations. The mutated bodies are built once and sent
+as fast as the target answers over a pool of keep-alive connections.
+
+Responses are reduced to a signature (status, ErrCode, body shape) and only
+signatures not seen before are printed, so a run of millions of requests
+comes down to the handful of distinct behaviours, 500s and dropped
+connections first.
+
+    python fuzz.py --url http://localhost:8080 --concurrency 200 --duration 60
+
+Mutations that happen to be valid create real users, spaces and bookings;
+point it at a scratch deployment.
+"""
+
+import argparse
+import base64
+import json
+import random
+import time
+from datetime import datetime
+
+from gevent import monkey
+monkey.patch_all()
+from gevent.pool import Pool
+from geventhttpclient import HTTPClient
+from geventhttpclient.url import URL
+from colorama import init, Fore, Style
+
+# Initialize colorama for colored output
+init(autoreset=True)
+
+# Configuration
+ALB_URL = "http://CS6650L2-alb-243173383.us-east-1.elb.amazonaws.com"
+HUGE = 1 << 20
+
+WRONG_TYPES = [None, 0, -1, 1.5, True, "", "x", [], {}]
+INT_BOUNDARIES = [0, -1, 2**31 - 1, 2**31, 2**63 - 1, 2**63, -2**63 - 1, 2**64, 1e308]
+STRINGS = [
+    "", " ", "a" * 10000, "测试用户_🚀", "‮evil", "nul\x00byte", "é", "\ud800",
+    "admin'; DROP TABLE users; --", "<script>alert(1)</script>", "../../etc/passwd", "%s%n",
+]
+TIMES = [
+    "", "not-a-time", "2025-12-20T24:00:00Z", "2025-12-31T23:59:60Z", "2025-02-29T10:00:00Z",
+    "0001-01-01T00:00:00Z", "9999-12-31T23:59:59Z", "2025-12-20T10:00:00", "2025-12-20 10:00:00",
+    "2025-12-20T10:00:00+14:00", "2025-12-20T10:00:00.123456789Z", 1766224800,
+]
+DATES = ["", "2025-13-01", "2025-02-30", "20251220", "2025-12-20T00:00:00Z", "0000-00-00", "9999-12-31"]
+RAW_BODIES = [
+    b"", b"null", b"[]", b"{}", b"not valid json", b'{"username": "a", ', b"{" * 5000 + b"}" * 5000,
+    b'{"username": "a", "username": 1, "userPassword": "b"}', b'{"username": "a", "userPassword": "b"} trailing',
+    "﻿{}".encode(), b"\xff\xfe\x00",
+]
+
+
+class Endpoint:
+    """A POST endpoint, the valid payload to mutate and the kind of each field"""
+
+    def __init__(self, name, path, payload, kinds, auth=None):
+        self.name = name
+        self.path = path
+        self.payload = payload
+        self.kinds = kinds
+        self.headers = json_headers(auth)
+
+
+def json_headers(auth=None):
+    headers = {"Content-Type": "application/json"}
+    if auth:
+        token = base64.b64encode(f"{auth[0]}:{auth[1]}".encode()).decode()
+        headers["Authorization"] = f"Basic {token}"
+    return headers
+
+
+def field_values(kind):
+    """Candidate bad values for a field of this kind"""
+    values = list(WRONG_TYPES)
+    if kind == "int":
+        values += INT_BOUNDARIES + ["12", "0x10"]
+    elif kind == "str":
+        values += STRINGS
+    elif kind == "time":
+        values += TIMES
+    elif kind == "date":
+        values += DATES
+    return values
+
+
+def relational_mutations(endpoint):
+    """Well-typed bookings that break a rule spanning several fields"""
+    if endpoint.name != "booking":
+        return []
+    valid = endpoint.payload
+    start, end = valid["startTime"], valid["endTime"]
+    return [
+        ("end before start", dict(valid, startTime=end, endTime=start)),
+        ("zero length", dict(valid, endTime=start)),
+        ("times on another date", dict(valid, startTime="2031-06-01T10:00:00Z", endTime="2031-06-01T11:00:00Z")),
+        ("over capacity", dict(valid, occupants=10**6)),
+        ("negative occupants", dict(valid, occupants=-5)),
+        ("someone else's userID", dict(valid, userID=valid["userID"] + 1)),
+        ("unknown space", dict(valid, spaceID="NoSuch-0")),
+    ]
+
+
+def mutations(endpoint, rng, combined):
+    """Yield (label, body bytes) for every single mutation, then combined random pairs"""
+    valid = endpoint.payload
+    singles = []
+    for field, kind in endpoint.kinds.items():
+        singles.append((f"{field} missing", {k: v for k, v in valid.items() if k != field}))
+        for value in field_values(kind):
+            label = f"{field}={json.dumps(value)[:30]}"
+            singles.append((label, dict(valid, **{field: value})))
+        singles.append((f"{field} huge", dict(valid, **{field: "a" * HUGE})))
+    singles.append(("extra field", dict(valid, unexpected={"nested": [1, 2, 3]})))
+    singles += relational_mutations(endpoint)
+
+    for label, payload in singles:
+        yield label, json.dumps(payload).encode()
+    for label, body in zip(("raw body %d" % i for i in range(len(RAW_BODIES))), RAW_BODIES):
+        yield label, body
+
+    # Pairs of field mutations reach checks that a single bad field never gets past
+    field_singles = [(label, payload) for label, payload in singles if "=" in label]
+    for _ in range(combined):
+        (first, a), (second, b) = rng.sample(field_singles, 2)
+        merged = dict(a)
+        merged.update({k: v for k, v in b.items() if v != valid.get(k)})
+        yield f"{first} + {second}", json.dumps(merged).encode()
+
+
+def shape(value):
+    """Type skeleton of a JSON value: keys and types, not contents"""
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{key}:{shape(value[key])}" for key in sorted(value)) + "}"
+    if isinstance(value, list):
+        return "[" + (shape(value[0]) if value else "") + "]"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "num"
+    if value is None:
+        return "null"
+    return "str"
+
+
+def signature(status, body):
+    """(status, ErrCode, body shape) of a response"""
+    try:
+        parsed = json.loads(body)
+    except ValueError:
+        return status, "", "text"
+    code = parsed.get("ErrCode", "") if isinstance(parsed, dict) else ""
+    return status, code, shape(parsed)
+
+
+class Fuzzer:
+    """Sends the corpus round-robin and keeps the first example of each signature"""
+
+    def __init__(self, client, corpus):
+        self.client = client
+        self.corpus = corpus
+        self.signatures = {}
+        self.sent = 0
+
+    def send(self, endpoint, label, body):
+        try:
+            response = self.client.request("POST", endpoint.path, body=body, headers=endpoint.headers)
+            status, data = response.status_code, response.read()
+        except Exception as e:
+            status, data = 0, json.dumps({"ErrCode": type(e).__name__}).encode()
+        self.sent += 1
+        key = (endpoint.name,) + signature(status, data)
+        entry = self.signatures.get(key)
+        if entry is None:
+            self.signatures[key] = {"count": 1, "mutation": label, "body": body[:300].decode("utf-8", "replace"),
+                                    "response": data[:300].decode("utf-8", "replace")}
+            self.report(key, label)
+        else:
+            entry["count"] += 1
+
+    def report(self, key, label):
+        name, status, code, body_shape = key
+        color = Fore.RED if status >= 500 or status == 0 else Fore.YELLOW if status < 400 else Fore.BLUE
+        print(f"{color}NEW {name:8} {status:3} {code or '-':16} {body_shape[:40]:40} via {label[:60]}{Style.RESET_ALL}")
+
+    def worker(self, deadline, limit):
+        rng = random.Random()
+        while time.monotonic() < deadline and self.sent < limit:
+            self.send(*rng.choice(self.corpus))
+
+    def run(self, concurrency, duration, limit):
+        deadline = time.monotonic() + duration
+        pool = Pool(concurrency)
+        for _ in range(concurrency):
+            pool.spawn(self.worker, deadline, limit)
+        started = time.monotonic()
+        while not pool.join(timeout=5):
+            elapsed = time.monotonic() - started
+            print(f"  {self.sent} sent, {self.sent / elapsed:.0f}/s, {len(self.signatures)} signatures")
+        return time.monotonic() - started
+
+
+def bootstrap(client):
+    """Create an admin user and a space so auth passes and booking bodies reach BindJSON"""
+    username = "admin"
+    response = client.request("POST", "/user", body=json.dumps({"username": username, "userPassword": "fuzz"}),
+                              headers=json_headers())
+    if response.status_code != 201:
+        raise SystemExit(f"Could not create the fuzzing user: {response.status_code} {response.read()[:200]}")
+    user_id = int(response.read().decode().strip().strip('"'))
+    room = random.randint(100000, 999999)
+    response = client.request("POST", "/space", body=json.dumps({
+        "roomCode": room, "buildingCode": "Fuzz", "capacity": 10,
+        "openTime": "2025-01-01T08:00:00Z", "closeTime": "2025-01-01T22:00:00Z",
+    }), headers=json_headers((username, user_id)))
+    space_id = response.read().decode().strip().strip('"') if response.status_code == 201 else "Library-101"
+    return username, user_id, space_id
+
+
+def endpoints(username, user_id, space_id):
+    auth = (username, user_id)
+    return [
+        Endpoint("user", "/user", {"username": "fuzz_user", "userPassword": "fuzz", "userEmail": "f@example.com"},
+                 {"username": "str", "userPassword": "str", "userEmail": "str"}),
+        Endpoint("login", f"/user/{user_id}", {"username": username, "userPassword": "fuzz"},
+                 {"username": "str", "userPassword": "str"}),
+        Endpoint("space", "/space", {"roomCode": 1, "buildingCode": "Fuzz", "capacity": 4,
+                                     "openTime": "2025-01-01T08:00:00Z", "closeTime": "2025-01-01T22:00:00Z"},
+                 {"roomCode": "int", "buildingCode": "str", "capacity": "int", "openTime": "time",
+                  "closeTime": "time"}, auth),
+        Endpoint("booking", "/booking", {"spaceID": space_id, "date": "2030-06-01", "userID": user_id,
+                                         "occupants": 2, "startTime": "2030-06-01T10:00:00Z",
+                                         "endTime": "2030-06-01T11:00:00Z"},
+                 {"spaceID": "str", "date": "date", "userID": "int", "occupants": "int", "startTime": "time",
+                  "endTime": "time"}, auth),
+    ]
+
+
+def print_summary(fuzzer, elapsed):
+    print(f"\n{Fore.CYAN}{'='*60}")
+    print("FUZZ SUMMARY")
+    print(f"{'='*60}{Style.RESET_ALL}")
+    print(f"{fuzzer.sent} requests in {elapsed:.1f}s ({fuzzer.sent / elapsed:.0f}/s), "
+          f"{len(fuzzer.signatures)} distinct responses")
+    for (name, status, code, body_shape), entry in sorted(fuzzer.signatures.items(), key=lambda item: -item[0][1]):
+        color = Fore.RED if status >= 500 or status == 0 else ""
+        print(f"{color}  {name:8} {status:3} {code or '-':16} x{entry['count']:<8} e.g. {entry['mutation'][:60]}"
+              f"{Style.RESET_ALL}")
+
+    filename = f"fuzz_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(filename, "w") as f:
+        json.dump([
+            {"endpoint": name, "status": status, "errCode": code, "shape": body_shape, **entry}
+            for (name, status, code, body_shape), entry in fuzzer.signatures.items()
+        ], f, indent=2)
+    print(f"\nResults saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the services with malformed payloads")
+    parser.add_argument("--url", default=ALB_URL, help="Target base URL")
+    parser.add_argument("--concurrency", type=int, default=100, help="Requests in flight")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=10**9, help="Stop after this many requests")
+    parser.add_argument("--combined", type=int, default=500, help="Random two-field mutations per endpoint")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the combined mutations")
+    args = parser.parse_args()
+
+    client = HTTPClient.from_url(URL(args.url), concurrency=args.concurrency, connection_timeout=5,
+                                 network_timeout=30)
+    username, user_id, space_id = bootstrap(client)
+    rng = random.Random(args.seed)
+    corpus = [(endpoint, label, body)
+              for endpoint in endpoints(username, user_id, space_id)
+              for label, body in mutations(endpoint, rng, args.combined)]
+    print(f"Fuzzing {args.url} with {len(corpus)} payloads, {args.concurrency} in flight, for {args.duration:g}s")
+
+    fuzzer = Fuzzer(client, corpus)
+    elapsed = fuzzer.run(args.concurrency, args.duration, args.requests)
+    client.close()
+    print_summary(fuzzer, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,11 @@
 
 import requests
 import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import fixture_cache
 
 # Configuration
 ALB_URL = "http://CS6650L2-alb-243173383.us-east-1.elb.amazonaws.com"
@@ -20,6 +25,18 @@ ADMIN = {
     "password": "admin123"
 }
 
+
+def cached_credentials(username, default):
+    """The user setup.py last populated on ALB_URL, if the fixture cache has it"""
+    entity = fixture_cache.FixtureCache(ALB_URL).user("baseline", username)
+    if entity is None:
+        return default
+    return {"user_id": str(entity.user_id), "username": entity.name, "password": entity.secret}
+
+
+ALICE = cached_credentials("alice", ALICE)
+ADMIN = cached_credentials("admin", ADMIN)
+
 def login_user(user_creds):
     """Login user to activate session"""
     resp = requests.post(
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+error_taxonomy.py - Per-second response counts keyed by (endpoint, status, ErrCode)
+
+Add this file to the locustfile list. Every response is counted under its
+request name, HTTP status and the service's ErrCode (parsed only for error
+responses), and the counters are sampled once a second into a time series,
+so a burst of SESSION EXPIRED during a ramp shows up apart from CONFLICTs
+however the locustfile words its failure messages.
+
+    locust -f locust_availability.py,error_taxonomy.py --headless --csv run ...
+
+With --csv the series is written next to the stats CSVs as
+<prefix>_errcodes.csv (Timestamp, Name, Status, ErrCode, Count); a totals
+table is printed at exit either way. Workers ship their samples to the master.
+"""
+
+import csv
+import time
+
+import gevent
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+from request_meta import err_code, status_code
+
+
+SAMPLE_INTERVAL = 1.0
+
+
+class ErrorCounters:
+    """Counts per (name, status, ErrCode), swapped out once per sample"""
+
+    def __init__(self):
+        self.current = {}
+        self.series = {}
+
+    def count(self, name, status, code):
+        key = (name, status, code)
+        self.current[key] = self.current.get(key, 0) + 1
+
+    def sample(self, second=None):
+        """Move the counts since the last sample into the series under second"""
+        counts, self.current = self.current, {}
+        if counts:
+            self.add(int(second if second is not None else time.time()), counts)
+        return counts
+
+    def add(self, second, counts):
+        bucket = self.series.setdefault(second, {})
+        for key, value in counts.items():
+            bucket[key] = bucket.get(key, 0) + value
+
+    def rows(self):
+        for second in sorted(self.series):
+            for (name, status, code), value in sorted(self.series[second].items()):
+                yield second, name, status, code, value
+
+    def totals(self):
+        totals = {}
+        for bucket in self.series.values():
+            for key, value in bucket.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+_counters = ErrorCounters()
+_pending = []
+_sampler = None
+
+
+def _sample_loop(ship):
+    while True:
+        gevent.sleep(SAMPLE_INTERVAL - time.time() % SAMPLE_INTERVAL)
+        second = int(time.time()) - 1
+        counts = _counters.sample(second)
+        if counts and ship:
+            _pending.append((second, counts))
+
+
+@events.request.add_listener
+def on_request(request_type, name, response=None, exception=None, **kwargs):
+    if response is None:
+        _counters.count(name, 0, type(exception).__name__ if exception else "")
+        return
+    status = status_code(response)
+    _counters.count(name, status, err_code(response) if status >= 400 else "")
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global _counters, _sampler
+    _counters = ErrorCounters()
+    _pending.clear()
+    if _sampler is None and not isinstance(environment.runner, MasterRunner):
+        _sampler = gevent.spawn(_sample_loop, isinstance(environment.runner, WorkerRunner))
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    global _sampler
+    if _sampler is not None:
+        _sampler.kill(block=False)
+        _sampler = None
+        second = int(time.time())
+        counts = _counters.sample(second)
+        if counts and isinstance(environment.runner, WorkerRunner):
+            _pending.append((second, counts))
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    data["errcode_series"] = [(second, list(counts.items())) for second, counts in _pending]
+    _pending.clear()
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    for second, items in data.get("errcode_series", []):
+        _counters.add(second, {tuple(key): value for key, value in items})
+
+
+def write_csv(path, counters):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "Name", "Status", "ErrCode", "Count"])
+        writer.writerows(counters.rows())
+
+
+def print_totals(counters):
+    totals = counters.totals()
+    print("\n=== Responses by status and ErrCode ===")
+    if not totals:
+        print("No responses were counted")
+        return
+    seconds = sorted(counters.series)
+    print(f"{sum(totals.values())} responses over {seconds[-1] - seconds[0] + 1}s")
+    print(f"{'name':50}\t{'status':>6}\t{'ErrCode':20}\tcount\tpeak/s")
+    for key, value in sorted(totals.items(), key=lambda item: -item[1]):
+        peak = max(bucket.get(key, 0) for bucket in counters.series.values())
+        name, status, code = key
+        print(f"{name[:50]:50}\t{status:>6}\t{code or '-':20}\t{value}\t{peak}")
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    print_totals(_counters)
+    prefix = getattr(environment.parsed_options, "csv_prefix", None)
+    if prefix:
+        write_csv(f"{prefix}_errcodes.csv", _counters)
+        print(f"Wrote {prefix}_errcodes.csv")
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+fault_proxy.py - Fault-injecting reverse proxy for resilience benchmarks
+
+Sits between a locustfile or script and the target and applies faults on a
+schedule of phases, each active for a time window of the run:
+
+    python fault_proxy.py --target http://your-alb-url --port 8081 \\
+        --phase "0-:latency=exp:2" \\
+        --phase "60-120:latency=lognormal:200:0.8,jitter=50" \\
+        --phase "180-190:partition" \\
+        --phase "240-300:error=0.1:502,reset=0.01,bandwidth=64"
+    locust -f locust_availability.py --host http://localhost:8081
+
+Faults in a phase (comma separated):
+    latency=SPEC     extra delay per chunk sent upstream (const:MS, uniform:LO:HI, exp:MEAN, lognormal:MEDIAN:SIGMA)
+    jitter=MS        uniform extra delay on top, in both directions
+    bandwidth=KBPS   per-connection cap on each direction, in kilobytes per second
+    reset=RATE       chance per request of resetting the client connection (RST)
+    error=RATE:CODE  chance per request of answering CODE (e.g. 502) like the ALB, without forwarding
+    partition        nothing passes; connections made or used during the window hang, then are reset
+
+Phases are "START-END" seconds since the proxy started (END may be empty);
+later phases override earlier ones for the same fault; --repeat cycles the
+schedule. While no phase is active bytes are written straight through, and
+requests are only parsed at all when the schedule contains error or reset
+faults (both are decided once per request, not per read), so runs with and
+without faults measure the same path.
+"""
+
+import argparse
+import asyncio
+import random
+import signal
+import socket
+import struct
+import time
+from collections import Counter, deque
+from urllib.parse import urlsplit
+
+from service_standin import parse_latency
+
+
+ALB_PAGES = {
+    500: "500 Internal Server Error", 502: "502 Bad Gateway", 503: "503 Service Temporarily Unavailable",
+    504: "504 Gateway Time-out",
+}
+
+
+class Faults:
+    """The faults of one phase"""
+
+    __slots__ = ("latency", "jitter", "bandwidth", "reset", "error", "partition")
+
+    def __init__(self):
+        self.latency = None
+        self.jitter = 0.0
+        self.bandwidth = None
+        self.reset = 0.0
+        self.error = None
+        self.partition = False
+
+    def merge(self, other):
+        merged = Faults()
+        for name in self.__slots__:
+            mine, theirs = getattr(self, name), getattr(other, name)
+            setattr(merged, name, theirs if theirs else mine)
+        return merged
+
+    def delays(self):
+        return self.latency is not None or self.jitter or self.bandwidth
+
+    @classmethod
+    def parse(cls, text):
+        faults = cls()
+        for item in filter(None, (part.strip() for part in text.split(","))):
+            name, _, value = item.partition("=")
+            if name == "latency":
+                faults.latency = parse_latency(value)
+            elif name == "jitter":
+                faults.jitter = float(value) / 1000
+            elif name == "bandwidth":
+                faults.bandwidth = float(value) * 1024
+            elif name == "reset":
+                faults.reset = float(value)
+            elif name == "error":
+                rate, code = value.split(":")
+                faults.error = (float(rate), int(code))
+            elif name == "partition":
+                faults.partition = True
+            else:
+                raise ValueError(f"unknown fault {name!r}")
+        return faults
+
+
+class Schedule:
+    """Phases (start, end, Faults); current() is None while nothing is active"""
+
+    def __init__(self, phases, repeat=None, started=None):
+        self.phases = phases
+        self.repeat = repeat
+        self.started = started if started is not None else time.monotonic()
+        self.has_errors = any(faults.error for _, _, faults in phases)
+        # Per-request faults need the client stream split into requests
+        self.frames_requests = any(faults.error or faults.reset for _, _, faults in phases)
+        self._cached = (-1, None)
+
+    @classmethod
+    def parse(cls, specs, repeat=None):
+        phases = []
+        for spec in specs or []:
+            window, _, faults = spec.partition(":")
+            start, _, end = window.partition("-")
+            phases.append((float(start or 0), float(end) if end else float("inf"), Faults.parse(faults)))
+        return cls(phases, repeat)
+
+    def current(self):
+        elapsed = time.monotonic() - self.started
+        # Re-evaluated at most every 10ms
+        tick = int(elapsed * 100)
+        if tick == self._cached[0]:
+            return self._cached[1]
+        if self.repeat:
+            elapsed %= self.repeat
+        active = None
+        for start, end, faults in self.phases:
+            if start <= elapsed < end:
+                active = faults if active is None else active.merge(faults)
+        self._cached = (tick, active)
+        return active
+
+
+class Pump:
+    """Writes chunks to a transport in order, each no earlier than its release time"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = deque()
+        self.next_free = 0.0
+        self.timer = None
+
+    def push(self, transport, data, faults, latency):
+        now = self.loop.time()
+        delay = (faults.latency() if latency and faults.latency else 0.0) + random.uniform(0, faults.jitter)
+        release = max(now + delay, self.next_free)
+        if faults.bandwidth:
+            # At the cap a chunk leaves once the bytes before it and its own have drained
+            release += len(data) / faults.bandwidth
+        self.next_free = release
+        self.queue.append((release, transport, data))
+        if self.timer is None:
+            self._schedule()
+
+    def _schedule(self):
+        self.timer = self.loop.call_at(self.queue[0][0], self._flush)
+
+    def _flush(self):
+        self.timer = None
+        now = self.loop.time()
+        while self.queue and self.queue[0][0] <= now:
+            _, transport, data = self.queue.popleft()
+            if not transport.is_closing():
+                transport.write(data)
+        if self.queue:
+            self._schedule()
+
+    def pending(self):
+        return bool(self.queue)
+
+
+class RequestFramer:
+    """Splits a byte stream into HTTP/1.1 requests (Content-Length bodies only)"""
+
+    def __init__(self):
+        self.buffer = b""
+
+    def feed(self, data):
+        """Return a list of complete raw requests; an incomplete tail stays buffered"""
+        self.buffer += data
+        requests = []
+        while True:
+            head_end = self.buffer.find(b"\r\n\r\n")
+            if head_end < 0:
+                return requests
+            length = 0
+            for line in self.buffer[:head_end].split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value.strip() or 0)
+            end = head_end + 4 + length
+            if len(self.buffer) < end:
+                return requests
+            requests.append(self.buffer[:end])
+            self.buffer = self.buffer[end:]
+
+
+class ResponseCounter:
+    """Counts complete HTTP/1.1 responses in a byte stream (Content-Length or chunked)"""
+
+    def __init__(self):
+        self.buffer = b""
+        self.remaining = None
+        self.chunked = False
+
+    def feed(self, data):
+        self.buffer += data
+        done = 0
+        while True:
+            if self.remaining is None and not self.chunked:
+                head_end = self.buffer.find(b"\r\n\r\n")
+                if head_end < 0:
+                    return done
+                head = self.buffer[:head_end].lower()
+                self.buffer = self.buffer[head_end + 4:]
+                self.remaining = 0
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    if name.strip() == b"content-length":
+                        self.remaining = int(value.strip() or 0)
+                    elif name.strip() == b"transfer-encoding" and b"chunked" in value:
+                        self.chunked, self.remaining = True, None
+            if self.chunked:
+                line_end = self.buffer.find(b"\r\n")
+                if line_end < 0:
+                    return done
+                size = int(self.buffer[:line_end].split(b";")[0] or b"0", 16)
+                if size == 0:
+                    # The last chunk, optional trailers, then an empty line
+                    trailer_end = self.buffer.find(b"\r\n\r\n", line_end)
+                    if trailer_end < 0:
+                        return done
+                    self.buffer = self.buffer[trailer_end + 4:]
+                    self.chunked = False
+                    self.remaining = None
+                    done += 1
+                    continue
+                if len(self.buffer) < line_end + 2 + size + 2:
+                    return done
+                self.buffer = self.buffer[line_end + 2 + size + 2:]
+                continue
+            if len(self.buffer) < self.remaining:
+                self.remaining -= len(self.buffer)
+                self.buffer = b""
+                return done
+            self.buffer = self.buffer[self.remaining:]
+            self.remaining = None
+            done += 1
+
+
+def alb_error(code):
+    page = ALB_PAGES.get(code, f"{code} Error")
+    body = (f"<html>\r\n<head><title>{page}</title></head>\r\n<body>\r\n<center><h1>{page}</h1></center>\r\n"
+            "</body>\r\n</html>\r\n").encode()
+    return (f"HTTP/1.1 {page}\r\nServer: awselb/2.0\r\nContent-Type: text/html\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n").encode() + body
+
+
+def reset(transport):
+    """Abort with an RST rather than a FIN"""
+    sock = transport.get_extra_info("socket")
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        except OSError:
+            pass
+    transport.abort()
+
+
+class UpstreamProtocol(asyncio.Protocol):
+    def __init__(self, client):
+        self.client = client
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.client.from_upstream(data)
+
+    def connection_lost(self, exc):
+        self.client.upstream_lost()
+
+    def pause_writing(self):
+        self.client.transport.pause_reading()
+
+    def resume_writing(self):
+        self.client.transport.resume_reading()
+
+
+class ClientProtocol(asyncio.Protocol):
+    """One client connection and its upstream connection"""
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.transport = None
+        self.upstream = None
+        self.early = []
+        self.blackholed = False
+        self.framer = RequestFramer() if proxy.schedule.frames_requests else None
+        self.responses = ResponseCounter() if proxy.schedule.has_errors else None
+        self.outstanding = 0
+        self.up_pump = Pump(proxy.loop)
+        self.down_pump = Pump(proxy.loop)
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.proxy.stats["connections"] += 1
+        transport.pause_reading()
+        self.proxy.loop.create_task(self._connect())
+
+    async def _connect(self):
+        try:
+            _, self.upstream = await self.proxy.loop.create_connection(
+                lambda: UpstreamProtocol(self), self.proxy.host, self.proxy.port)
+        except OSError:
+            self.proxy.stats["upstream connect failures"] += 1
+            self.transport.write(alb_error(502))
+            self.transport.close()
+            return
+        if not self.transport.is_closing():
+            self.transport.resume_reading()
+
+    def data_received(self, data):
+        faults = self.proxy.schedule.current()
+        if faults is None and self.framer is None and not self.up_pump.pending() and not self.blackholed:
+            self.upstream.transport.write(data)
+            return
+        if faults is not None and faults.partition or self.blackholed:
+            self._blackhole()
+            return
+        chunks = self.framer.feed(data) if self.framer is not None else [data]
+        for chunk in chunks:
+            if faults is not None and faults.reset and random.random() < faults.reset:
+                self.proxy.stats["resets"] += 1
+                self._reset()
+                return
+            if (faults is not None and faults.error and self.outstanding == 0 and not self.up_pump.pending()
+                    and random.random() < faults.error[0]):
+                self.proxy.stats[f"injected {faults.error[1]}"] += 1
+                if faults.delays() or self.down_pump.pending():
+                    self.down_pump.push(self.transport, alb_error(faults.error[1]), faults, False)
+                else:
+                    self.transport.write(alb_error(faults.error[1]))
+                continue
+            if self.responses is not None:
+                self.outstanding += 1
+            if faults is not None and faults.delays() or self.up_pump.pending():
+                self.up_pump.push(self.upstream.transport, chunk, faults or Faults(), True)
+            else:
+                self.upstream.transport.write(chunk)
+
+    def from_upstream(self, data):
+        if self.responses is not None:
+            self.outstanding -= self.responses.feed(data)
+        faults = self.proxy.schedule.current()
+        if faults is not None and faults.partition or self.blackholed:
+            self._blackhole()
+            return
+        if faults is not None and (faults.jitter or faults.bandwidth) or self.down_pump.pending():
+            self.down_pump.push(self.transport, data, faults or Faults(), False)
+        else:
+            self.transport.write(data)
+
+    def _blackhole(self):
+        if not self.blackholed:
+            self.blackholed = True
+            self.proxy.stats["partitioned connections"] += 1
+            self.proxy.partitioned.append(self)
+
+    def _reset(self):
+        reset(self.transport)
+        if self.upstream is not None:
+            self.upstream.transport.close()
+
+    def connection_lost(self, exc):
+        if self.upstream is not None and self.upstream.transport is not None:
+            self.upstream.transport.close()
+
+    def upstream_lost(self):
+        if not self.transport.is_closing() and not self.down_pump.pending():
+            self.transport.close()
+        elif self.down_pump.pending():
+            self.proxy.loop.call_at(self.down_pump.next_free + 0.001, self.transport.close)
+
+    def pause_writing(self):
+        if self.upstream is not None:
+            self.upstream.transport.pause_reading()
+
+    def resume_writing(self):
+        if self.upstream is not None:
+            self.upstream.transport.resume_reading()
+
+
+class FaultProxy:
+    def __init__(self, target, schedule):
+        parts = urlsplit(target if "://" in target else f"http://{target}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.schedule = schedule
+        self.loop = None
+        self.stats = Counter()
+        self.partitioned = []
+
+    async def _heal(self):
+        """Reset connections caught in a partition once it is over"""
+        while True:
+            await asyncio.sleep(0.1)
+            faults = self.schedule.current()
+            if self.partitioned and (faults is None or not faults.partition):
+                for client in self.partitioned:
+                    client._reset()
+                self.partitioned.clear()
+
+    async def serve(self, host, port):
+        self.loop = asyncio.get_running_loop()
+        server = await self.loop.create_server(lambda: ClientProtocol(self), host, port, backlog=4096)
+        self.schedule.started = time.monotonic()
+        self.loop.create_task(self._heal())
+        # SIGTERM (docker stop, kill) ends the run like Ctrl-C, so the stats still print
+        stopped = self.loop.create_future()
+        self.loop.add_signal_handler(signal.SIGTERM, stopped.set_result, None)
+        async with server:
+            await stopped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reverse proxy that injects scheduled faults")
+    parser.add_argument("--target", required=True, help="Upstream base URL, e.g. http://your-alb-url")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8081, help="Port to listen on")
+    parser.add_argument("--phase", action="append", metavar="START-END:FAULTS",
+                        help='Fault phase, e.g. "60-120:latency=exp:50,error=0.05:502" (repeatable)')
+    parser.add_argument("--repeat", type=float, help="Cycle the schedule every this many seconds")
+    args = parser.parse_args()
+
+    proxy = FaultProxy(args.target, Schedule.parse(args.phase, args.repeat))
+    print(f"Proxying http://{args.host}:{args.port} -> {proxy.host}:{proxy.port} with {len(proxy.schedule.phases)} phases")
+    try:
+        asyncio.run(proxy.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    print("\n=== Fault proxy ===")
+    for name, count in sorted(proxy.stats.items()):
+        print(f"{name:28}\t{count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+fixture_cache.py - Users and spaces created by earlier runs, reused per target URL
+
+Bootstrapping an admin, users and a couple of hundred spaces costs minutes
+against the ALB on every run. The cache keeps what a run created in one
+small file per target URL, and the next run against the same URL starts
+from it and only checks a sample:
+
+    cache = FixtureCache(host)
+    admin = cache.user("ramp", "admin")                     # None on a cold cache
+    space_ids = cache.revalidate("ramp", lambda e: client.get(f"/space/{e.name}").status_code == 200)
+    ...                                                     # cold: create them, then
+    cache.add_user("ramp", "admin", USER_PASSWORD, user_id, admin=True)
+    cache.add_spaces("ramp", space_ids, booked_on=date)    # date: what this run books on
+    cache.save()
+    cache.mark(entity, ok=False)                            # a response said it is gone
+
+Entities belong to a group (the locustfile or script that made them, since
+each wants its own capacity and hours). The file is a header, one 24-byte
+record per entity (kind, state, user ID, last verified time, where its
+strings are) and the strings. It is memory-mapped: verification results
+are written into the records in place, and only adding entities rewrites
+the file. A rewrite holds a lock file, merges in whatever other processes
+saved since this one loaded (so concurrent workers keep each other's
+entities) and replaces the file atomically (so none reads half a file).
+Spaces remember the last date a run booked them on, so a run can skip
+spaces that already carry bookings on its own date.
+
+revalidate() GETs a few entities whose last check is older than max_age;
+only if one of those fails are the rest of the group checked, so a warm
+start costs a handful of requests. Users are best checked by the login
+the run needs anyway. Files live in $FIXTURE_CACHE_DIR (default
+tests/.fixtures).
+
+    python fixture_cache.py --url http://your-alb-url                 # list what is cached
+    python fixture_cache.py --url http://your-alb-url --verify        # GET every space, mark the results
+    python fixture_cache.py --url http://your-alb-url --export-verified baseline/verified_spaces.json
+    python fixture_cache.py --url http://your-alb-url --import-verified baseline/verified_spaces.json --group baseline
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import time
+from pathlib import Path
+
+
+CACHE_DIR = os.getenv("FIXTURE_CACHE_DIR", str(Path(__file__).resolve().parent / ".fixtures"))
+MAGIC = b"FIX1"
+_HEADER = struct.Struct("<4sI")
+# kind, state, string length, string offset, user ID, last verified (epoch seconds)
+_RECORD = struct.Struct("<BBHIQd")
+
+USER, ADMIN, SPACE = 1, 2, 3
+UNVERIFIED, VALID, INVALID = 0, 1, 2
+KINDS = {USER: "user", ADMIN: "admin", SPACE: "space"}
+STATES = {UNVERIFIED: "unverified", VALID: "valid", INVALID: "invalid"}
+
+
+class Entity:
+    """One cached user or space; for spaces user_id is 0 and secret the last date booked on (or empty)"""
+
+    __slots__ = ("index", "kind", "state", "group", "name", "secret", "user_id", "verified_at")
+
+    def __init__(self, index, kind, state, group, name, secret="", user_id=0, verified_at=0.0):
+        self.index = index
+        self.kind = kind
+        self.state = state
+        self.group = group
+        self.name = name
+        self.secret = secret
+        self.user_id = user_id
+        self.verified_at = verified_at
+
+    def key(self):
+        return self.group, self.kind, self.name, self.user_id
+
+    def text(self):
+        return "\0".join((self.group, self.name, self.secret)).encode()
+
+    def __repr__(self):
+        return f"<{KINDS[self.kind]} {self.group}/{self.name} {self.user_id or ''} {STATES[self.state]}>"
+
+
+def _parse(buffer):
+    """Entities of a cache file's contents ([] unless it is one)"""
+    if len(buffer) < _HEADER.size:
+        return []
+    magic, count = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        return []
+    entities = []
+    strings_at = _HEADER.size + count * _RECORD.size
+    for index in range(count):
+        kind, state, length, offset, user_id, verified_at = _RECORD.unpack_from(
+            buffer, _HEADER.size + index * _RECORD.size)
+        group, name, secret = bytes(buffer[strings_at + offset:strings_at + offset + length]).decode().split("\0")
+        entities.append(Entity(index, kind, state, group, name, secret, user_id, verified_at))
+    return entities
+
+
+def cache_path(base_url, directory=CACHE_DIR):
+    """The cache file for a target URL (trailing slashes and case of the host ignored)"""
+    key = base_url.strip().rstrip("/").lower()
+    return os.path.join(directory, hashlib.sha1(key.encode()).hexdigest()[:16] + ".fix")
+
+
+class FixtureCache:
+    """The entities cached for one target URL"""
+
+    def __init__(self, base_url, directory=CACHE_DIR):
+        self.base_url = base_url
+        self.path = cache_path(base_url, directory)
+        self.entities = []
+        self._pending = []
+        self._cleared = set()
+        self._file = None
+        self._map = None
+        self._records_at = _HEADER.size
+        self._load()
+
+    def _load(self):
+        self.close()
+        self.entities = []
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < _HEADER.size:
+            return
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if _HEADER.unpack_from(self._map, 0)[0] != MAGIC:
+            self.close()
+            return
+        self.entities = _parse(self._map)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_record(self, entity):
+        if self._map is None or entity.index is None:
+            return
+        at = self._records_at + entity.index * _RECORD.size
+        length, offset = struct.unpack_from("<HI", self._map, at + 2)
+        self._map[at:at + _RECORD.size] = _RECORD.pack(entity.kind, entity.state, length, offset,
+                                                       entity.user_id, entity.verified_at)
+
+    # reading
+
+    def find(self, group=None, kind=None, valid_only=True):
+        return [entity for entity in self.entities + self._pending
+                if (group is None or entity.group == group) and (kind is None or entity.kind == kind)
+                and not (valid_only and entity.state == INVALID)]
+
+    def user(self, group, username):
+        """The newest usable user or admin cached under group with this username, or None"""
+        for entity in reversed(self.find(group)):
+            if entity.kind in (USER, ADMIN) and entity.name == username:
+                return entity
+        return None
+
+    def users(self, group):
+        return [entity for entity in self.find(group) if entity.kind in (USER, ADMIN)]
+
+    def space_ids(self, group):
+        return [entity.name for entity in self.find(group, SPACE)]
+
+    def booked_on(self, group, date):
+        """Space IDs in group that a run has booked on date"""
+        return {entity.name for entity in self.find(group, SPACE) if entity.secret == date}
+
+    def verified_spaces(self):
+        """Space IDs last seen valid, in the baseline/verified_spaces.json form"""
+        return sorted({entity.name for entity in self.find(kind=SPACE) if entity.state == VALID})
+
+    # verification
+
+    def mark(self, entity, ok, at=None):
+        """Record a check of entity (in place in the mapped file); ok=False stops it being handed out"""
+        entity.state = VALID if ok else INVALID
+        entity.verified_at = at or time.time()
+        self._write_record(entity)
+
+    def flush(self):
+        if self._map is not None:
+            self._map.flush()
+
+    def revalidate(self, group, check, kind=SPACE, sample=3, max_age=3600):
+        """Names in group still usable: check(entity) -> bool on a sample of the stale ones, all if one fails"""
+        entities = self.find(group, kind)
+        now = time.time()
+        stale = [entity for entity in entities if now - entity.verified_at > max_age]
+        if stale:
+            checked = random.sample(stale, min(sample, len(stale)))
+            results = [check(entity) for entity in checked]
+            for entity, ok in zip(checked, results):
+                self.mark(entity, ok, now)
+            if not all(results):
+                for entity in stale:
+                    if entity not in checked:
+                        self.mark(entity, check(entity), now)
+            self.flush()
+        return [entity.name for entity in entities if entity.state != INVALID]
+
+    # adding
+
+    def add_user(self, group, username, password, user_id, admin=False):
+        entity = Entity(None, ADMIN if admin else USER, VALID, group, username, password, int(user_id), time.time())
+        self._pending.append(entity)
+        return entity
+
+    def add_spaces(self, group, space_ids, booked_on=""):
+        """Add spaces to group (ones it already holds are not added twice), optionally noting a booking date"""
+        now = time.time()
+        known = {entity.name: entity for entity in self.find(group, SPACE)}
+        for space_id in space_ids:
+            entity = known.get(space_id)
+            if entity is None:
+                entity = known[space_id] = Entity(None, SPACE, VALID, group, space_id, booked_on, 0, now)
+                self._pending.append(entity)
+            elif booked_on:
+                # A different string length needs the rewrite save() does anyway
+                entity.secret = booked_on
+
+    def save(self):
+        """Write cached and added entities, merged with the file on disk, to a new file and map it.
+
+        Entities this cache knows win over the file's (so marks and invalid
+        entities, which are dropped, stick); ones other processes saved since
+        this cache loaded are kept, unless their group was cleared here.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._write_merged()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self._pending = []
+        self._cleared = set()
+        self._load()
+
+    def _write_merged(self):
+        mine = self.entities + self._pending
+        known = {entity.key() for entity in mine}
+        on_disk = []
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                on_disk = [entity for entity in _parse(f.read())
+                           if entity.key() not in known and entity.group not in self._cleared]
+        keep = [entity for entity in on_disk + mine if entity.state != INVALID]
+        strings = bytearray()
+        records = bytearray()
+        for entity in keep:
+            text = entity.text()
+            records += _RECORD.pack(entity.kind, entity.state, len(text), len(strings),
+                                    entity.user_id, entity.verified_at)
+            strings += text
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(keep)) + records + strings)
+        os.replace(temporary, self.path)
+
+    def clear_group(self, group):
+        """Forget every entity of a group (e.g. after the target was redeployed)"""
+        for entity in self.find(group, valid_only=False):
+            entity.state = INVALID
+        self._pending = [entity for entity in self._pending if entity.group != group]
+        self._cleared.add(group)
+        self.save()
+
+
+def main():
+    import requests
+
+    parser = argparse.ArgumentParser(description="Inspect and verify the fixture cache of a target URL")
+    parser.add_argument("--url", required=True, help="Target URL the fixtures were created on")
+    parser.add_argument("--group", default=None, help="Limit to one group")
+    parser.add_argument("--verify", action="store_true", help="GET every cached space and record the result")
+    parser.add_argument("--clear", action="store_true", help="Forget the group (or everything)")
+    parser.add_argument("--export-verified", metavar="PATH", help="Write the valid space IDs as a JSON list")
+    parser.add_argument("--import-verified", metavar="PATH", help="Add the space IDs of a JSON list to --group")
+    args = parser.parse_args()
+
+    cache = FixtureCache(args.url)
+    if args.clear:
+        for group in {entity.group for entity in cache.find(valid_only=False)} if args.group is None else [args.group]:
+            cache.clear_group(group)
+    if args.import_verified:
+        with open(args.import_verified) as f:
+            cache.add_spaces(args.group or "baseline", json.load(f))
+        cache.save()
+    if args.verify:
+        session = requests.Session()
+        base = args.url.rstrip("/")
+        for entity in cache.find(args.group, SPACE, valid_only=False):
+            cache.mark(entity, session.get(f"{base}/space/{entity.name}", timeout=10).status_code == 200)
+        cache.flush()
+    if args.export_verified:
+        with open(args.export_verified, "w") as f:
+            json.dump(cache.verified_spaces(), f, indent=2)
+        print(f"Wrote {args.export_verified}")
+
+    print(f"{cache.path} ({args.url})")
+    for entity in cache.find(args.group, valid_only=False):
+        checked = time.strftime("%Y-%m-%d %H:%M", time.localtime(entity.verified_at)) if entity.verified_at else "-"
+        print(f"  {entity.group:12} {KINDS[entity.kind]:6} {entity.name:40} {entity.user_id or '':>12} "
+              f"{STATES[entity.state]:11} {checked}")
+
+
+if __name__ == "__main__":
+    main()
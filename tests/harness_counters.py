@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+harness_counters.py - Per-greenlet counters and histograms for custom harness signals
+
+Locustfiles bump counters where the signal happens; a reader (the
+metrics_exporter.py plugin) merges them on demand:
+
+    import harness_counters
+    harness_counters.inc("harness_logins_total", reason="expired", ok="true")
+
+Every greenlet (i.e. every Locust user) writes only to its own shard, so an
+increment is one dict update with no lock and no shared hot key. Shards of
+finished greenlets are folded into a retired shard when a snapshot is taken.
+This module registers no Locust listeners and can be imported anywhere.
+"""
+
+import weakref
+from bisect import bisect_left
+
+import gevent
+
+
+# Request latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_shards = weakref.WeakKeyDictionary()
+_retired = {"counters": {}, "histograms": {}}
+_buckets = {}
+_generation = 0
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _shard():
+    greenlet = gevent.getcurrent()
+    shard = _shards.get(greenlet)
+    if shard is None:
+        shard = {"counters": {}, "histograms": {}, "generation": _generation}
+        _shards[greenlet] = shard
+        # Keep the counts once the greenlet is gone
+        weakref.finalize(greenlet, _retire, shard)
+    return shard
+
+
+def _retire(shard):
+    if shard["generation"] == _generation:
+        merge_into(_retired, shard)
+
+
+def merge_into(target, shard):
+    """Add the counts of a shard or snapshot into target"""
+    counters = target["counters"]
+    for key, value in shard["counters"].items():
+        counters[key] = counters.get(key, 0) + value
+    histograms = target["histograms"]
+    for key, (counts, total) in shard["histograms"].items():
+        merged = histograms.get(key)
+        if merged is None:
+            histograms[key] = [list(counts), total]
+        else:
+            merged_counts = merged[0]
+            for i, count in enumerate(counts):
+                merged_counts[i] += count
+            merged[1] += total
+
+
+def inc(name, value=1, /, **labels):
+    """Add value to the counter name{labels}"""
+    counters = _shard()["counters"]
+    key = (name, _labels(labels))
+    counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, /, **labels):
+    """Record value in the histogram name{labels}; the first call fixes its buckets"""
+    bounds = _buckets.setdefault(name, buckets)
+    histograms = _shard()["histograms"]
+    key = (name, _labels(labels))
+    entry = histograms.get(key)
+    if entry is None:
+        # one slot per bound plus +Inf; counts are per bucket, not cumulative
+        entry = histograms[key] = [[0] * (len(bounds) + 1), 0.0]
+    entry[0][bisect_left(bounds, value)] += 1
+    entry[1] += value
+
+
+def buckets(name):
+    return _buckets.get(name, DEFAULT_BUCKETS)
+
+
+def snapshot():
+    """Return {"counters": {(name, labels): value}, "histograms": {(name, labels): [counts, sum]}}"""
+    merged = {"counters": {}, "histograms": {}}
+    merge_into(merged, _retired)
+    for shard in list(_shards.values()):
+        merge_into(merged, shard)
+    return merged
+
+
+def reset():
+    """Drop everything counted so far (e.g. at the start of a new test)"""
+    global _generation
+    _generation += 1
+    _shards.clear()
+    _retired["counters"].clear()
+    _retired["histograms"].clear()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+hdr_histogram.py - High dynamic range histogram with lossless merging and a compact encoding
+
+Values are bucketed the HdrHistogram way: powers of two split into linear
+sub-buckets fine enough to keep a fixed number of significant digits, so
+every recorded value is known to within 0.1% (3 digits) from one
+microsecond up to an hour, however many values are recorded. Histograms
+with the same settings merge by adding counts, which loses nothing; that
+is what lets percentiles from many workers be combined exactly.
+
+    histogram = HdrHistogram()
+    histogram.record(int(response_time_ms * 1000))     # microseconds
+    payload = histogram.encode()                        # bytes for the wire
+    merged.merge(HdrHistogram.decode(payload))
+    merged.value_at(99.99)
+
+Only the non-zero counts are kept (a dict by bucket index). The encoding
+is the indices and counts as zigzag varints, runs of empty buckets written
+as one negative number, compressed with zlib. Plain module, no Locust
+listeners.
+"""
+
+import math
+import struct
+import zlib
+
+
+MAGIC = b"HDR1"
+_HEADER = struct.Struct("<4sBQQ")
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varints(data, pos):
+    value = shift = 0
+    for byte in data[pos:]:
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            yield (value >> 1) ^ -(value & 1)
+            value = shift = 0
+        else:
+            shift += 7
+
+
+class HdrHistogram:
+    """Counts of integer values between lowest and highest at a fixed precision"""
+
+    def __init__(self, lowest=1, highest=3_600_000_000, significant_figures=3):
+        self.lowest = lowest
+        self.highest = highest
+        self.significant_figures = significant_figures
+        self.unit_magnitude = int(math.floor(math.log2(lowest)))
+        count_magnitude = int(math.ceil(math.log2(2 * 10 ** significant_figures)))
+        self.half_magnitude = count_magnitude - 1
+        self.half_count = 1 << self.half_magnitude
+        self._mask = ((1 << count_magnitude) - 1) << self.unit_magnitude
+        self._shift = self.unit_magnitude + self.half_magnitude + 1
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.sum = 0
+
+    def _index(self, value):
+        bucket = (value | self._mask).bit_length() - self._shift
+        return ((bucket + 1) << self.half_magnitude) + (value >> (bucket + self.unit_magnitude)) - self.half_count
+
+    def _lowest_at(self, index):
+        bucket = (index >> self.half_magnitude) - 1
+        sub = (index & (self.half_count - 1)) + self.half_count
+        if bucket < 0:
+            sub -= self.half_count
+            bucket = 0
+        return sub << (bucket + self.unit_magnitude)
+
+    def _highest_at(self, index):
+        lowest = self._lowest_at(index)
+        bucket = max((index >> self.half_magnitude) - 1, 0)
+        return lowest + (1 << (bucket + self.unit_magnitude)) - 1
+
+    def record(self, value, count=1):
+        """Add count observations of value (clamped to [0, highest])"""
+        value = 0 if value < 0 else self.highest if value > self.highest else int(value)
+        index = self._index(value)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + count
+        self.total += count
+        self.sum += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def compatible(self, other):
+        return (self.lowest, self.highest, self.significant_figures) == \
+            (other.lowest, other.highest, other.significant_figures)
+
+    def merge(self, other):
+        """Add other's counts; exact because both share the same buckets"""
+        if not self.compatible(other):
+            raise ValueError("cannot merge histograms with different ranges or precision")
+        counts = self.counts
+        for index, count in other.counts.items():
+            counts[index] = counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def value_at(self, percentile):
+        """The value at percentile (0-100): the top of the bucket holding it, capped at the max"""
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(percentile / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_at(index), self.max)
+        return self.max
+
+    def values_at(self, percentiles):
+        """{percentile: value} in one pass over the buckets"""
+        wanted = sorted(percentiles)
+        result = {}
+        if not self.total:
+            return {percentile: 0 for percentile in wanted}
+        seen, position = 0, 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while position < len(wanted) and seen >= max(1, math.ceil(wanted[position] / 100 * self.total)):
+                result[wanted[position]] = min(self._highest_at(index), self.max)
+                position += 1
+            if position == len(wanted):
+                break
+        for percentile in wanted[position:]:
+            result[percentile] = self.max
+        return result
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+    def clear(self):
+        self.counts = {}
+        self.total = 0
+        self.min = self.max = None
+        self.sum = 0
+
+    def encode(self):
+        """Settings, min, max and sum, then the sparse counts as zigzag varints, zlib-compressed"""
+        out = bytearray()
+        for value in (self.min or 0, self.max or 0, self.sum):
+            _write_varint(out, _zigzag(value))
+        previous = -1
+        for index in sorted(self.counts):
+            gap = index - previous - 1
+            if gap:
+                _write_varint(out, _zigzag(-gap))
+            _write_varint(out, _zigzag(self.counts[index]))
+            previous = index
+        header = _HEADER.pack(MAGIC, self.significant_figures, self.lowest, self.highest)
+        return header + zlib.compress(bytes(out), 1)
+
+    @classmethod
+    def decode(cls, payload):
+        magic, significant_figures, lowest, highest = _HEADER.unpack_from(payload)
+        if magic != MAGIC:
+            raise ValueError("not an encoded HdrHistogram")
+        histogram = cls(lowest, highest, significant_figures)
+        values = _read_varints(zlib.decompress(payload[_HEADER.size:]), 0)
+        low, high, total_sum = next(values, 0), next(values, 0), next(values, 0)
+        index = 0
+        counts = histogram.counts
+        for value in values:
+            if value < 0:
+                index -= value
+                continue
+            counts[index] = value
+            histogram.total += value
+            index += 1
+        if histogram.total:
+            histogram.min, histogram.max, histogram.sum = low, high, total_sum
+        return histogram
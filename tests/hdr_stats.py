@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+hdr_stats.py - Exact tail percentiles across distributed workers
+
+Locust merges worker stats from rounded response-time buckets, so p99.9
+and p99.99 drift as workers are added. Add this file to the locustfile
+list (on the master and every worker) to keep an HdrHistogram
+(hdr_histogram.py, 3 significant digits, microseconds) per endpoint on each
+worker. Each stats report ships only the counts recorded since the last one,
+encoded and compressed, and the master adds them up. Merging is lossless, so
+the percentiles match a single process that saw every request, whatever the
+worker count.
+
+    locust -f locust_ramp_users.py,hdr_stats.py --master --csv run ...
+    locust -f locust_ramp_users.py,hdr_stats.py --worker --master-host master
+
+The master (or a standalone run) serves the table as JSON at /hdr on the
+web UI, prints it at exit and, with --csv, writes <prefix>_hdr.csv with
+count, mean, p50 to p99.99 and max in milliseconds per endpoint.
+"""
+
+import csv
+
+from locust import events
+from locust.runners import WorkerRunner
+
+from hdr_histogram import HdrHistogram
+
+
+PERCENTILES = (50, 90, 95, 99, 99.9, 99.99)
+AGGREGATED = ("", "Aggregated")
+
+# Worker: counts since the last report; master or standalone: everything so far
+_histograms = {}
+_shipping = False
+
+
+def _histogram(key):
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = HdrHistogram()
+    return histogram
+
+
+def summary():
+    """Rows of (method, name, count, mean, {percentile: ms}, max) in ms, the aggregate last"""
+    aggregate = HdrHistogram()
+    rows = []
+    for (method, name), histogram in sorted(_histograms.items()):
+        aggregate.merge(histogram)
+        rows.append((method, name, histogram))
+    rows.append((*AGGREGATED, aggregate))
+    return [(method, name, histogram.total, histogram.mean / 1000,
+             {point: value / 1000 for point, value in histogram.values_at(PERCENTILES).items()},
+             (histogram.max or 0) / 1000)
+            for method, name, histogram in rows]
+
+
+def summary_json():
+    return [{"method": method, "name": name, "count": count, "mean_ms": mean,
+             **{f"p{point:g}_ms": value for point, value in values.items()}, "max_ms": maximum}
+            for method, name, count, mean, values, maximum in summary()]
+
+
+def print_summary():
+    print("\n=== Response times from merged HDR histograms (ms) ===")
+    print(f"{'name':50}\t{'count':>9}\t" + "\t".join(f"{'p' + format(point, 'g'):>8}" for point in PERCENTILES)
+          + f"\t{'max':>8}")
+    for method, name, count, mean, values, maximum in summary():
+        label = f"{method} {name}".strip()
+        print(f"{label[:50]:50}\t{count:>9}\t" + "\t".join(f"{values[point]:>8.1f}" for point in PERCENTILES)
+              + f"\t{maximum:>8.1f}")
+
+
+def write_csv(path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Type", "Name", "Request Count", "Average Response Time"]
+                        + [f"{point:g}%" for point in PERCENTILES] + ["Max Response Time"])
+        for method, name, count, mean, values, maximum in summary():
+            writer.writerow([method, name, count, f"{mean:.3f}"]
+                            + [f"{values[point]:.3f}" for point in PERCENTILES] + [f"{maximum:.3f}"])
+
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    global _shipping
+    _shipping = isinstance(environment.runner, WorkerRunner)
+    if environment.web_ui is not None:
+        @environment.web_ui.app.route("/hdr")
+        def hdr():
+            return {"percentiles": list(PERCENTILES), "rows": summary_json()}
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    _histograms.clear()
+
+
+@events.request.add_listener
+def on_request(request_type, name, response_time=None, **kwargs):
+    _histogram((request_type, name)).record(int((response_time or 0) * 1000))
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    if not _histograms:
+        return
+    data["hdr_deltas"] = [[method, name, histogram.encode()] for (method, name), histogram in _histograms.items()]
+    _histograms.clear()
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    for method, name, payload in data.get("hdr_deltas", []):
+        _histogram((method, name)).merge(HdrHistogram.decode(payload))
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if _shipping:
+        return
+    print_summary()
+    prefix = getattr(environment.parsed_options, "csv_prefix", None)
+    if prefix:
+        write_csv(f"{prefix}_hdr.csv")
+        print(f"Wrote {prefix}_hdr.csv")
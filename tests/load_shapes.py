@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+load_shapes.py - Reusable LoadTestShape profiles selected from the command line
+
+Add this file to the locustfile list to drive any existing locustfile with a
+shape, or subclass ConfiguredShape inside a locustfile to give it a default:
+
+    locust -f locust_availability.py,load_shapes.py --shape spike \
+        --shape-params "base_users=50,spike_users=800,spike_at=300"
+    locust -f locust_ramp_users.py --shape-config shapes/ramp_10k.json
+
+Profiles (parameters in brackets, times in seconds):
+    stages        list of {"duration", "users", "spawn_rate"} (duration is the stage end time)
+    stairs        [start_users, step_users, step_duration, steps, spawn_rate, hold]
+    spike         [base_users, spike_users, spike_at, spike_duration, duration, spawn_rate]
+    soak          [users, ramp_time, duration, spawn_rate]
+    daily         [min_users, max_users, period, duration, spawn_rate]
+    class-change  [base_users, peak_users, rush_before, rush_after, period, duration, spawn_rate]
+
+Without --shape or --shape-config the shape follows -u/-r/-t like a plain run.
+"""
+
+import json
+import math
+import time
+
+from locust import LoadTestShape, events
+
+
+class ShapeProfile:
+    """A named load profile; subclasses set params defaults and implement users_at"""
+
+    name = ""
+    params = {}
+
+    def __init__(self, **overrides):
+        for key, default in self.params.items():
+            value = overrides.pop(key, default)
+            # Values from --shape-params arrive as strings
+            if isinstance(value, str) and isinstance(default, (int, float)):
+                value = type(default)(float(value))
+            setattr(self, key, value)
+        if overrides:
+            raise ValueError(f"Unknown parameters for shape '{self.name}': {', '.join(sorted(overrides))}")
+
+    def users_at(self, run_time):
+        """Return (users, spawn_rate) for the given run time, or None to stop"""
+        raise NotImplementedError
+
+
+class StagesProfile(ShapeProfile):
+    name = "stages"
+    params = {"stages": [{"duration": 120, "users": 100, "spawn_rate": 100}]}
+
+    def users_at(self, run_time):
+        for stage in self.stages:
+            if run_time < stage["duration"]:
+                return stage["users"], stage["spawn_rate"]
+        return None
+
+
+class StairsProfile(ShapeProfile):
+    name = "stairs"
+    params = {
+        "start_users": 10,
+        "step_users": 10,
+        "step_duration": 60,
+        "steps": 10,
+        "spawn_rate": 10.0,
+        "hold": 0,
+    }
+
+    def users_at(self, run_time):
+        step = int(run_time // self.step_duration)
+        if step >= self.steps:
+            if run_time >= self.steps * self.step_duration + self.hold:
+                return None
+            step = self.steps - 1
+        return self.start_users + step * self.step_users, self.spawn_rate
+
+
+class SpikeProfile(ShapeProfile):
+    name = "spike"
+    params = {
+        "base_users": 20,
+        "spike_users": 500,
+        "spike_at": 120,
+        "spike_duration": 60,
+        "duration": 600,
+        "spawn_rate": 100.0,
+    }
+
+    def users_at(self, run_time):
+        if run_time >= self.duration:
+            return None
+        if self.spike_at <= run_time < self.spike_at + self.spike_duration:
+            return self.spike_users, self.spawn_rate
+        return self.base_users, self.spawn_rate
+
+
+class SoakProfile(ShapeProfile):
+    name = "soak"
+    params = {"users": 100, "ramp_time": 300, "duration": 24 * 3600, "spawn_rate": 1.0}
+
+    def users_at(self, run_time):
+        if run_time >= self.duration:
+            return None
+        if run_time < self.ramp_time:
+            # Climb linearly so autoscaling is not hit with a step
+            return max(1, int(self.users * run_time / self.ramp_time)), self.spawn_rate
+        return self.users, self.spawn_rate
+
+
+class DailyCycleProfile(ShapeProfile):
+    """Sinusoidal day: quietest at the start of the period, busiest half way through"""
+
+    name = "daily"
+    params = {
+        "min_users": 10,
+        "max_users": 300,
+        "period": 24 * 3600,
+        "duration": 24 * 3600,
+        "spawn_rate": 10.0,
+    }
+
+    def users_at(self, run_time):
+        if run_time >= self.duration:
+            return None
+        phase = 2 * math.pi * run_time / self.period
+        level = (1 - math.cos(phase)) / 2
+        return int(round(self.min_users + (self.max_users - self.min_users) * level)), self.spawn_rate
+
+
+class ClassChangeProfile(ShapeProfile):
+    """Rush around every wall-clock hour (period boundary), base load otherwise"""
+
+    name = "class-change"
+    params = {
+        "base_users": 20,
+        "peak_users": 400,
+        "rush_before": 120,
+        "rush_after": 300,
+        "period": 3600,
+        "duration": 4 * 3600,
+        "spawn_rate": 200.0,
+    }
+
+    def users_at(self, run_time):
+        if run_time >= self.duration:
+            return None
+        into_period = time.time() % self.period
+        if into_period < self.rush_after or into_period >= self.period - self.rush_before:
+            return self.peak_users, self.spawn_rate
+        return self.base_users, self.spawn_rate
+
+
+PROFILES = {
+    profile.name: profile
+    for profile in (
+        StagesProfile,
+        StairsProfile,
+        SpikeProfile,
+        SoakProfile,
+        DailyCycleProfile,
+        ClassChangeProfile,
+    )
+}
+
+
+def parse_shape_params(text):
+    """Parse "key=value,key=value" into a dict of strings"""
+    params = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Shape parameter '{item}' must look like key=value")
+        params[key.strip()] = value.strip()
+    return params
+
+
+def build_profile(name, params=None):
+    if name not in PROFILES:
+        raise ValueError(f"Unknown shape '{name}', choose one of: {', '.join(PROFILES)}")
+    return PROFILES[name](**dict(params or {}))
+
+
+def load_profile(path):
+    """Build a profile from a JSON file: {"shape": name, "params": {...}} or {"stages": [...]}"""
+    with open(path) as f:
+        config = json.load(f)
+    if "stages" in config:
+        return build_profile("stages", {"stages": config["stages"]})
+    return build_profile(config["shape"], config.get("params", {}))
+
+
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument("--shape", type=str, default="", help=f"Load shape: {', '.join(PROFILES)}")
+    parser.add_argument("--shape-params", type=str, default="", help="Shape parameters as key=value,key=value")
+    parser.add_argument("--shape-config", type=str, default="", help="JSON file describing the load shape")
+
+
+class ConfiguredShape(LoadTestShape):
+    """Shape that delegates to the profile chosen with --shape or --shape-config.
+
+    Subclasses may set default_shape and default_params to change what runs
+    when neither option is given.
+    """
+
+    default_shape = ""
+    default_params = {}
+    use_common_options = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profile = None
+
+    def _resolve(self):
+        options = self.runner.environment.parsed_options
+        config = getattr(options, "shape_config", "")
+        name = getattr(options, "shape", "")
+        if config:
+            return load_profile(config)
+        if name:
+            return build_profile(name, parse_shape_params(getattr(options, "shape_params", "")))
+        if self.default_shape:
+            return build_profile(self.default_shape, self.default_params)
+        return None
+
+    def tick(self):
+        if self.profile is None:
+            self.profile = self._resolve() or False
+        run_time = self.get_run_time()
+        if self.profile:
+            return self.profile.users_at(run_time)
+
+        # No shape requested: behave like a plain -u/-r/-t run
+        options = self.runner.environment.parsed_options
+        if options.run_time and run_time >= options.run_time:
+            return None
+        return options.num_users or 1, options.spawn_rate or 1
@@ -2,16 +2,47 @@
 import random
 import json
 from datetime import datetime, timedelta
-from locust import HttpUser, task, between
+from locust import HttpUser, task, between, events
 import base64
 import logging
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+import async_logging
+import availability_grid
+import bounded
+import fixture_cache
+import harness_counters
+import payload_pool
+import request_meta
+import session_manager
+
+# Per-booking and per-user lines are written in batches off the hot path, at most 5/s each
+logger = async_logging.install(logging.getLogger(__name__), per_type_rate=5)
 
 # Initialize with default space IDs - these should match your DynamoDB
 KNOWN_SPACE_IDS = ['TEST-100', 'TEST-101', 'TEST-102', 'TEST-103', 'TEST-104']
-CREATED_USER_IDS = []
+# A sample of the users created, capped so long soaks don't grow the generator
+CREATED_USER_IDS = bounded.Reservoir(1000, name="created_user_ids")
+# Session expiry per user, shared by every user in this process
+sessions = session_manager.SessionManager()
+# Slots this process has booked or been refused, for --grid-bookings
+grid = availability_grid.AvailabilityGrid(open_hour=8, close_hour=22)
+
+
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument(
+        '--grid-bookings',
+        action='store_true',
+        default=False,
+        help='Book only windows the availability grid knows are free, instead of random hours that mostly CONFLICT',
+    )
+    parser.add_argument(
+        '--grid-days',
+        type=int,
+        default=14,
+        help='Dates from tomorrow that --grid-bookings spreads over; once they are full it moves on to the next ones',
+    )
+
 
 class BookingUser(HttpUser):
     """Simulates a user making bookings"""
@@ -24,11 +55,14 @@ class BookingUser(HttpUser):
         self.username = f'locust{self.user_index}'
         self.password = 'testpass123'
         self.user_id = None
+        self._pool = None
+        self._generator = None
+        self._grid_offset = 0
         
         # Create the user
         self.create_user()
         
-        # Login if user was created
+        # Creating a user starts its session; login() only renews it when due
         if self.user_id:
             self.login()
     
@@ -45,8 +79,9 @@ class BookingUser(HttpUser):
             if response.status_code == 201:
                 self.user_id = response.json()
                 CREATED_USER_IDS.append(self.user_id)
+                sessions.created(self.username, self.user_id)
                 response.success()
-                logger.info(f"Created user {self.username} with ID {self.user_id}")
+                logger.info("Created user %s with ID %s", self.username, self.user_id, extra={"kind": "user_created"})
             else:
                 # Failed to create, try to use existing user
                 response.failure(f"Failed to create user: {response.status_code}")
@@ -54,22 +89,61 @@ class BookingUser(HttpUser):
                 self.user_id = self.user_index
     
     def login(self):
-        """Login to establish session"""
+        """Make sure the session is valid, logging in (jittered, coalesced) when due"""
         if not self.user_id:
-            return
-            
-        with self.client.post(f'/user/{self.user_id}',
-            json={
-                'username': self.username,
-                'userPassword': self.password
-            },
-            catch_response=True,
-            name='/user - login'
-        ) as response:
-            if response.status_code == 200:
-                response.success()
-            else:
-                response.failure(f"Login failed: {response.status_code}")
+            return False
+        return sessions.ensure(self.client, self.username, self.password, self.user_id)
+    
+    def booking_pool(self):
+        """Pre-serialized booking bodies for the current user ID"""
+        if self._pool is None or self._pool_user_id != self.user_id:
+            self._pool = payload_pool.PayloadPool(self._booking_payloads, size=256)
+            self._pool_user_id = self.user_id
+        return self._pool
+    
+    def _booking_payloads(self, day):
+        """Every space/start/duration/occupants combination for tomorrow"""
+        tomorrow = (day + timedelta(days=1)).strftime('%Y-%m-%d')
+        for space_id in KNOWN_SPACE_IDS:
+            for start_hour in range(9, 18):
+                for duration in (1, 2):
+                    for occupants in range(2, 11):
+                        yield {
+                            'spaceID': space_id,
+                            'date': tomorrow,
+                            'userID': self.user_id,
+                            'occupants': occupants,
+                            'startTime': f'2000-01-01T{start_hour:02d}:00:00Z',
+                            'endTime': f'2000-01-01T{start_hour+duration:02d}:00:00Z'
+                        }
+    
+    def grid_dates(self):
+        """The --grid-days dates bookings currently go to, starting tomorrow plus the offset rolled over so far"""
+        first = datetime.now() + timedelta(days=1 + self._grid_offset)
+        days = max(1, self.environment.parsed_options.grid_days)
+        return [(first + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+    
+    def booking_generator(self):
+        """Free-window bookings for the current user ID and the grid dates"""
+        dates = self.grid_dates()
+        if self._generator is None or self._generator.user_id != self.user_id or self._generator.dates != dates:
+            self._generator = availability_grid.BookingGenerator(
+                grid, KNOWN_SPACE_IDS, dates, self.user_id, durations=(60, 120), occupants=(2, 10))
+        return self._generator
+    
+    def next_grid_booking(self):
+        """(body, slot) for a free window, refilling and then rolling on to later dates when full"""
+        generator = self.booking_generator()
+        item = generator.next()
+        if item is None:
+            # Windows released or cancelled since the spaces were dropped
+            generator.refill()
+            item = generator.next()
+        if item is None:
+            self._grid_offset += len(generator.dates)
+            harness_counters.inc("harness_grid_rollovers_total")
+            item = self.booking_generator().next()
+        return item
     
     @task(20)  # High weight - main task
     def create_booking(self):
@@ -77,57 +151,57 @@ class BookingUser(HttpUser):
         if not self.user_id:
             self.create_user()  # Try to create user again
             
-        if not self.user_id:
+        if not self.user_id or not self.login():
             return
         
-        # Pick a random space from our known IDs
-        space_id = random.choice(KNOWN_SPACE_IDS)
-        
-        # Generate booking for tomorrow
-        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-        start_hour = random.randint(9, 17)
-        duration = random.choice([1, 2])
-        
-        booking_data = {
-            'spaceID': space_id,
-            'date': tomorrow,
-            'userID': self.user_id,
-            'occupants': random.randint(2, 10),
-            'startTime': f'2000-01-01T{start_hour:02d}:00:00Z',
-            'endTime': f'2000-01-01T{start_hour+duration:02d}:00:00Z'
-        }
-        
-        # Create auth header
-        auth_string = base64.b64encode(f'{self.username}:{self.user_id}'.encode()).decode()
+        slot = None
+        if self.environment.parsed_options.grid_bookings:
+            item = self.next_grid_booking()
+            if item is None:
+                # Even fresh dates had no window (no spaces known); count the skipped task
+                harness_counters.inc("harness_grid_skipped_total")
+                return
+            body, slot = item
+        else:
+            body, _ = self.booking_pool().pick()
         
         with self.client.post('/booking',
-            json=booking_data,
-            headers={'Authorization': f'Basic {auth_string}'},
+            data=body,
+            headers=payload_pool.auth_headers(self.username, self.user_id),
             catch_response=True,
             name='/booking - create'
         ) as response:
             if response.status_code == 201:
                 response.success()
                 booking_id = response.json()
-                logger.info(f"✓ Booking {booking_id} created")
+                if slot:
+                    grid.confirm(booking_id, *slot)
+                logger.info("✓ Booking %s created", booking_id, extra={"kind": "booking_created"})
             elif response.status_code == 400:
-                try:
-                    error = response.json()
-                    err_code = error.get('ErrCode', '')
-                    
-                    if err_code == 'CONFLICT':
-                        # Conflicts are expected with concurrent bookings
-                        response.success()
-                    elif err_code in ['SESSION EXPIRED', 'SESSION ERROR']:
-                        response.failure("Session expired")
-                        self.login()  # Re-login and retry
-                    elif err_code == 'INVALID SPACE':
-                        response.failure(f"Invalid space: {space_id}")
-                    else:
-                        response.failure(f"{err_code}: {error.get('Message', '')}")
-                except:
+                # '' for a body that is not the service's JSON (e.g. an ALB or proxy page)
+                err_code = request_meta.err_code(response)
+                if slot and err_code == 'CONFLICT':
+                    # Someone else holds the window: keep it marked taken
+                    grid.conflict(*slot)
+                elif slot:
+                    grid.release(*slot)
+                
+                if err_code == 'CONFLICT':
+                    # Conflicts are expected with concurrent bookings
+                    response.success()
+                elif err_code in session_manager.SESSION_ERR_CODES:
+                    response.failure("Session expired")
+                    # The next task logs in again
+                    sessions.expired(self.username, self.user_id)
+                elif err_code == 'INVALID SPACE':
+                    response.failure("Invalid space")
+                elif err_code:
+                    response.failure(f"{err_code}: {response.json().get('Message', '')}")
+                else:
                     response.failure(f"Bad request: {response.text[:100]}")
             else:
+                if slot:
+                    grid.release(*slot)
                 response.failure(f"Unexpected status {response.status_code}")
     
     @task(20)
@@ -164,6 +238,7 @@ class BookingUser(HttpUser):
             elif response.status_code == 400:
                 # Session expired - this is normal
                 response.success()
+                sessions.expired(self.username, self.user_id)
                 self.login()  # Re-login
             elif response.status_code == 404:
                 # User not found
@@ -183,6 +258,12 @@ class SetupUser(HttpUser):
     
     def setup_spaces(self):
         """Create the test spaces if they don't exist"""
+        cache = fixture_cache.FixtureCache(self.host)
+        if set(KNOWN_SPACE_IDS) <= set(cache.revalidate('availability', self.space_exists)):
+            # An earlier run on this host created them
+            cache.close()
+            return
+        
         # Create admin
         with self.client.post('/user',
             json={'username': 'admin', 'userPassword': 'adminpass123'},
@@ -217,6 +298,17 @@ class SetupUser(HttpUser):
                     ) as space_resp:
                         if space_resp.status_code in [201, 400]:
                             space_resp.success()  # 400 means it already exists
+                
+                cache.add_user('availability', 'admin', 'adminpass123', admin_id, admin=True)
+                cache.add_spaces('availability', KNOWN_SPACE_IDS)
+                cache.save()
+        cache.close()
+    
+    def space_exists(self, entity):
+        """Fixture check: the cached space still answers"""
+        with self.client.get(f'/space/{entity.name}', name='/space - fixture check', catch_response=True) as response:
+            response.success()
+            return response.status_code == 200
     
     @task
     def idle(self):
@@ -1,8 +1,9 @@
-import random
 import datetime
 
 from locust import FastHttpUser, task, between
 
+import payload_pool
+
 
 def today_date_str():
     return datetime.date.today().strftime("%Y-%m-%d")
@@ -19,26 +20,30 @@ class BookingConcurrencyUser(FastHttpUser):
 
     def on_start(self):
         self.date = today_date_str()
+        self.headers = payload_pool.auth_headers("admin", "1")
+        self.booking_pool = payload_pool.shared_pool("concurrency", self._booking_payloads)
+
+    def _booking_payloads(self, day):
+        # Every user races for the same space and slot; only occupants vary.
+        for occupants in range(1, 5):
+            yield {
+                "spaceID": "SPACE-101",
+                "date": day.strftime("%Y-%m-%d"),
+                "userID": 1,
+                "occupants": occupants,
+                "startTime": iso_time(9, 0),
+                "endTime": iso_time(11, 0),
+            }
 
     @task
     def create_booking(self):
-        start_time = iso_time(9, 0)
-        end_time = iso_time(11, 0)
-
-        payload = {
-            "spaceID": "SPACE-101",
-            "date": self.date,
-            "userID": 1,
-            "occupants": random.randint(1, 4),
-            "startTime": start_time,
-            "endTime": end_time,
-        }
+        body, _ = self.booking_pool.pick()
 
         # This measures end-to-end booking completion time as seen by the client
         with self.client.post(
             "/booking",
-            json=payload,
-            auth=("admin", "1"),
+            data=body,
+            headers=self.headers,
             name="POST /booking (concurrency)",
             catch_response=True,
         ) as response:
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+locust_flash_crowd.py - Synchronized flash-crowd bookings across users and workers
+
+Every round, --flash-users Locust users (summed over all workers) pre-build the
+same booking request, warm their connection and wait on a distributed barrier.
+Once everyone has arrived the master picks a release time --flash-lead ms in
+the future and broadcasts it; each user sleeps until just before it, spins to
+the exact instant and fires. Worker clocks must be NTP synced, and users in one
+worker send back to back, so spread contenders over more workers (e.g.
+docker-compose --scale worker=N) to keep the send window under a millisecond.
+
+    locust -f locust_flash_crowd.py --headless -u 200 -r 50 \
+        --flash-users 200 --flash-rounds 20 --flash-spaces SPACE-101,SPACE-102 \
+        --host http://<alb_dns_name>
+
+The report printed on exit gives the release-to-response latency distribution,
+the spread of actual send times per round and winner/loser counts per space.
+"""
+
+import base64
+import datetime
+import json
+import time
+
+import gevent
+from gevent.event import AsyncResult
+from locust import FastHttpUser, constant, events, task
+from locust.exception import StopUser
+from locust.runners import MasterRunner, WorkerRunner
+
+
+# Leave the last stretch before release to a busy wait so the send lands on time
+SPIN_WINDOW = 0.002
+OPEN_HOUR = 8
+CLOSE_HOUR = 21
+
+_barrier = None
+_coordinator = None
+_results = []
+_pending_results = []
+
+
+def round_slot(round_no):
+    """Return (date, start, end) for a round: one hour slot per round, rolling to later days"""
+    day, hour = divmod(round_no, CLOSE_HOUR - OPEN_HOUR)
+    date = (datetime.date.today() + datetime.timedelta(days=day)).strftime("%Y-%m-%d")
+    start = OPEN_HOUR + hour
+    return date, f"{date}T{start:02d}:00:00Z", f"{date}T{start + 1:02d}:00:00Z"
+
+
+class FlashCoordinator:
+    """Counts arrivals per round (master or local runner) and issues release times"""
+
+    def __init__(self, environment, size, lead, timeout):
+        self.environment = environment
+        self.size = size
+        self.lead = lead
+        self.timeout = timeout
+        self.arrivals = {}
+        self.first_arrival = {}
+        self.released = {}
+        self._watchdog = gevent.spawn(self._release_stragglers)
+
+    def arrive(self, round_no, source, count):
+        if round_no in self.released:
+            self._broadcast(round_no)
+            return
+        self.first_arrival.setdefault(round_no, time.time())
+        self.arrivals.setdefault(round_no, {})[source] = count
+        if sum(self.arrivals[round_no].values()) >= self.size:
+            self._release(round_no)
+
+    def _release(self, round_no):
+        self.released[round_no] = time.time() + self.lead
+        self._broadcast(round_no)
+
+    def _broadcast(self, round_no):
+        data = {"round": round_no, "release_at": self.released[round_no]}
+        if isinstance(self.environment.runner, MasterRunner):
+            self.environment.runner.send_message("flash_release", data)
+        else:
+            _barrier.on_release(data)
+
+    def _release_stragglers(self):
+        # Release partially filled rounds so a missing user cannot stall the test
+        while True:
+            gevent.sleep(1)
+            now = time.time()
+            for round_no, first in list(self.first_arrival.items()):
+                if round_no not in self.released and now - first > self.timeout:
+                    self._release(round_no)
+
+    def stop(self):
+        self._watchdog.kill(block=False)
+
+
+class FlashBarrier:
+    """Per-process barrier: users block in wait() until their round is released"""
+
+    def __init__(self, environment):
+        self.environment = environment
+        self.ready = {}
+        self.releases = {}
+
+    def _result(self, round_no):
+        if round_no not in self.releases:
+            self.releases[round_no] = AsyncResult()
+        return self.releases[round_no]
+
+    def wait(self, round_no):
+        self.ready[round_no] = self.ready.get(round_no, 0) + 1
+        result = self._result(round_no)
+        runner = self.environment.runner
+        if isinstance(runner, WorkerRunner):
+            runner.send_message("flash_ready", {"round": round_no, "count": self.ready[round_no]})
+        else:
+            _coordinator.arrive(round_no, "local", self.ready[round_no])
+        return result.get()
+
+    def on_release(self, data):
+        self._result(data["round"]).set(data["release_at"])
+
+
+def _record(result):
+    if isinstance(_barrier.environment.runner, WorkerRunner):
+        _pending_results.append(result)
+    else:
+        _results.append(result)
+
+
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument("--flash-users", type=int, default=100, help="Users released together in each round")
+    parser.add_argument("--flash-rounds", type=int, default=10, help="Number of flash-crowd rounds")
+    parser.add_argument("--flash-spaces", type=str, default="SPACE-101", help="Comma separated spaces, one per round in turn")
+    parser.add_argument("--flash-lead", type=float, default=500, help="Milliseconds between barrier fill and release")
+    parser.add_argument("--flash-timeout", type=float, default=30, help="Seconds before a partially filled round is released")
+    parser.add_argument("--flash-user-id", type=int, default=1, help="User ID the bookings are made for")
+
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    global _barrier, _coordinator
+    options = environment.parsed_options
+    runner = environment.runner
+    _barrier = FlashBarrier(environment)
+
+    if isinstance(runner, WorkerRunner):
+        runner.register_message("flash_release", lambda msg, **kw: _barrier.on_release(msg.data))
+        return
+
+    _coordinator = FlashCoordinator(
+        environment, options.flash_users, options.flash_lead / 1000, options.flash_timeout
+    )
+    if isinstance(runner, MasterRunner):
+        runner.register_message(
+            "flash_ready",
+            lambda msg, **kw: _coordinator.arrive(msg.data["round"], msg.node_id, msg.data["count"]),
+        )
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    data["flash_results"] = list(_pending_results)
+    _pending_results.clear()
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    _results.extend(data.get("flash_results", []))
+
+
+class FlashCrowdUser(FastHttpUser):
+    wait_time = constant(0)
+
+    def on_start(self):
+        options = self.environment.parsed_options
+        self.round = 0
+        self.rounds = options.flash_rounds
+        self.spaces = [s.strip() for s in options.flash_spaces.split(",") if s.strip()]
+        self.user_id = options.flash_user_id
+        token = base64.b64encode(f"admin:{self.user_id}".encode()).decode()
+        self.headers = {"Content-Type": "application/json", "Authorization": f"Basic {token}"}
+
+    def _build(self, round_no):
+        date, start_time, end_time = round_slot(round_no)
+        space_id = self.spaces[round_no % len(self.spaces)]
+        body = json.dumps({
+            "spaceID": space_id,
+            "date": date,
+            "userID": self.user_id,
+            "occupants": 1,
+            "startTime": start_time,
+            "endTime": end_time,
+        })
+        return space_id, body
+
+    @task
+    def flash_booking(self):
+        if self.round >= self.rounds:
+            raise StopUser()
+        round_no = self.round
+        self.round += 1
+        space_id, body = self._build(round_no)
+
+        # Open the connection now so the release only pays for the request itself
+        self.client.get("/booking/health", name="GET /booking/health (warm)")
+
+        release_at = _barrier.wait(round_no)
+        now = time.time()
+        if now > release_at + 0.05:
+            # Arrived after this round fired; join the next one instead
+            return
+        if release_at - now > SPIN_WINDOW:
+            gevent.sleep(release_at - now - SPIN_WINDOW)
+        while time.time() < release_at:
+            pass
+
+        sent_at = time.time()
+        with self.client.post(
+            "/booking",
+            data=body,
+            headers=self.headers,
+            name="POST /booking (flash)",
+            catch_response=True,
+        ) as response:
+            done_at = time.time()
+            err_code = ""
+            if response.status_code == 400:
+                try:
+                    err_code = response.json().get("ErrCode", "")
+                except Exception:
+                    pass
+            if 200 <= response.status_code < 300 or err_code == "CONFLICT":
+                response.success()
+            else:
+                response.failure(f"Status code {response.status_code} {err_code}".strip())
+
+        _record({
+            "round": round_no,
+            "space": space_id,
+            "status": response.status_code,
+            "err_code": err_code,
+            "send_skew_ms": (sent_at - release_at) * 1000,
+            "latency_ms": (done_at - release_at) * 1000,
+        })
+
+
+def _percentiles(values, pcts=(50, 90, 99, 100)):
+    ordered = sorted(values)
+    if not ordered:
+        return [0.0 for _ in pcts]
+    return [ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] for p in pcts]
+
+
+def print_report(results):
+    print("\n" + "=" * 60)
+    print("FLASH CROWD REPORT")
+    print("=" * 60)
+    if not results:
+        print("No flash-crowd requests were recorded")
+        return
+
+    p50, p90, p99, worst = _percentiles([r["latency_ms"] for r in results])
+    print(f"Requests: {len(results)} in {len({r['round'] for r in results})} rounds")
+    print(f"Release-to-response (ms): p50 {p50:.1f}  p90 {p90:.1f}  p99 {p99:.1f}  max {worst:.1f}")
+
+    windows = {}
+    for r in results:
+        lo, hi = windows.get(r["round"], (r["send_skew_ms"], r["send_skew_ms"]))
+        windows[r["round"]] = (min(lo, r["send_skew_ms"]), max(hi, r["send_skew_ms"]))
+    w50, w90, w99, wmax = _percentiles([hi - lo for lo, hi in windows.values()])
+    print(f"Send window per round, first to last (ms): p50 {w50:.3f}  p90 {w90:.3f}  p99 {w99:.3f}  max {wmax:.3f}")
+
+    per_space = {}
+    for r in results:
+        space = per_space.setdefault(r["space"], {"rounds": {}, "winners": 0, "losers": 0, "errors": 0})
+        won = 200 <= r["status"] < 300
+        space["rounds"][r["round"]] = space["rounds"].get(r["round"], 0) + won
+        if won:
+            space["winners"] += 1
+        elif r["err_code"] == "CONFLICT":
+            space["losers"] += 1
+        else:
+            space["errors"] += 1
+
+    print("\nspace\trounds\twinners\tlosers\terrors\tdouble-booked rounds\tno-winner rounds")
+    for space_id, s in sorted(per_space.items()):
+        doubled = sum(1 for wins in s["rounds"].values() if wins > 1)
+        empty = sum(1 for wins in s["rounds"].values() if wins == 0)
+        print(f"{space_id}\t{len(s['rounds'])}\t{s['winners']}\t{s['losers']}\t{s['errors']}\t{doubled}\t{empty}")
+    print("=" * 60)
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if _coordinator is not None:
+        _coordinator.stop()
+    if not isinstance(environment.runner, WorkerRunner):
+        print_report(_results)
@@ -2,11 +2,25 @@ import random
 import datetime
 import threading
 
-from locust import FastHttpUser, task, between, LoadTestShape
+from locust import FastHttpUser, task, between, events
+
+import bounded
+import fixture_cache
+import load_shapes
+import payload_pool
+import request_meta
+import session_manager
+import slot_allocator
 
 
 booking_lock = threading.Lock()
+# Per date, capped: the oldest bookings are forgotten first, deleted ones right away
 known_bookings = {}
+KNOWN_BOOKINGS_PER_DATE = 10000
+allocator = slot_allocator.SlotAllocator()
+# Every Locust user shares the admin identity, so they share its session (and its logins)
+sessions = session_manager.SessionManager()
+USER_PASSWORD = "password"
 
 
 user_init_lock = threading.Lock()
@@ -15,6 +29,17 @@ space_init_lock = threading.Lock()
 initialized_space = {"space_ids": []}
 
 
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument(
+        "--conflict-rate",
+        type=float,
+        default=-1,
+        help="Fraction of bookings that deliberately overlap an earlier one (e.g. 0.05). "
+        "Other bookings use slots known to be free. Off (random slots) when negative.",
+    )
+
+
 def today_date_str():
     return datetime.date.today().strftime("%Y-%m-%d")
 
@@ -37,11 +62,17 @@ class BookingUser(FastHttpUser):
         # We do this once and share the same user ID across all Locust users to
         # avoid overwhelming the user-service with user creation.
         with user_init_lock:
+            # Whoever loads the cache also records the run's booking date in it
+            dirty = False
+            if initialized_user["user_id"] is None and not initialized_space["space_ids"]:
+                self._load_fixtures()
+                dirty = True
+
             if initialized_user["user_id"] is None:
                 # Create user once
                 create_payload = {
                     "username": "admin",
-                    "userPassword": "password",
+                    "userPassword": USER_PASSWORD,
                 }
 
                 with self.client.post(
@@ -62,11 +93,14 @@ class BookingUser(FastHttpUser):
                         )
                         return
                 initialized_user["user_id"] = created_user_id
+                sessions.created("admin", created_user_id)
+                dirty = True
 
             # Create multiple spaces once via the availability service.
             # This helps distribute bookings across different rooms and reduce conflicts.
-            if not initialized_space["space_ids"] and initialized_user["user_id"] is not None:
-                for room in range(101, 301):  # create 200 rooms: 101-300
+            # Cached spaces count towards the 200; only the missing rooms are created.
+            if len(initialized_space["space_ids"]) < 200 and initialized_user["user_id"] is not None:
+                for room in range(101 + len(initialized_space["space_ids"]), 301):  # rooms 101-300
                     space_payload = {
                         "roomCode": room,
                         "buildingCode": f"KRIK-{self.date}-{room}-{random.randint(1, 1000000)}",
@@ -85,22 +119,88 @@ class BookingUser(FastHttpUser):
                         if 200 <= resp.status_code < 300:
                             space_id = resp.text.strip().strip('"')
                             initialized_space["space_ids"].append(space_id)
+                            dirty = True
                         else:
                             resp.failure(
                                 "Failed to create space: status=%s body=%s" % (resp.status_code, resp.text)
                             )
                             return
 
+            if dirty:
+                self._save_fixtures()
+
         # Each Locust user reuses the same logical application user.
         self.user_id = initialized_user["user_id"]
         # BasicAuth: username is arbitrary here, password is interpreted as userId
         self.auth = ("admin", str(self.user_id))
         # Share the same list of spaces across all Locust users
         self.space_ids = list(initialized_space["space_ids"])
+        # Serialize every booking variant once per process; tasks only pick bytes.
+        self.headers = payload_pool.auth_headers(*self.auth)
+        self.booking_pool = payload_pool.shared_pool(
+            ("ramp", self.user_id, len(self.space_ids)), self._booking_payloads
+        )
+
+    def _load_fixtures(self):
+        # Reuse the admin and spaces an earlier run created on this host; the
+        # login the user needs anyway checks it, a few GETs check the spaces.
+        cache = fixture_cache.FixtureCache(self.host)
+        admin = cache.user("ramp", "admin")
+        if admin is not None:
+            if sessions.login(self.client, "admin", USER_PASSWORD, admin.user_id):
+                initialized_user["user_id"] = admin.user_id
+            else:
+                cache.mark(admin, ok=False)
+
+        def space_exists(entity):
+            with self.client.get(
+                f"/space/{entity.name}", name="GET /space/{id} (fixture check)", catch_response=True
+            ) as resp:
+                resp.success()
+                return resp.status_code == 200
+
+        # Spaces an earlier run already booked today would start this run with
+        # bookings on its date, skewing conflicts and the --conflict-rate mix
+        booked = cache.booked_on("ramp", self.date)
+        initialized_space["space_ids"] = [
+            space_id for space_id in cache.revalidate("ramp", space_exists) if space_id not in booked
+        ][:200]
+        cache.close()
+
+    def _save_fixtures(self):
+        cache = fixture_cache.FixtureCache(self.host)
+        admin = cache.user("ramp", "admin")
+        if admin is None or admin.user_id != initialized_user["user_id"]:
+            cache.add_user("ramp", "admin", USER_PASSWORD, initialized_user["user_id"], admin=True)
+        cache.add_spaces("ramp", initialized_space["space_ids"], booked_on=self.date)
+        cache.save()
+        cache.close()
+
+    def _booking_payloads(self, day):
+        # Random 1- or 2-hour windows between 8:00 and 21:00 UTC across all spaces,
+        # which keeps the chance of conflicts low.
+        date = day.strftime("%Y-%m-%d")
+        for space_id in self.space_ids:
+            for start_hour in range(8, 21):
+                for duration_hours in (1, 2):
+                    end_hour = min(start_hour + duration_hours, 22)
+                    for occupants in range(1, 5):
+                        yield {
+                            "spaceID": space_id,
+                            "date": date,
+                            "userID": self.user_id,
+                            "occupants": occupants,
+                            "startTime": iso_time(start_hour, 0),
+                            "endTime": iso_time(end_hour, 0),
+                        }
 
     def _add_booking(self, booking_id):
         with booking_lock:
-            bookings_for_date = known_bookings.setdefault(self.date, set())
+            bookings_for_date = known_bookings.get(self.date)
+            if bookings_for_date is None:
+                bookings_for_date = known_bookings[self.date] = bounded.BoundedSet(
+                    KNOWN_BOOKINGS_PER_DATE, name="known_bookings"
+                )
             bookings_for_date.add(booking_id)
 
     def _get_random_booking(self):
@@ -108,7 +208,7 @@ class BookingUser(FastHttpUser):
             bookings_for_date = known_bookings.get(self.date)
             if not bookings_for_date:
                 return None
-            return random.choice(list(bookings_for_date))
+            return bookings_for_date.choice()
 
     def _remove_booking(self, booking_id):
         with booking_lock:
@@ -123,42 +223,86 @@ class BookingUser(FastHttpUser):
             return
         if not self.space_ids:
             return
+        if not sessions.ensure(self.client, "admin", USER_PASSWORD, self.user_id):
+            return
+
+        conflict_rate = self.environment.parsed_options.conflict_rate
+        if conflict_rate >= 0:
+            self._create_targeted_booking(conflict_rate)
+            return
 
-        # Randomize time slots to further reduce the chance of conflicts.
-        # Choose a random 1- or 2-hour window between 8:00 and 21:00 UTC.
-        start_hour = random.randint(8, 20)
-        duration_hours = random.choice([1, 2])
-        end_hour = min(start_hour + duration_hours, 22)
+        body, payload = self.booking_pool.pick()
+        self.date = payload["date"]
 
-        start_time = iso_time(start_hour, 0)
-        end_time = iso_time(end_hour, 0)
+        with self.client.post(
+            "/booking",
+            data=body,
+            headers=self.headers,
+            name="POST /booking",
+            catch_response=True,
+        ) as response:
+            if 200 <= response.status_code < 300:
+                try:
+                    booking_id = int(response.text)
+                    self._add_booking(booking_id)
+                except ValueError:
+                    response.failure("Unexpected booking ID format: %s" % response.text)
+            else:
+                # Keyed by ErrCode rather than the body so the failure table doesn't fragment
+                err_code = request_meta.err_code(response)
+                if err_code in session_manager.SESSION_ERR_CODES:
+                    sessions.expired("admin", self.user_id)
+                response.failure("Status code %s %s" % (response.status_code, err_code or "-"))
+
+    def _create_targeted_booking(self, conflict_rate):
+        # Free and conflicting attempts are reported under separate names so the
+        # success path and the CONFLICT rejection path can be compared.
+        slot = allocator.choose(self.space_ids, self.date, conflict_rate)
+        if slot is None:
+            return
+        kind, space_id, start, end = slot
 
         payload = {
-            "spaceID": random.choice(self.space_ids),
+            "spaceID": space_id,
             "date": self.date,
             "userID": self.user_id,
             "occupants": random.randint(1, 4),
-            "startTime": start_time,
-            "endTime": end_time,
+            "startTime": slot_allocator.minute_to_iso(self.date, start),
+            "endTime": slot_allocator.minute_to_iso(self.date, end),
         }
 
         with self.client.post(
             "/booking",
             json=payload,
-            auth=self.auth,
-            name="POST /booking",
+            headers=self.headers,
+            name=f"POST /booking ({kind})",
             catch_response=True,
         ) as response:
             if 200 <= response.status_code < 300:
                 try:
                     booking_id = int(response.text)
-                    self._add_booking(booking_id)
                 except ValueError:
                     response.failure("Unexpected booking ID format: %s" % response.text)
+                    return
+                self._add_booking(booking_id)
+                if kind == "free":
+                    allocator.confirm(space_id, self.date, start, end, booking_id)
+                else:
+                    response.failure("Overlapping booking %s was accepted" % booking_id)
+                return
+
+            if kind == "free":
+                allocator.release(space_id, self.date, start, end)
+            try:
+                err_code = response.json().get("ErrCode", "")
+            except Exception:
+                err_code = ""
+            if err_code in session_manager.SESSION_ERR_CODES:
+                sessions.expired("admin", self.user_id)
+            if kind == "conflict" and err_code == "CONFLICT":
+                response.success()
             else:
-                response.failure(
-                    "Status code %s body=%s" % (response.status_code, response.text)
-                )
+                response.failure("Status code %s %s" % (response.status_code, err_code or "-"))
 
     @task(3)
     def get_booking(self):
@@ -173,7 +317,7 @@ class BookingUser(FastHttpUser):
         with self.client.get(
             path,
             name="GET /booking/{date}/{id}",
-            auth=self.auth,
+            headers=self.headers,
             catch_response=True,
         ) as response:
             if 200 <= response.status_code < 300:
@@ -197,28 +341,22 @@ class BookingUser(FastHttpUser):
         with self.client.delete(
             path,
             name="DELETE /booking/{date}/{id}",
-            auth=self.auth,
+            headers=self.headers,
             catch_response=True,
         ) as response:
             if 200 <= response.status_code < 300:
                 self._remove_booking(booking_id)
+                allocator.release_booking(booking_id)
             else:
                 response.failure("Status code %s" % response.status_code)
 
 
-class RampUsersShape(LoadTestShape):
-    stages = [
-        {"duration": 120, "users": 100, "spawn_rate": 100},
-      #  {"duration": 120, "users": 1000, "spawn_rate": 15},
-      #  {"duration": 180, "users": 10000, "spawn_rate": 150},
-      #  {"duration": 780, "users": 10000, "spawn_rate": 1},
-    ]
-
-    def tick(self):
-        run_time = self.get_run_time()
-
-        for stage in self.stages:
-            if run_time < stage["duration"]:
-                return stage["users"], stage["spawn_rate"]
-
-        return None
+class RampUsersShape(load_shapes.ConfiguredShape):
+    # Runs these stages unless --shape or --shape-config picks another profile,
+    # e.g. --shape-config shapes/ramp_10k.json for the 1000/10000-user stages.
+    default_shape = "stages"
+    default_params = {
+        "stages": [
+            {"duration": 120, "users": 100, "spawn_rate": 100},
+        ]
+    }
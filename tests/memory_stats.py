@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+memory_stats.py - Generator memory and GC pauses per worker, for soak tests
+
+Add this file to the locustfile list (on the master and every worker).
+Each worker samples its RSS, the time spent in garbage collection and the
+sizes of the bounded.py containers at every stats report and ships the
+sample to the master; a standalone run samples itself on the same period.
+
+    locust -f locust_availability.py,memory_stats.py --headless -t 24h --csv soak ...
+
+The master keeps only the first, latest and peak sample per worker. It
+serves them as JSON at /memory on the web UI, appends every sample to
+<prefix>_memory.csv with --csv (so the growth over the run can be plotted),
+and prints per worker at exit: RSS at start, now and peak, growth per hour,
+full collections and the longest GC pause.
+"""
+
+import csv
+import gc
+import os
+import time
+
+import gevent
+import psutil
+from locust import events
+from locust.runners import WORKER_REPORT_INTERVAL, LocalRunner, WorkerRunner
+
+import bounded
+
+
+FIELDS = ["Timestamp", "Worker", "RSS MB", "GC Pause ms", "Max GC Pause ms", "Full Collections", "Tracked Items"]
+
+_process = psutil.Process(os.getpid())
+_pause = {"started": None, "total": 0.0, "max": 0.0}
+_workers = {}
+_csv = None
+_loop = None
+
+
+def _on_gc(phase, info):
+    if phase == "start":
+        _pause["started"] = time.perf_counter()
+    elif _pause["started"] is not None:
+        took = time.perf_counter() - _pause["started"]
+        _pause["started"] = None
+        _pause["total"] += took
+        _pause["max"] = max(_pause["max"], took)
+
+
+gc.callbacks.append(_on_gc)
+
+
+def sample():
+    """This process's memory and GC since the last sample"""
+    reading = {
+        "time": time.time(),
+        "rss_mb": _process.memory_info().rss / 1e6,
+        "gc_pause_ms": _pause["total"] * 1000,
+        "max_gc_pause_ms": _pause["max"] * 1000,
+        "full_collections": gc.get_stats()[2]["collections"],
+        "tracked": bounded.tracked(),
+    }
+    _pause["total"] = _pause["max"] = 0.0
+    return reading
+
+
+def record(worker, reading):
+    """Keep first/latest/peak for a worker and append the sample to the CSV"""
+    state = _workers.get(worker)
+    if state is None:
+        state = _workers[worker] = {"first": reading, "latest": reading, "peak_mb": reading["rss_mb"],
+                                    "max_gc_pause_ms": 0.0}
+    state["latest"] = reading
+    state["peak_mb"] = max(state["peak_mb"], reading["rss_mb"])
+    state["max_gc_pause_ms"] = max(state["max_gc_pause_ms"], reading["max_gc_pause_ms"])
+    if _csv is not None:
+        _csv[1].writerow([f"{reading['time']:.0f}", worker, f"{reading['rss_mb']:.1f}",
+                          f"{reading['gc_pause_ms']:.1f}", f"{reading['max_gc_pause_ms']:.1f}",
+                          reading["full_collections"], sum(entry[0] for entry in reading["tracked"].values())])
+        _csv[0].flush()
+
+
+def summary():
+    rows = []
+    for worker, state in sorted(_workers.items()):
+        first, latest = state["first"], state["latest"]
+        hours = (latest["time"] - first["time"]) / 3600
+        rows.append({
+            "worker": worker,
+            "start_mb": first["rss_mb"],
+            "rss_mb": latest["rss_mb"],
+            "peak_mb": state["peak_mb"],
+            "growth_mb_per_hour": (latest["rss_mb"] - first["rss_mb"]) / hours if hours > 0 else 0.0,
+            "full_collections": latest["full_collections"] - first["full_collections"],
+            "max_gc_pause_ms": state["max_gc_pause_ms"],
+            "tracked": latest["tracked"],
+        })
+    return rows
+
+
+def _sample_loop():
+    while True:
+        gevent.sleep(WORKER_REPORT_INTERVAL)
+        record("local", sample())
+
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    if environment.web_ui is not None:
+        @environment.web_ui.app.route("/memory")
+        def memory():
+            return {"workers": summary()}
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global _csv, _loop
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    _workers.clear()
+    prefix = getattr(environment.parsed_options, "csv_prefix", None)
+    if prefix and _csv is None:
+        f = open(f"{prefix}_memory.csv", "w", newline="")
+        _csv = (f, csv.writer(f))
+        _csv[1].writerow(FIELDS)
+    # A master's workers report on their own; a standalone run samples itself
+    if isinstance(environment.runner, LocalRunner) and _loop is None:
+        record("local", sample())
+        _loop = gevent.spawn(_sample_loop)
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    global _loop
+    if _loop is not None:
+        _loop.kill(block=False)
+        _loop = None
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    data["memory"] = sample()
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    if "memory" in data:
+        record(client_id, data["memory"])
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    global _csv
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    if _csv is not None:
+        _csv[0].close()
+        print(f"Wrote {_csv[0].name}")
+        _csv = None
+    print("\n=== Generator memory per worker ===")
+    print(f"{'worker':40}\t{'start MB':>9}\t{'RSS MB':>9}\t{'peak MB':>9}\t{'MB/hour':>9}\t"
+          f"{'full GCs':>8}\t{'max pause ms':>12}\ttracked (held/capacity)")
+    for row in summary():
+        tracked = ", ".join(f"{name} {held}/{capacity}" for name, (held, capacity, _) in sorted(row["tracked"].items()))
+        print(f"{row['worker'][:40]:40}\t{row['start_mb']:>9.1f}\t{row['rss_mb']:>9.1f}\t{row['peak_mb']:>9.1f}\t"
+              f"{row['growth_mb_per_hour']:>9.1f}\t{row['full_collections']:>8}\t{row['max_gc_pause_ms']:>12.1f}\t"
+              f"{tracked or '-'}")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+metrics_exporter.py - OpenMetrics endpoint for live harness metrics
+
+Add this file to the locustfile list to expose, while the test runs:
+
+    locust_request_duration_seconds   histogram per request name and method
+    locust_responses_total            counter per name, status and ErrCode
+    harness_*                         custom counters bumped through harness_counters.py
+                                      (e.g. harness_logins_total by reason)
+
+    locust -f locust_availability.py,metrics_exporter.py --metrics-port 9646 ...
+    curl http://localhost:9646/metrics
+
+The same text is served at /metrics on the Locust web UI when it runs.
+In distributed mode the master serves the sum over workers (updated at each
+worker report) and every worker also serves its own numbers on
+--metrics-port + 1 + worker index. Recording goes through harness_counters'
+per-greenlet shards, so users never share a lock or a hot dict entry.
+"""
+
+import gevent
+from gevent.pywsgi import WSGIServer
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+import harness_counters
+from request_meta import err_code, status_code
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+REQUEST_HISTOGRAM = "locust_request_duration_seconds"
+
+_server = None
+_environment = None
+_worker_snapshots = {}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _bound(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def render(snapshot):
+    """Format a harness_counters snapshot as OpenMetrics text"""
+    lines = []
+
+    counters = {}
+    for (name, labels), value in snapshot["counters"].items():
+        counters.setdefault(name[:-6] if name.endswith("_total") else name, []).append((labels, value))
+    for family in sorted(counters):
+        lines.append(f"# TYPE {family} counter")
+        for labels, value in sorted(counters[family]):
+            lines.append(f"{family}_total{_label_text(labels)} {value}")
+
+    histograms = {}
+    for (name, labels), entry in snapshot["histograms"].items():
+        histograms.setdefault(name, []).append((labels, entry))
+    for family in sorted(histograms):
+        lines.append(f"# TYPE {family} histogram")
+        bounds = list(harness_counters.buckets(family)) + [float("inf")]
+        for labels, (counts, total) in sorted(histograms[family]):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"{family}_bucket{_label_text(labels, [('le', _bound(bound))])} {cumulative}")
+            lines.append(f"{family}_count{_label_text(labels)} {cumulative}")
+            lines.append(f"{family}_sum{_label_text(labels)} {total}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def current_snapshot():
+    """This process's numbers, or on the master the sum of the latest worker snapshots"""
+    if _environment is not None and isinstance(_environment.runner, MasterRunner):
+        merged = {"counters": {}, "histograms": {}}
+        for snapshot in list(_worker_snapshots.values()):
+            harness_counters.merge_into(merged, snapshot)
+        return merged
+    return harness_counters.snapshot()
+
+
+def _app(environ, start_response):
+    if environ.get("PATH_INFO", "/") not in ("/", "/metrics"):
+        start_response("404 Not Found", [("Content-Type", "text/plain")])
+        return [b"not found\n"]
+    body = render(current_snapshot()).encode()
+    start_response("200 OK", [("Content-Type", CONTENT_TYPE), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=9646,
+        help="Serve OpenMetrics on this port (workers use port + 1 + worker index; 0 disables)",
+    )
+
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    global _environment, _server
+    _environment = environment
+    port = environment.parsed_options.metrics_port if environment.parsed_options else 0
+
+    if environment.web_ui is not None:
+        @environment.web_ui.app.route("/metrics")
+        def metrics():
+            return render(current_snapshot()), 200, {"Content-Type": CONTENT_TYPE}
+
+    if port:
+        if isinstance(environment.runner, WorkerRunner):
+            port += 1 + environment.runner.worker_index
+        _server = WSGIServer(("", port), _app, log=None)
+        gevent.spawn(_server.serve_forever)
+
+
+@events.request.add_listener
+def on_request(request_type, name, response_time=None, response=None, exception=None, **kwargs):
+    harness_counters.observe(REQUEST_HISTOGRAM, (response_time or 0) / 1000, name=name, method=request_type)
+    if response is None:
+        harness_counters.inc(
+            "locust_responses_total", name=name, status="0", err_code=type(exception).__name__ if exception else ""
+        )
+        return
+    status = status_code(response)
+    harness_counters.inc(
+        "locust_responses_total", name=name, status=str(status), err_code=err_code(response) if status >= 400 else ""
+    )
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    harness_counters.reset()
+    _worker_snapshots.clear()
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    snapshot = harness_counters.snapshot()
+    data["harness_metrics"] = {
+        "counters": [[name, list(labels), value] for (name, labels), value in snapshot["counters"].items()],
+        "histograms": [[name, list(labels), entry] for (name, labels), entry in snapshot["histograms"].items()],
+    }
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    shipped = data.get("harness_metrics")
+    if not shipped:
+        return
+    # Workers send cumulative snapshots, so the latest one replaces the last
+    _worker_snapshots[client_id] = {
+        "counters": {(name, tuple(map(tuple, labels))): value for name, labels, value in shipped["counters"]},
+        "histograms": {(name, tuple(map(tuple, labels))): entry for name, labels, entry in shipped["histograms"]},
+    }
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if _server is not None:
+        _server.stop(timeout=1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+payload_pool.py - Pre-serialized request bodies and auth headers for Locust tasks
+
+Building a booking payload per request (datetime formatting, json.dumps and
+base64 for the Basic auth header) costs more generator CPU than sending it.
+Users build a pool once in on_start and tasks only pick ready bytes:
+
+    self.headers = auth_headers("admin", self.user_id)
+    self.bookings = shared_pool(("ramp", self.user_id), build_payloads)
+    ...
+    body, payload = self.bookings.pick()
+    self.client.post("/booking", data=body, headers=self.headers)
+
+A pool is rebuilt lazily the first time it is used after local midnight, so
+builders that put today's date into the payload stay correct on long runs.
+"""
+
+import base64
+import datetime
+import json
+import random
+import time
+
+
+_headers = {}
+_pools = {}
+
+
+def auth_headers(username, user_id):
+    """Return a shared JSON + Basic auth header dict for an identity (do not mutate it)"""
+    key = (username, str(user_id))
+    headers = _headers.get(key)
+    if headers is None:
+        token = base64.b64encode(f"{username}:{user_id}".encode()).decode()
+        headers = {"Authorization": f"Basic {token}", "Content-Type": "application/json"}
+        _headers[key] = headers
+    return headers
+
+
+def _next_midnight():
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    return time.mktime(tomorrow.timetuple())
+
+
+class PayloadPool:
+    """Serialized variants of a request body, refreshed when the date rolls over.
+
+    build(day) receives a datetime.date and returns the payload dicts to
+    choose from; at most size of them are kept.
+    """
+
+    def __init__(self, build, size=None):
+        self._build = build
+        self.size = size
+        self.day = None
+        self.expires_at = 0.0
+        self._entries = []
+
+    def refresh(self):
+        self.day = datetime.date.today()
+        self.expires_at = _next_midnight()
+        payloads = list(self._build(self.day))
+        if self.size is not None and len(payloads) > self.size:
+            payloads = random.sample(payloads, self.size)
+        self._entries = [(json.dumps(p).encode(), p) for p in payloads]
+
+    def pick(self):
+        """Return (body bytes, payload dict) for a random variant"""
+        if time.time() >= self.expires_at:
+            self.refresh()
+        return random.choice(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def shared_pool(key, build, size=None):
+    """Return the pool for key, building it once per process.
+
+    Locust users that send identical payloads (e.g. one shared identity)
+    should share a pool rather than each hold a copy.
+    """
+    pool = _pools.get(key)
+    if pool is None:
+        pool = PayloadPool(build, size)
+        _pools[key] = pool
+    return pool
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+perf_report.py - One self-contained HTML page comparing load test runs
+
+A run is a Locust --csv prefix (optionally LABEL=PREFIX) or a latency_test.py
+sample output. Whatever exists next to the prefix is used:
+
+    <prefix>_stats.csv          percentile table per endpoint
+    <prefix>_stats_history.csv  throughput, users and percentiles over time
+    <prefix>_failures.csv       failures by endpoint and message
+    <prefix>_errcodes.csv       responses by endpoint, status and ErrCode (error_taxonomy.py)
+    <prefix>_hdr.csv            exact percentiles merged across workers (hdr_stats.py),
+                                used instead of the stats CSV's rounded ones
+    <prefix>_requests.bin[.N]   every request (request_log.py): latency heatmap,
+                                exact percentiles and status breakdowns
+
+    python perf_report.py concurrency_50 concurrency_100 concurrency_200 -o concurrency.html
+    python perf_report.py before=runs/ramp_a after=runs/ramp_b --time-bins 400 -o ramp.html
+
+Per-request logs are binned with numpy (bincount over time x log-latency
+cells) and every chart is drawn from those bins, so a 10M-request run builds
+in seconds and the page stays small: heatmaps are inline PNGs, curves are
+inline SVGs downsampled to the chart width, and nothing is fetched on load.
+"""
+
+import argparse
+import base64
+import csv
+import glob
+import html
+import os
+import re
+import struct
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from request_log import DTYPE, FAILED, read_log
+
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+LOCUST_PERCENTILES = ("50%", "90%", "95%", "99%", "99.9%")
+CHART_WIDTH = 720
+CHART_HEIGHT = 240
+COLORS = ("#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd", "#8c564b", "#e377c2", "#17becf")
+# Dark to bright, for heatmap cells (empty cells stay white)
+HEAT_STOPS = ((0.0, (48, 18, 59)), (0.25, (70, 134, 251)), (0.5, (27, 229, 181)),
+              (0.75, (250, 186, 57)), (1.0, (122, 4, 3)))
+
+
+# -----------------------------
+# Loading runs
+# -----------------------------
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _read_csv(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _load_requests(prefix):
+    """Every request of a run as one record array plus its name table, or (None, [])"""
+    paths = sorted(path for path in glob.glob(f"{glob.escape(prefix)}_requests.bin*")
+                   if not path.endswith(".names"))
+    if not paths:
+        return None, []
+    ids, parts = {}, []
+    for path in paths:
+        records, file_names = read_log(path)
+        # Workers number names in the order they first saw them
+        remap = np.array([ids.setdefault(name, len(ids)) for name in file_names] or [0], dtype=np.uint16)
+        records["name"] = remap[records["name"]]
+        parts.append(records)
+    return np.concatenate(parts), list(ids)
+
+
+def _latency_test_requests(path):
+    from capacity_sim import load_latency_test_samples
+
+    samples = load_latency_test_samples(path)
+    records = np.zeros(len(samples), dtype=DTYPE)
+    if samples:
+        start, _, ms, status = zip(*samples)
+        records["time"], records["ms"], records["status"] = start, ms, status
+    return records, [os.path.basename(path)]
+
+
+class Run:
+    """Everything found for one run"""
+
+    def __init__(self, spec):
+        label, _, prefix = spec.rpartition("=")
+        self.prefix = prefix
+        self.label = label or os.path.basename(prefix)
+        if os.path.isfile(prefix):
+            self.requests, self.names = _latency_test_requests(prefix)
+            self.stats = self.hdr = self.history = self.failures = self.errcodes = []
+            return
+        self.stats = _read_csv(f"{prefix}_stats.csv")
+        self.hdr = _read_csv(f"{prefix}_hdr.csv")
+        self.history = [row for row in _read_csv(f"{prefix}_stats_history.csv") if row.get("Name") == "Aggregated"]
+        self.failures = _read_csv(f"{prefix}_failures.csv")
+        self.errcodes = _read_csv(f"{prefix}_errcodes.csv")
+        self.requests, self.names = _load_requests(prefix)
+        if not (self.stats or self.history or self.requests is not None):
+            raise SystemExit(f"Nothing found for run {spec!r} (expected {prefix}_stats.csv or similar)")
+
+    def history_column(self, column):
+        return np.array([_float(row.get(column)) for row in self.history])
+
+    @property
+    def peak_users(self):
+        users = self.history_column("User Count")
+        if users.size and np.isfinite(users).any():
+            return float(np.nanmax(users))
+        match = re.search(r"(\d+)", self.label)
+        return float(match.group(1)) if match else float("nan")
+
+
+# -----------------------------
+# Vectorized summaries
+# -----------------------------
+
+def percentile_rows(run):
+    """(name, requests, failures, rps, {percentile: ms}) per endpoint, then the aggregate"""
+    rows = []
+    if run.requests is not None and len(run.requests):
+        records = run.requests
+        span = max(float(records["time"].max() - records["time"].min()), 1e-9)
+        failed = (records["status"] & FAILED) != 0
+        groups = [(name, records["name"] == index) for index, name in enumerate(run.names)]
+        for name, mask in groups + [("Aggregated", slice(None))]:
+            ms = records["ms"][mask]
+            if not ms.size:
+                continue
+            values = np.percentile(ms, PERCENTILES)
+            rows.append((name, int(ms.size), int(failed[mask].sum()), ms.size / span,
+                         dict(zip(PERCENTILES, values))))
+        return rows
+    stats = {(row.get("Type", ""), row.get("Name", "")): row for row in run.stats}
+    for row in run.hdr or run.stats:
+        key = (row.get("Type", ""), row.get("Name", ""))
+        counts = stats.get(key, row)
+        rows.append((f"{key[0]} {key[1]}".strip(), int(_float(row.get("Request Count")) or 0),
+                     int(_float(counts.get("Failure Count")) or 0), _float(counts.get("Requests/s")),
+                     {point: _float(row.get(column)) for point, column in zip(PERCENTILES, LOCUST_PERCENTILES)}))
+    return rows
+
+
+def heatmap_bins(records, time_bins, latency_bins):
+    """Counts per (time bin, log-latency bin), the time and latency edges"""
+    times = records["time"]
+    ms = np.maximum(records["ms"].astype(np.float64), 0.1)
+    start, end = float(times.min()), float(times.max())
+    width = max(end - start, 1e-9) / time_bins
+    low, high = np.floor(np.log10(ms.min())), np.ceil(np.log10(ms.max()) + 1e-9)
+    high = max(high, low + 1)
+    time_index = np.minimum(((times - start) / width).astype(np.int64), time_bins - 1)
+    latency_index = np.minimum(((np.log10(ms) - low) / (high - low) * latency_bins).astype(np.int64),
+                               latency_bins - 1)
+    counts = np.bincount(time_index * latency_bins + latency_index, minlength=time_bins * latency_bins)
+    time_edges = start + width * np.arange(time_bins + 1)
+    latency_edges = 10 ** np.linspace(low, high, latency_bins + 1)
+    return counts.reshape(time_bins, latency_bins), time_edges, latency_edges
+
+
+def binned_percentiles(counts, latency_edges, points=(50, 99)):
+    """Per time bin, the upper latency edge holding each percentile (NaN for empty bins)"""
+    cumulative = np.cumsum(counts, axis=1)
+    totals = cumulative[:, -1]
+    lines = {}
+    for point in points:
+        target = np.maximum(np.ceil(totals * point / 100), 1)[:, None]
+        index = np.argmax(cumulative >= target, axis=1)
+        lines[point] = np.where(totals > 0, latency_edges[index + 1], np.nan)
+    return lines
+
+
+def status_breakdown(run):
+    """[(endpoint, status label, count)] from the request log, failures and ErrCode CSVs"""
+    rows = Counter()
+    if run.requests is not None and len(run.requests):
+        key = run.requests["name"].astype(np.uint32) << 16 | run.requests["status"]
+        values, counts = np.unique(key, return_counts=True)
+        for value, count in zip(values.tolist(), counts.tolist()):
+            status = value & 0xFFFF
+            if (status & ~FAILED) < 400 and not status & FAILED:
+                continue
+            label = str(status & ~FAILED) if status & ~FAILED else "no response"
+            rows[(run.names[value >> 16], label + (" (failed)" if status & FAILED else ""))] += count
+    for row in run.errcodes:
+        status = int(_float(row.get("Status")) or 0)
+        if status == 0 or status >= 400:
+            label = f"{status or 'no response'} {row.get('ErrCode') or ''}".strip()
+            rows[(row.get("Name", ""), label)] += int(_float(row.get("Count")) or 0)
+    for row in run.failures:
+        rows[(f"{row.get('Method', '')} {row.get('Name', '')}".strip(), row.get("Error", ""))] += \
+            int(_float(row.get("Occurrences")) or 0)
+    return [(name, label, count) for (name, label), count in rows.most_common()]
+
+
+# -----------------------------
+# Rendering
+# -----------------------------
+
+def _png(rgb):
+    """Encode an (height, width, 3) uint8 array as a PNG data URI"""
+    height, width, _ = rgb.shape
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgb.reshape(height, width * 3)]).tobytes()
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    png = (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+           + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+    return "data:image/png;base64," + base64.b64encode(png).decode()
+
+
+def _colormap(values):
+    """values in [0, 1] to RGB by interpolating HEAT_STOPS"""
+    positions = [stop for stop, _ in HEAT_STOPS]
+    return np.stack([np.interp(values, positions, [color[channel] for _, color in HEAT_STOPS])
+                     for channel in range(3)], axis=-1).astype(np.uint8)
+
+
+def _ticks(low, high, count=5):
+    if not np.isfinite(low) or not np.isfinite(high) or high <= low:
+        return [low] if np.isfinite(low) else []
+    step = 10 ** np.floor(np.log10((high - low) / count))
+    for factor in (1, 2, 5, 10):
+        if (high - low) / (step * factor) <= count:
+            step *= factor
+            break
+    return list(np.arange(np.ceil(low / step) * step, high + step * 1e-9, step))
+
+
+def _number(value):
+    if not np.isfinite(value):
+        return "-"
+    if abs(value) >= 100:
+        return f"{value:,.0f}"
+    return f"{value:.3g}" if abs(value) < 10 else f"{value:.1f}"
+
+
+def _downsample(xs, ys, points):
+    """Mean of ys in at most points equal-width x bins (NaNs ignored)"""
+    xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+    keep = np.isfinite(xs) & np.isfinite(ys)
+    xs, ys = xs[keep], ys[keep]
+    if xs.size <= points:
+        return xs, ys
+    edges = np.linspace(xs.min(), xs.max(), points + 1)
+    index = np.minimum(np.searchsorted(edges, xs, side="right") - 1, points - 1)
+    counts = np.bincount(index, minlength=points)
+    filled = counts > 0
+    return (np.bincount(index, xs, points)[filled] / counts[filled],
+            np.bincount(index, ys, points)[filled] / counts[filled])
+
+
+def line_chart(title, series, x_label, y_label, log_y=False, markers=False):
+    """Inline SVG with one polyline per (label, xs, ys) series"""
+    left, bottom, top, right = 60, 36, 24, 12
+    plot_w, plot_h = CHART_WIDTH - left - right, CHART_HEIGHT - top - bottom
+    series = [(label, *_downsample(xs, ys, plot_w)) for label, xs, ys in series]
+    series = [(label, xs, ys) for label, xs, ys in series if xs.size]
+    if not series:
+        return ""
+    all_x = np.concatenate([xs for _, xs, _ in series])
+    all_y = np.concatenate([ys for _, _, ys in series])
+    if log_y:
+        all_y = all_y[all_y > 0]
+    x_low, x_high = float(all_x.min()), float(all_x.max())
+    if log_y and all_y.size:
+        y_low, y_high = np.floor(np.log10(all_y.min())), np.ceil(np.log10(all_y.max()) + 1e-9)
+        y_high = max(y_high, y_low + 1)
+    else:
+        y_low, y_high = 0.0, float(all_y.max()) * 1.05 if all_y.size and all_y.max() > 0 else 1.0
+    x_high = x_high if x_high > x_low else x_low + 1
+
+    def sx(x):
+        return left + (x - x_low) / (x_high - x_low) * plot_w
+
+    def sy(y):
+        value = np.log10(np.maximum(y, 1e-12)) if log_y else y
+        return top + plot_h - (value - y_low) / (y_high - y_low) * plot_h
+
+    parts = [f'<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" class="chart">',
+             f'<text x="{left}" y="14" class="title">{html.escape(title)}</text>',
+             f'<rect x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" class="frame"/>']
+    for tick in _ticks(x_low, x_high):
+        parts.append(f'<text x="{sx(tick):.1f}" y="{top + plot_h + 14}" class="tick" text-anchor="middle">'
+                     f'{_number(tick)}</text>')
+    y_ticks = [10 ** power for power in range(int(y_low), int(y_high) + 1)] if log_y else _ticks(y_low, y_high)
+    for tick in y_ticks:
+        y = sy(tick)
+        parts.append(f'<line x1="{left}" x2="{left + plot_w}" y1="{y:.1f}" y2="{y:.1f}" class="grid"/>')
+        parts.append(f'<text x="{left - 4}" y="{y + 4:.1f}" class="tick" text-anchor="end">{_number(tick)}</text>')
+    parts.append(f'<text x="{left + plot_w / 2}" y="{CHART_HEIGHT - 4}" class="tick" text-anchor="middle">'
+                 f'{html.escape(x_label)}</text>')
+    parts.append(f'<text x="12" y="{top + plot_h / 2}" class="tick" text-anchor="middle" '
+                 f'transform="rotate(-90 12 {top + plot_h / 2})">{html.escape(y_label)}</text>')
+    for number, (label, xs, ys) in enumerate(series):
+        color = COLORS[number % len(COLORS)]
+        points = " ".join(f"{x:.1f},{y:.1f}" for x, y in zip(sx(xs), sy(ys)))
+        parts.append(f'<polyline points="{points}" fill="none" stroke="{color}" stroke-width="1.5"/>')
+        if markers:
+            parts.extend(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="{color}"/>' for x, y in zip(sx(xs), sy(ys)))
+        parts.append(f'<text x="{left + 8 + 130 * number}" y="{top + 12}" class="legend" fill="{color}">'
+                     f'{html.escape(label)}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def heatmap(title, counts, time_edges, latency_edges, lines):
+    """A PNG of the counts (time left to right, latency bottom to top) framed by an SVG with axes"""
+    left, bottom, top, right = 60, 36, 24, 12
+    plot_w, plot_h = CHART_WIDTH - left - right, CHART_HEIGHT - top - bottom
+    scaled = np.log1p(counts.T[::-1].astype(np.float64))
+    peak = scaled.max() or 1.0
+    rgb = _colormap(scaled / peak)
+    rgb[counts.T[::-1] == 0] = 255
+    elapsed = time_edges - time_edges[0]
+    log_low, log_high = np.log10(latency_edges[0]), np.log10(latency_edges[-1])
+
+    def sx(seconds):
+        return left + seconds / max(elapsed[-1], 1e-9) * plot_w
+
+    def sy(ms):
+        return top + plot_h - (np.log10(ms) - log_low) / (log_high - log_low) * plot_h
+
+    parts = [f'<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" class="chart">',
+             f'<text x="{left}" y="14" class="title">{html.escape(title)}</text>',
+             f'<image x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" preserveAspectRatio="none" '
+             f'style="image-rendering:pixelated" href="{_png(rgb)}"/>',
+             f'<rect x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" class="frame"/>']
+    for tick in _ticks(0.0, float(elapsed[-1])):
+        parts.append(f'<text x="{sx(tick):.1f}" y="{top + plot_h + 14}" class="tick" text-anchor="middle">'
+                     f'{_number(tick)}</text>')
+    for power in range(int(log_low), int(log_high) + 1):
+        parts.append(f'<text x="{left - 4}" y="{sy(10 ** power) + 4:.1f}" class="tick" text-anchor="end">'
+                     f'{_number(10 ** power)}</text>')
+    centers = (elapsed[:-1] + elapsed[1:]) / 2
+    for number, (point, values) in enumerate(lines.items()):
+        keep = np.isfinite(values)
+        points = " ".join(f"{x:.1f},{y:.1f}" for x, y in zip(sx(centers[keep]), sy(values[keep])))
+        parts.append(f'<polyline points="{points}" fill="none" stroke="{COLORS[number + 1]}" stroke-width="1"/>')
+        parts.append(f'<text x="{left + 8 + 70 * number}" y="{top + 12}" class="legend" '
+                     f'fill="{COLORS[number + 1]}">p{point:g}</text>')
+    parts.append(f'<text x="{left + plot_w / 2}" y="{CHART_HEIGHT - 4}" class="tick" text-anchor="middle">'
+                 f'seconds into the run</text>')
+    parts.append(f'<text x="12" y="{top + plot_h / 2}" class="tick" text-anchor="middle" '
+                 f'transform="rotate(-90 12 {top + plot_h / 2})">ms (log)</text></svg>')
+    return "".join(parts)
+
+
+def table(headers, rows):
+    head = "".join(f"<th>{html.escape(str(header))}</th>" for header in headers)
+    body = "".join("<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>" for row in rows)
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+STYLE = """
+body { font: 14px/1.4 -apple-system, Segoe UI, Helvetica, Arial, sans-serif; margin: 24px auto; max-width: 1100px; }
+h1 { font-size: 22px; } h2 { font-size: 18px; margin-top: 32px; border-bottom: 1px solid #ddd; }
+h3 { font-size: 15px; margin-bottom: 4px; }
+table { border-collapse: collapse; margin: 8px 0; font-size: 13px; }
+th, td { border: 1px solid #ddd; padding: 3px 8px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.chart { width: 100%; max-width: 720px; display: block; margin: 8px 0; }
+.chart .title { font-size: 13px; font-weight: bold; } .chart .tick { font-size: 10px; fill: #444; }
+.chart .legend { font-size: 11px; } .chart .frame { fill: none; stroke: #999; }
+.chart .grid { stroke: #eee; } .note { color: #666; font-size: 12px; }
+"""
+
+
+def run_section(run, time_bins, latency_bins):
+    parts = [f"<h2>{html.escape(run.label)}</h2>", f'<p class="note">{html.escape(run.prefix)}</p>']
+    rows = percentile_rows(run)
+    if rows:
+        parts.append(table(["Endpoint", "Requests", "Failures", "Req/s"] + [f"p{point:g} ms" for point in PERCENTILES],
+                           [(name, f"{count:,}", f"{failures:,}", _number(rps),
+                             *[_number(values[point]) for point in PERCENTILES])
+                            for name, count, failures, rps, values in rows]))
+    if run.requests is not None and len(run.requests):
+        counts, time_edges, latency_edges = heatmap_bins(run.requests, time_bins, latency_bins)
+        parts.append(heatmap("Latency over time (all requests)", counts, time_edges, latency_edges,
+                             binned_percentiles(counts, latency_edges)))
+        elapsed = (time_edges[:-1] + time_edges[1:]) / 2 - time_edges[0]
+        width = time_edges[1] - time_edges[0]
+        parts.append(line_chart("Throughput", [("requests/s", elapsed, counts.sum(axis=1) / width)],
+                                "seconds into the run", "requests/s"))
+    if run.history:
+        stamps = run.history_column("Timestamp")
+        elapsed = stamps - np.nanmin(stamps)
+        if run.requests is None:
+            parts.append(line_chart("Latency percentiles over time", [
+                (column, elapsed, run.history_column(column)) for column in ("50%", "95%", "99%")
+            ], "seconds into the run", "ms", log_y=True))
+        parts.append(line_chart("Throughput and users", [
+            ("requests/s", elapsed, run.history_column("Requests/s")),
+            ("failures/s", elapsed, run.history_column("Failures/s")),
+            ("users", elapsed, run.history_column("User Count")),
+        ], "seconds into the run", "per second / users"))
+    errors = status_breakdown(run)
+    if errors:
+        parts.append("<h3>Errors</h3>")
+        parts.append(table(["Endpoint", "Status / error", "Count"],
+                           [(name, label, f"{count:,}") for name, label, count in errors[:50]]))
+    return "".join(parts)
+
+
+def comparison_section(runs):
+    parts = ["<h2>All runs</h2>"]
+    summary = []
+    curve = []
+    for run in runs:
+        aggregate = next((row for row in percentile_rows(run) if row[0] == "Aggregated"), None)
+        if aggregate is None:
+            continue
+        name, count, failures, rps, values = aggregate
+        summary.append((run.label, _number(run.peak_users), f"{count:,}", f"{failures / max(count, 1):.2%}",
+                        _number(rps), *[_number(values[point]) for point in PERCENTILES]))
+        curve.append((run.peak_users, rps, values[99]))
+    parts.append(table(["Run", "Users", "Requests", "Failed", "Req/s"] + [f"p{point:g} ms" for point in PERCENTILES],
+                       summary))
+    curve = sorted(point for point in curve if np.isfinite(point[0]))
+    if len(curve) > 1:
+        users, rps, p99 = (np.array(column) for column in zip(*curve))
+        parts.append(line_chart("Throughput vs users (one point per run)", [("requests/s", users, rps)],
+                                "users", "requests/s", markers=True))
+        parts.append(line_chart("p99 vs users (one point per run)", [("p99 ms", users, p99)],
+                                "users", "ms", log_y=True, markers=True))
+    ramps = []
+    for run in runs:
+        users, rps = run.history_column("User Count"), run.history_column("Requests/s")
+        keep = np.isfinite(users) & np.isfinite(rps) & (users > 0)
+        if keep.sum() > 1 and np.unique(users[keep]).size > 1:
+            levels, index = np.unique(users[keep], return_inverse=True)
+            ramps.append((run.label, levels, np.bincount(index, rps[keep]) / np.bincount(index)))
+    if ramps:
+        parts.append(line_chart("Throughput vs users during each run", ramps, "users", "requests/s"))
+    return "".join(parts)
+
+
+def build(runs, title, time_bins, latency_bins):
+    sections = [comparison_section(runs)] + [run_section(run, time_bins, latency_bins) for run in runs]
+    generated = time.strftime("%Y-%m-%d %H:%M:%S")
+    return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+            f"<style>{STYLE}</style></head><body><h1>{html.escape(title)}</h1>"
+            f'<p class="note">Generated {generated} from {len(runs)} run(s)</p>{"".join(sections)}</body></html>')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render load test runs into one self-contained HTML report")
+    parser.add_argument("runs", nargs="+", metavar="[LABEL=]PREFIX",
+                        help="Locust --csv prefix or latency_test.py output, optionally labelled")
+    parser.add_argument("-o", "--output", default="report.html", help="HTML file to write")
+    parser.add_argument("--title", default="Load test report", help="Page title")
+    parser.add_argument("--time-bins", type=int, default=240, help="Heatmap columns")
+    parser.add_argument("--latency-bins", type=int, default=64, help="Heatmap rows (log-spaced)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    runs = [Run(spec) for spec in args.runs]
+    loaded = time.perf_counter()
+    page = build(runs, args.title, args.time_bins, args.latency_bins)
+    with open(args.output, "w") as f:
+        f.write(page)
+    requests = sum(len(run.requests) for run in runs if run.requests is not None)
+    print(f"Wrote {args.output} ({len(page) / 1024:.0f} KiB): {len(runs)} run(s), {requests:,} logged requests, "
+          f"loaded in {loaded - started:.1f}s, rendered in {time.perf_counter() - loaded:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,11 @@ from locust import HttpUser, task, between
 from datetime import datetime, timedelta
 import random
 import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+import bounded
 
 # Test user
 ALICE = {
@@ -32,7 +37,8 @@ class BookingCacheUser(HttpUser):
         if resp.status_code != 200:
             print(f"Login failed: {resp.text}")
         self.auth = (ALICE['username'], str(ALICE['user_id']))
-        self.created_bookings = []
+        # Only the newest bookings are read back, so keep a fixed number
+        self.created_bookings = bounded.RingBuffer(500, name="created_bookings")
 
     @task(5)
     def create_popular_booking(self):
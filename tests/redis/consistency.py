@@ -8,11 +8,12 @@ Tests cache correctness for Booking Service across:
  - Stale read detection
 """
 
+import os
 import requests
 import time
 from datetime import datetime, timedelta
 
-BASE_URL = "http://CS6650L2-alb-243173383.us-east-1.elb.amazonaws.com"
+BASE_URL = os.getenv("BASE_URL", "http://CS6650L2-alb-243173383.us-east-1.elb.amazonaws.com")
 
 ALICE = {"user_id": 6036687152, "username": "alice", "password": "password123"}
 BOB   = {"user_id": 50723387644, "username": "bob",   "password": "password123"}
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+replica_lag.py - Eventually consistent booking store for validating the consistency probers
+
+The stand-in from service_standin.py, with bookings kept in an in-process
+model of a replicated table: every write reaches the primary at once and
+each replica after a lag drawn from a configurable distribution. Point reads
+and the date/space queries used for the conflict check hit a random replica
+unless consistent reads are on, so a prober sees exactly the staleness that
+was configured and nothing else:
+
+    python replica_lag.py --lag lognormal:200:0.8 --replicas 3 --port 8080
+    python replica_lag.py --lag const:6000 --read-your-writes
+    python replica_lag.py --lag exp:500 --probe 20000
+
+The users and spaces hardcoded in dynamo_db_consistency.py and
+redis/consistency.py are created at startup (--user/--space add more), so
+both probers run against it unchanged apart from their target URL. On exit
+the configured replication windows are printed next to the stale reads that
+were actually served, which is what the prober's report should agree with.
+
+--probe N skips the server and drives N write-then-read pairs through the
+booking handlers on a virtual clock, comparing the stale fraction seen at
+each read delay with the one the lag distribution predicts.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from collections import Counter, deque
+from datetime import date as Date, timedelta
+
+from service_standin import (
+    SESSION_TTL,
+    ZERO_TIME_VALUE,
+    Services,
+    StandinServer,
+    parse_latency,
+    print_counts,
+)
+
+
+# Identities the probers log in with; spaces they book without creating
+PROBER_USERS = [
+    ("ADMIN", 49247462423, "password123"),
+    ("alice", 6036687152, "password123"),
+    ("bob", 50723387644, "password123"),
+]
+PROBER_SPACES = [("Library-101", 10), ("Library-102", 10), ("Library-103", 10)]
+HISTORY = 100000
+
+
+class Version:
+    """One write of a key: its value (None for a delete) and when each replica applies it"""
+
+    __slots__ = ("number", "value", "written", "visible")
+
+    def __init__(self, number, value, written, visible):
+        self.number = number
+        self.value = value
+        self.written = written
+        self.visible = visible
+
+
+class ReplicatedStore:
+    """A primary and N asynchronously replicated copies of one key-value table.
+
+    Each write gets an independent lag per replica; a replica applies the
+    writes of one key in order, so a later version never shows up before an
+    earlier one. Reads pick a random replica (one replica for a whole query)
+    and are compared against the primary to count what was served stale.
+    With read_your_writes a reader always sees at least its own last write.
+    """
+
+    def __init__(self, lag, replicas=3, read_your_writes=False, clock=time.monotonic, history=HISTORY):
+        self.lag = lag
+        self.replicas = replicas
+        self.read_your_writes = read_your_writes
+        self.clock = clock
+        self.versions = {}
+        self.indexes = {}
+        self.key_indexes = {}
+        self.sessions = {}
+        self.sequence = 0
+        self.counts = Counter()
+        # Configured: seconds until the last replica applied a write
+        self.windows = deque(maxlen=history)
+        # Observed: how long ago the newest write a stale read missed was made
+        self.stale_ages = {"reads": deque(maxlen=history), "queries": deque(maxlen=history)}
+
+    def write(self, key, value, writer=None, indexes=()):
+        now = self.clock()
+        self.sequence += 1
+        history = self.versions.setdefault(key, [])
+        previous = history[-1].visible if history else None
+        visible = [now + self.lag() for _ in range(self.replicas)]
+        if previous:
+            visible = [max(mine, theirs) for mine, theirs in zip(visible, previous)]
+        history.append(Version(self.sequence, value, now, visible))
+        self.windows.append(max(visible) - now)
+        if indexes:
+            self.key_indexes[key] = indexes
+            for index in indexes:
+                self.indexes.setdefault(index, set()).add(key)
+        if self.read_your_writes and writer:
+            self.sessions.setdefault(writer, {})[key] = self.sequence
+        self.counts["writes"] += 1
+        return self.sequence
+
+    def latest(self, key):
+        """The primary's value"""
+        history = self.versions.get(key)
+        return history[-1].value if history else None
+
+    def _prune(self, key, history, now):
+        # Versions every replica has moved past can never be read again
+        while len(history) > 1 and max(history[1].visible) <= now:
+            del history[0]
+        if len(history) == 1 and history[0].value is None and max(history[0].visible) <= now:
+            del self.versions[key]
+            for index in self.key_indexes.pop(key, ()):
+                keys = self.indexes.get(index)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.indexes[index]
+            return None
+        return history
+
+    def _read_at(self, key, replica, reader, now):
+        """(value, seconds behind) for key on one replica; seconds behind is None when fresh"""
+        history = self.versions.get(key)
+        if history is not None:
+            history = self._prune(key, history, now)
+        if not history:
+            return None, None
+        seen = -1
+        for position in range(len(history) - 1, -1, -1):
+            if history[position].visible[replica] <= now:
+                seen = position
+                break
+        if self.read_your_writes and reader:
+            own = self.sessions.get(reader, {}).get(key)
+            if own is not None:
+                for position in range(len(history) - 1, seen, -1):
+                    if history[position].number == own:
+                        seen = position
+                        break
+        value = history[seen].value if seen >= 0 else None
+        if value == history[-1].value:
+            return value, None
+        return value, now - history[seen + 1].written
+
+    def read(self, key, reader=None, consistent=False):
+        if consistent:
+            return self.latest(key)
+        value, behind = self._read_at(key, random.randrange(self.replicas), reader, self.clock())
+        self._count("reads", behind)
+        return value
+
+    def query(self, index, reader=None, consistent=False, limit=None):
+        """Values of the keys in index, read from one replica (or the primary when consistent)"""
+        now = self.clock()
+        replica = random.randrange(self.replicas)
+        values, worst = [], None
+        for key in list(self.indexes.get(index, ())):
+            if consistent:
+                value = self.latest(key)
+            else:
+                value, behind = self._read_at(key, replica, reader, now)
+                if behind is not None and (worst is None or behind > worst):
+                    worst = behind
+            if value is not None:
+                values.append(value)
+                if limit is not None and len(values) >= limit:
+                    break
+        if not consistent:
+            self._count("queries", worst)
+        return values
+
+    def _count(self, kind, behind):
+        self.counts[kind] += 1
+        if behind is not None:
+            self.counts["stale " + kind] += 1
+            self.stale_ages[kind].append(behind)
+
+
+class EventualServices(Services):
+    """The stand-in's services with bookings held in a ReplicatedStore.
+
+    Bookings are keyed by (date, bookingID) and indexed by date and by
+    (date, spaceID); the conflict check queries the latter, like the
+    booking service's DateIndex query. Deletes act on the primary.
+    """
+
+    def __init__(self, store, consistent_reads=False, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+        self.consistent_reads = consistent_reads
+
+    def space_bookings(self, date, space_id, reader=None):
+        return self.store.query(("space", date, space_id), reader, self.consistent_reads)
+
+    def load_booking(self, date, booking_id, reader=None):
+        return self.store.read((date, booking_id), reader, self.consistent_reads)
+
+    def has_date(self, date, reader=None):
+        return bool(self.store.query(("date", date), reader, self.consistent_reads, limit=1))
+
+    def save_booking(self, booking, writer=None):
+        date = booking["date"]
+        self.store.write((date, booking["bookingID"]), booking, writer,
+                         indexes=(("date", date), ("space", date, booking["spaceID"])))
+
+    def drop_booking(self, date, booking_id, writer=None):
+        booking = self.store.latest((date, booking_id))
+        if booking is not None:
+            self.store.write((date, booking_id), None, writer)
+        return booking
+
+    def seed(self, users=(), spaces=()):
+        """Create users (username, id, password) and spaces (id, capacity) directly"""
+        for username, user_id, password in users:
+            self.users[user_id] = {"username": username, "email": "", "password": password,
+                                   "lastAuth": self.clock()}
+        for space_id, capacity in spaces:
+            building, _, room = space_id.rpartition("-")
+            self.spaces[space_id] = {"spaceID": space_id, "roomCode": int(room), "buildingCode": building,
+                                     "capacity": capacity, "openTime": ZERO_TIME_VALUE,
+                                     "closeTime": ZERO_TIME_VALUE}
+
+
+def percentiles(samples, points=(50, 90, 99, 99.9)):
+    ordered = sorted(samples)
+    if not ordered:
+        return {point: 0.0 for point in points}
+    return {point: ordered[min(len(ordered) - 1, int(len(ordered) * point / 100))] for point in points}
+
+
+def _ms(table):
+    return ", ".join(f"p{point:g} {value * 1000:.0f}ms" for point, value in table.items())
+
+
+def print_report(store):
+    print("\n=== Replication ===")
+    counts = store.counts
+    print(f"Writes: {counts['writes']}, configured window to the last replica: {_ms(percentiles(store.windows))}")
+    for kind in ("reads", "queries"):
+        total, stale = counts[kind], counts["stale " + kind]
+        if not total:
+            continue
+        print(f"{kind.capitalize()}: {total}, stale {stale} ({stale / total:.1%})", end="")
+        print(f", behind the primary by {_ms(percentiles(store.stale_ages[kind]))}" if stale else "")
+
+
+class VirtualClock:
+    """A clock that only moves when told to"""
+
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def probe(args, lag, delays_ms):
+    """Write-then-read pairs through the handlers; stale fraction per read delay vs the configured lag"""
+    clock = VirtualClock(time.time())
+    store = ReplicatedStore(lag, args.replicas, args.read_your_writes, clock)
+    services = EventualServices(store, args.consistent_reads, overlap="dynamo_db", clock=clock,
+                                session_ttl=float("inf"))
+    services.seed(PROBER_USERS[1:], PROBER_SPACES[:1])
+    writer, other = PROBER_USERS[1], PROBER_USERS[2]
+    headers = {name: "Basic " + base64.b64encode(f"{name}:{user_id}".encode()).decode()
+               for name, user_id, _ in (writer, other)}
+    first_day = Date.today() + timedelta(days=1)
+    stale = {(delay, reader): 0 for delay in delays_ms for reader in ("own", "other")}
+    per_delay = Counter()
+    for n in range(args.probe):
+        delay = delays_ms[n % len(delays_ms)]
+        day = (first_day + timedelta(days=n // len(delays_ms))).isoformat()
+        body = json.dumps({"spaceID": PROBER_SPACES[0][0], "date": day, "userID": writer[1], "occupants": 1,
+                           "startTime": f"{day}T{n % 20:02d}:00:00Z",
+                           "endTime": f"{day}T{n % 20:02d}:30:00Z"}).encode()
+        status, booking_id = services.create_booking(headers[writer[0]], body)
+        if status != 201:
+            raise RuntimeError(f"probe booking failed: {status} {booking_id}")
+        clock.now += delay / 1000
+        for reader, user in (("own", writer), ("other", other)):
+            status, _ = services.get_booking(day, str(booking_id), str(user[1]))
+            stale[(delay, reader)] += status == 404
+        per_delay[delay] += 1
+        clock.now += 1e-6
+
+    expected_samples = [lag() for _ in range(100000)]
+    print(f"=== Probe: {args.probe} write-then-read pairs, {args.replicas} replicas, "
+          f"read-your-writes {'on' if args.read_your_writes else 'off'}, "
+          f"consistent reads {'on' if args.consistent_reads else 'off'} ===")
+    print(f"{'read after':>12}\t{'expected':>9}\t{'own read':>9}\t{'other read':>10}")
+    for delay in delays_ms:
+        if args.consistent_reads:
+            expected = 0.0
+        else:
+            expected = sum(sample > delay / 1000 for sample in expected_samples) / len(expected_samples)
+        pairs = per_delay[delay] or 1
+        print(f"{delay:>10g}ms\t{expected:>9.1%}\t{stale[(delay, 'own')] / pairs:>9.1%}"
+              f"\t{stale[(delay, 'other')] / pairs:>10.1%}")
+    print_report(store)
+
+
+def _user(spec):
+    username, user_id, *password = spec.split(":")
+    return username, int(user_id), password[0] if password else "password123"
+
+
+def _space(spec):
+    space_id, _, capacity = spec.partition(":")
+    return space_id, int(capacity or 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the booking APIs over an eventually consistent store")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--lag", default="lognormal:100:1",
+                        help="Replication lag per replica: const:MS, uniform:LO:HI, exp:MEAN or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--replicas", type=int, default=3, help="Replicas reads are spread over")
+    parser.add_argument("--read-your-writes", action="store_true", help="Readers always see their own writes")
+    parser.add_argument("--consistent-reads", action="store_true", help="Read every booking from the primary")
+    parser.add_argument("--overlap", choices=("map_db", "dynamo_db"), default="dynamo_db",
+                        help="Booking conflict check to copy")
+    parser.add_argument("--session-ttl", type=float, default=SESSION_TTL, help="Seconds a login stays valid")
+    parser.add_argument("--user", action="append", type=_user, default=[], metavar="NAME:ID[:PASSWORD]",
+                        help="Extra user to create at startup (repeatable)")
+    parser.add_argument("--space", action="append", type=_space, default=[], metavar="ID[:CAPACITY]",
+                        help="Extra space to create at startup, e.g. Library-104:20 (repeatable)")
+    parser.add_argument("--probe", type=int, metavar="N", help="Run N write-then-read pairs in-process and exit")
+    parser.add_argument("--probe-delays", default="0,10,50,100,250,500,1000,5000",
+                        help="Comma-separated read delays (ms) for --probe")
+    args = parser.parse_args()
+    lag = parse_latency(args.lag)
+
+    if args.probe:
+        probe(args, lag, [float(delay) for delay in args.probe_delays.split(",")])
+        return
+
+    store = ReplicatedStore(lag, args.replicas, args.read_your_writes)
+    services = EventualServices(store, args.consistent_reads, overlap=args.overlap, session_ttl=args.session_ttl)
+    services.seed(PROBER_USERS + args.user, PROBER_SPACES + args.space)
+    server = StandinServer(services)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    print(f"Serving eventually consistent bookings on http://{args.host}:{args.port} "
+          f"(lag {args.lag}, {args.replicas} replicas)")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    print_counts(server.counts)
+    print_report(store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+request_log.py - Per-request latency log for reports
+
+Add this file to the locustfile list and pass --request-log. Every request
+is appended as one fixed-size record, so a 10M-request run loads with a
+single numpy.fromfile. Each worker writes its own file (<path>.<worker index>).
+
+    locust -f locust_ramp_users.py,request_log.py --csv run --request-log run_requests.bin ...
+    python perf_report.py run -o report.html
+
+Record: <time:f8 epoch seconds> <response_time_ms:f4> <name:u2> <status:u2>
+little-endian; status is 0 when no response came back and has FAILED set
+when Locust counted the request as a failure. Names are stored in a JSON
+list next to the log (<file>.names).
+"""
+
+import json
+import struct
+import time
+
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+from request_meta import status_code
+
+
+RECORD = struct.Struct("<dfHH")
+DTYPE = [("time", "<f8"), ("ms", "<f4"), ("name", "<u2"), ("status", "<u2")]
+FAILED = 0x8000
+FLUSH_BYTES = 256 * 1024
+
+
+class RequestLog:
+    """Append-only writer for the fixed-record request log"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+        self._buffer = bytearray()
+        self._names = {}
+        self.count = 0
+
+    def record(self, when, response_time, name, status, failed):
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = self._names[name] = len(self._names)
+            self._write_names()
+        self._buffer += RECORD.pack(when, response_time, name_id, status | (FAILED if failed else 0))
+        self.count += 1
+        if len(self._buffer) >= FLUSH_BYTES:
+            self.flush()
+
+    def _write_names(self):
+        with open(self.path + ".names", "w") as f:
+            json.dump(list(self._names), f)
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def read_log(path):
+    """(numpy record array, names) for one log file"""
+    import numpy as np
+
+    with open(path + ".names") as f:
+        names = json.load(f)
+    return np.fromfile(path, dtype=DTYPE), names
+
+
+_log = None
+
+
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument(
+        "--request-log",
+        type=str,
+        default="",
+        help="Append every request's time, name, status and latency to this file (one file per worker)",
+    )
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global _log
+    path = getattr(environment.parsed_options, "request_log", "")
+    if not path or isinstance(environment.runner, MasterRunner):
+        return
+    if isinstance(environment.runner, WorkerRunner):
+        path = f"{path}.{environment.runner.worker_index}"
+    _log = RequestLog(path)
+
+
+@events.request.add_listener
+def on_request(name, response_time, response=None, exception=None, start_time=None, **kwargs):
+    if _log is None:
+        return
+    status = min(status_code(response), FAILED - 1)
+    _log.record(start_time or time.time(), response_time or 0.0, name, status, exception is not None)
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    global _log
+    if _log is not None:
+        _log.close()
+        print(f"Logged {_log.count} requests to {_log.path}")
+        _log = None
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+request_meta.py - Helpers for reading Locust request events
+
+Locust's request event hands listeners the response object; these helpers
+pull out what the harness plugins need from it (request body, Basic auth
+identity, ErrCode) for both HttpUser and FastHttpUser responses. This module
+registers no listeners, so plugins can share it safely.
+"""
+
+import base64
+import json
+from datetime import datetime
+from urllib.parse import urlsplit
+
+
+def request_payload(response):
+    """Return the body a request was sent with as bytes"""
+    request = getattr(response, "request", None)
+    body = getattr(request, "body", None)
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        return body.encode()
+    return bytes(body)
+
+
+def request_identity(response):
+    """Return the "username:userId" Basic auth pair a request was sent with, or ''"""
+    request = getattr(response, "request", None)
+    headers = getattr(request, "headers", None)
+    header = headers.get("Authorization") if headers else None
+    if not header or not header.startswith("Basic "):
+        return ""
+    try:
+        return base64.b64decode(header[6:]).decode()
+    except (ValueError, UnicodeDecodeError):
+        return ""
+
+
+def url_path(url):
+    """Strip scheme and host from a request URL"""
+    split = urlsplit(url)
+    return split.path + (f"?{split.query}" if split.query else "")
+
+
+def status_code(response):
+    return getattr(response, "status_code", 0) or 0
+
+
+def err_code(response):
+    """Return the ErrCode of a service error body, or ''"""
+    try:
+        body = response.json()
+    except Exception:
+        return ""
+    return body.get("ErrCode", "") if isinstance(body, dict) else ""
+
+
+def booking_request(response):
+    """Return the POST /booking payload with lower-cased keys, or None.
+
+    Gin binds JSON keys case-insensitively, so older scripts sending
+    "SpaceID" and newer ones sending "spaceID" are both accepted.
+    """
+    try:
+        payload = json.loads(request_payload(response) or b"null")
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    return {str(k).lower(): v for k, v in payload.items()}
+
+
+def booking_id(response):
+    """Return the booking ID a successful POST /booking responded with, or None"""
+    try:
+        return int((response.text or "").strip().strip('"'))
+    except (TypeError, ValueError):
+        return None
+
+
+def timestamp(value):
+    """Parse the RFC 3339 times the services use into epoch seconds"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+request_trace.py - Record every request a Locust run issues and replay it later
+
+Recording: add this file to the locustfile list and pass --record-trace.
+Each worker writes its own file (<path>.<worker index>).
+
+    locust -f locust_ramp_users.py,request_trace.py --record-trace ramp.trace ...
+
+Replaying: re-issue one or more trace files from gevent greenlets, one
+greenlet per recorded Locust user so per-user ordering is preserved.
+
+    python request_trace.py replay ramp.trace --host http://<alb_dns_name> --speedup 10
+    python request_trace.py info ramp.trace
+
+Trace format: an 8 byte magic header followed by tagged records.
+    b"S" <id:u32> <len:u32> <utf-8 bytes>        string table entry
+    b"R" <offset_us:u64> <user:u32> <identity:u32> <method:u8>
+         <name:u32> <path:u32> <len:u32> <payload bytes>
+Identity, name and path refer to string table entries, so a trace is mostly
+offsets and payloads.
+"""
+
+import argparse
+import base64
+import itertools
+import struct
+import sys
+import time
+import weakref
+from collections import namedtuple
+
+import gevent
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+from request_meta import request_identity, request_payload, url_path
+
+
+MAGIC = b"SRTRACE1"
+METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"]
+METHOD_CODES = {m: i for i, m in enumerate(METHODS)}
+
+_STRING = struct.Struct("<II")
+_REQUEST = struct.Struct("<QIIBIII")
+FLUSH_BYTES = 64 * 1024
+
+TraceRecord = namedtuple("TraceRecord", "offset user identity method name path payload")
+
+
+class TraceRecorder:
+    """Append-only writer for the binary trace format"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._buffer = bytearray()
+        self._strings = {}
+        self.count = 0
+
+    def _string_id(self, value):
+        string_id = self._strings.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings[value] = string_id
+            encoded = value.encode()
+            self._buffer += b"S" + _STRING.pack(string_id, len(encoded)) + encoded
+        return string_id
+
+    def record(self, offset, user, identity, method, name, path, payload=b""):
+        """Append one request; offset is seconds since the start of the run"""
+        self._buffer += b"R" + _REQUEST.pack(
+            max(0, int(offset * 1_000_000)),
+            user,
+            self._string_id(identity or ""),
+            METHOD_CODES.get(method.upper(), METHOD_CODES["GET"]),
+            self._string_id(name or path),
+            self._string_id(path),
+            len(payload),
+        )
+        self._buffer += payload
+        self.count += 1
+        if len(self._buffer) >= FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def read_trace(path):
+    """Yield TraceRecords from a trace file in recorded order"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a request trace")
+
+    strings = {}
+    pos = len(MAGIC)
+    while pos < len(data):
+        tag = data[pos : pos + 1]
+        pos += 1
+        if tag == b"S":
+            string_id, length = _STRING.unpack_from(data, pos)
+            pos += _STRING.size
+            strings[string_id] = data[pos : pos + length].decode()
+            pos += length
+        elif tag == b"R":
+            offset_us, user, identity, method, name, path, length = _REQUEST.unpack_from(data, pos)
+            pos += _REQUEST.size
+            payload = data[pos : pos + length]
+            pos += length
+            yield TraceRecord(
+                offset_us / 1_000_000,
+                user,
+                strings[identity],
+                METHODS[method],
+                strings[name],
+                strings[path],
+                payload,
+            )
+        else:
+            raise ValueError(f"Corrupt trace {path}: unknown record tag {tag!r} at byte {pos - 1}")
+
+
+# -----------------------------
+# Recording from Locust events
+# -----------------------------
+
+_recorder = None
+_trace_start = 0.0
+# Every Locust user runs in its own greenlet, so the current greenlet tells
+# us which simulated user issued a request. Indices come from a counter, not
+# the map's size, so one is never reused after a user's greenlet is collected.
+_user_index = weakref.WeakKeyDictionary()
+_next_user = itertools.count()
+
+
+def _current_user():
+    greenlet = gevent.getcurrent()
+    index = _user_index.get(greenlet)
+    if index is None:
+        index = _user_index[greenlet] = next(_next_user)
+    return index
+
+
+@events.init_command_line_parser.add_listener
+def _(parser):
+    parser.add_argument(
+        "--record-trace",
+        type=str,
+        default="",
+        help="Record every request into this binary trace file (one file per worker)",
+    )
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global _recorder, _trace_start
+    path = getattr(environment.parsed_options, "record_trace", "")
+    if not path or isinstance(environment.runner, MasterRunner):
+        return
+    if isinstance(environment.runner, WorkerRunner):
+        path = f"{path}.{environment.runner.worker_index}"
+    _recorder = TraceRecorder(path)
+    _trace_start = time.time()
+
+
+@events.request.add_listener
+def on_request(request_type, name, response=None, url=None, start_time=None, **kwargs):
+    if _recorder is None or url is None:
+        return
+    _recorder.record(
+        (start_time or time.time()) - _trace_start,
+        _current_user(),
+        request_identity(response),
+        request_type,
+        name,
+        url_path(url),
+        request_payload(response),
+    )
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        print(f"Recorded {_recorder.count} requests to {_recorder.path}")
+        _recorder = None
+
+
+# -----------------------------
+# Replay
+# -----------------------------
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def load_users(paths):
+    """Group the records of one or more traces by simulated user, in offset order"""
+    users = {}
+    for file_index, path in enumerate(paths):
+        for rec in read_trace(path):
+            users.setdefault((file_index, rec.user), []).append(rec)
+    for recs in users.values():
+        recs.sort(key=lambda r: r.offset)
+    return users
+
+
+def replay(paths, host, speedup=1.0, timeout=30.0):
+    """Re-issue the traces against host, speedup times faster than recorded"""
+    from geventhttpclient import HTTPClient
+
+    users = load_users(paths)
+    stats = {}
+    lag = []
+    start = time.time() + 0.5  # give every greenlet time to connect first
+
+    def run_user(recs):
+        client = HTTPClient.from_url(
+            host, concurrency=1, connection_timeout=timeout, network_timeout=timeout
+        )
+        for rec in recs:
+            delay = start + rec.offset / speedup - time.time()
+            if delay > 0:
+                gevent.sleep(delay)
+            else:
+                lag.append(-delay)
+
+            headers = {}
+            if rec.identity:
+                headers["Authorization"] = "Basic " + base64.b64encode(rec.identity.encode()).decode()
+            if rec.payload:
+                headers["Content-Type"] = "application/json"
+
+            entry = stats.setdefault((rec.method, rec.name), {"times": [], "codes": {}})
+            t0 = time.perf_counter()
+            try:
+                response = client.request(rec.method, rec.path, body=rec.payload, headers=headers)
+                response.read()
+                code = response.status_code
+            except Exception as e:
+                code = type(e).__name__
+            entry["times"].append((time.perf_counter() - t0) * 1000)
+            entry["codes"][code] = entry["codes"].get(code, 0) + 1
+        client.close()
+
+    total = sum(len(recs) for recs in users.values())
+    print(f"Replaying {total} requests from {len(users)} users at {speedup}x against {host}")
+    gevent.joinall([gevent.spawn(run_user, recs) for recs in users.values()])
+    elapsed = time.time() - start
+
+    print("\n=== Replay summary ===")
+    print("name\tcount\tp50(ms)\tp95(ms)\tp99(ms)\tstatus codes")
+    for (method, name), entry in sorted(stats.items()):
+        times = sorted(entry["times"])
+        print(
+            f"{method} {name}\t{len(times)}\t{_percentile(times, 50):.1f}\t"
+            f"{_percentile(times, 95):.1f}\t{_percentile(times, 99):.1f}\t{entry['codes']}"
+        )
+    print(f"\nElapsed {elapsed:.1f}s, {total / max(elapsed, 1e-9):.1f} req/s")
+    if lag:
+        print(f"Requests behind schedule: {len(lag)} (max {max(lag) * 1000:.1f}ms late)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay recorded request traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    info = sub.add_parser("info", help="Summarise trace files")
+    info.add_argument("traces", nargs="+")
+
+    rep = sub.add_parser("replay", help="Re-issue trace files against a host")
+    rep.add_argument("traces", nargs="+")
+    rep.add_argument("--host", required=True, help="Target base URL, e.g. http://<alb_dns_name>")
+    rep.add_argument("--speedup", type=float, default=1.0, help="Replay speed factor (10 = ten times faster)")
+    rep.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+
+    args = parser.parse_args()
+
+    if args.command == "info":
+        users = load_users(args.traces)
+        records = [rec for recs in users.values() for rec in recs]
+        duration = max((rec.offset for rec in records), default=0.0)
+        print(f"{len(records)} requests from {len(users)} users over {duration:.1f}s")
+        counts = {}
+        for rec in records:
+            counts[(rec.method, rec.name)] = counts.get((rec.method, rec.name), 0) + 1
+        for (method, name), count in sorted(counts.items()):
+            print(f"  {method} {name}: {count}")
+    else:
+        if args.speedup <= 0:
+            print("--speedup must be positive")
+            sys.exit(1)
+        replay(args.traces, args.host, speedup=args.speedup, timeout=args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,616 @@
+#!/usr/bin/env python3
+"""
+service_standin.py - Local stand-in for the user, space and booking services
+
+One asyncio server that answers like the ALB in front of the three map_db
+services (services/map_db), so locustfiles and scripts can run offline:
+
+    POST /user                  GET /user/{id}          POST /user/{id}
+    POST /space                 GET /space/{id}
+    POST /booking               GET /booking/{date}/{id}    DELETE /booking/{date}/{id}
+    GET /user/health, /space/health, /booking/health
+
+Status codes, ErrCodes, messages and body formatting follow the Go handlers,
+including their quirks (a space's capacity defaults to 0, the map_db overlap
+check rejects any second booking of a space on a date). Passwords are not
+bcrypt-hashed; add latency to POST /user instead if that cost matters.
+
+    python service_standin.py --port 8080
+    python service_standin.py --latency "POST /booking=lognormal:20:0.5" --latency "*=exp:1" \\
+        --fault "POST /booking=0.01:500" --fault "GET /user/{id}=0.001:reset"
+    locust -f locust_ramp_users.py --host http://localhost:8080
+
+Latency specs are const:MS, uniform:LO:HI, exp:MEAN or lognormal:MEDIAN:SIGMA
+(milliseconds); a fault is RATE:STATUS or RATE:reset. Routes without a
+latency answer in the same loop iteration, which keeps a single core well
+above ten thousand requests per second; uvloop is used when installed.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import re
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from urllib.parse import unquote
+
+
+ID_CAPACITY = 100000000000
+SESSION_TTL = 3600
+INT64 = (-2**63, 2**63 - 1)
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+           500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable", 504: "Gateway Timeout"}
+MAX_BODY = 16 * 1024 * 1024
+
+_RFC3339 = re.compile(r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(\.\d+)?(Z|[+-]\d{2}:\d{2})$")
+_ATOI = re.compile(r"^[+-]?\d+$")
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+ZERO_TIME = datetime(1, 1, 1, tzinfo=timezone.utc)
+ZERO_TIME_VALUE = (ZERO_TIME, "")
+
+
+class BindError(Exception):
+    """The body does not bind to the handler's struct (gin's BindJSON failing)"""
+
+
+def go_json(value):
+    """Body of gin's c.IndentedJSON(value)"""
+    text = json.dumps(value, indent=4, ensure_ascii=False)
+    return (text.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+            .replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")).encode()
+
+
+def err(code, message, details):
+    return {"ErrCode": code, "Message": message, "Details": details}
+
+
+def parse_time(value):
+    """A JSON value as Go's time.Time.UnmarshalJSON reads it (RFC 3339 only)"""
+    match = _RFC3339.match(value) if isinstance(value, str) else None
+    if match is None:
+        raise BindError(f"parsing time {json.dumps(value)}")
+    year, month, day, hour, minute, second, fraction, zone = match.groups()
+    offset = timezone.utc if zone == "Z" else timezone(
+        (1 if zone[0] == "+" else -1) * timedelta(hours=int(zone[1:3]), minutes=int(zone[4:6])))
+    try:
+        parsed = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second),
+                          int((fraction or ".0")[1:7].ljust(6, "0")), tzinfo=offset)
+    except ValueError as e:
+        raise BindError(str(e))
+    return parsed, fraction or ""
+
+
+def format_time(value):
+    """time.Time as encoding/json writes it (RFC 3339 with trailing zeros trimmed)"""
+    parsed, fraction = value
+    text = parsed.replace(tzinfo=None, microsecond=0).isoformat()
+    fraction = fraction.rstrip("0")
+    if fraction != ".":
+        text += fraction
+    offset = parsed.utcoffset()
+    if not offset:
+        return text + "Z"
+    minutes = int(offset.total_seconds() // 60)
+    sign = "+" if minutes >= 0 else "-"
+    return text + f"{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+def bind(body, fields):
+    """Decode body into fields {name: (kind, required)} the way gin's BindJSON does"""
+    try:
+        data = json.loads(body.decode("utf-8", "replace")) if body else None
+    except ValueError as e:
+        raise BindError(str(e))
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise BindError("cannot unmarshal into struct")
+    # encoding/json matches keys case-insensitively; the last duplicate wins
+    lowered = {key.lower(): value for key, value in data.items()}
+    bound = {}
+    for name, (kind, required) in fields.items():
+        value = lowered.get(name.lower())
+        if value is None:
+            bound[name] = ZERO_TIME_VALUE if kind == "time" else ("" if kind == "str" else 0)
+        elif kind == "str":
+            if not isinstance(value, str):
+                raise BindError(f"cannot unmarshal into string: {name}")
+            bound[name] = value
+        elif kind == "int":
+            if isinstance(value, bool) or not isinstance(value, int) or not INT64[0] <= value <= INT64[1]:
+                raise BindError(f"cannot unmarshal into int: {name}")
+            bound[name] = value
+        else:
+            bound[name] = parse_time(value)
+        zero = bound[name] == ZERO_TIME_VALUE if kind == "time" else not bound[name]
+        if required and zero:
+            raise BindError(f"Key: '{name}' Error:Field validation for '{name}' failed on the 'required' tag")
+    return bound
+
+
+def basic_auth(header):
+    """(username, password, ok) like net/http's Request.BasicAuth"""
+    if not header or len(header) < 6 or header[:6].lower() != "basic ":
+        return "", "", False
+    try:
+        decoded = base64.b64decode(header[6:], validate=True).decode("utf-8", "replace")
+    except ValueError:
+        return "", "", False
+    username, sep, password = decoded.partition(":")
+    return (username, password, True) if sep else ("", "", False)
+
+
+def atoi(text):
+    """strconv.Atoi: the int, or None with Go's error text"""
+    if not _ATOI.match(text):
+        return None, f'strconv.Atoi: parsing "{text}": invalid syntax'
+    value = int(text)
+    if not INT64[0] <= value <= INT64[1]:
+        return None, f'strconv.Atoi: parsing "{text}": value out of range'
+    return value, None
+
+
+def correct_time_order(before, after):
+    """booking.go's correctTimeOrder: compares wall-clock hour, minute, second only"""
+    for unit in ("hour", "minute", "second"):
+        a, b = getattr(before, unit), getattr(after, unit)
+        if a != b:
+            return a < b
+    return True
+
+
+class Services:
+    """State and handlers of the three services, called in-process instead of over HTTP"""
+
+    def __init__(self, session_ttl=SESSION_TTL, overlap="map_db", clock=time.time):
+        self.session_ttl = session_ttl
+        self.overlap = overlap
+        self.clock = clock
+        self.users = {}
+        self.spaces = {}
+        self.bookings = {}
+        self.by_space = {}
+
+    def _new_id(self, taken):
+        while True:
+            new_id = random.randrange(ID_CAPACITY - 1)
+            if new_id not in taken:
+                return new_id
+
+    # user-service
+
+    def validate_session(self, id_text):
+        user_id, error = atoi(id_text)
+        if error:
+            return 400, err("INPUT_ERROR", "Unable to detect a user id", error)
+        user = self.users.get(user_id)
+        if user is None:
+            return 404, err("NOT_FOUND", "User Not Found", "The provided user id does not exist")
+        if self.clock() > user["lastAuth"] + self.session_ttl:
+            return 400, err("EXPIRED", "Last Session Expired", "Last Authorization Expired, please try again")
+        return 200, "Session has not yet expired"
+
+    def login(self, id_text, body):
+        user_id, error = atoi(id_text)
+        if error:
+            return 400, err("INPUT_ERROR", "Unable to detect a user id", error)
+        try:
+            form = bind(body, {"username": ("str", True), "userPassword": ("str", True)})
+        except BindError:
+            return 400, err("INPUT_ERR", "incorrect schema for a user", "You must provide a username and password")
+        user = self.users.get(user_id)
+        if user is None:
+            return 404, err("NOT_FOUND", "User Not Found", "The provided user id does not exist")
+        if user["username"] != form["username"]:
+            return 404, err("NOT_FOUND", "Username Not Found",
+                            "The provided username does not exist for the given user id")
+        if user["password"] != form["userPassword"]:
+            return 404, err("INVALID", "Password Does Not Match",
+                            "crypto/bcrypt: hashedPassword is not the hash of the given password")
+        user["lastAuth"] = now = self.clock()
+        start = datetime.fromtimestamp(now).astimezone()
+        return 200, f"[{user_id}] session created. Valid from {start} to {start + timedelta(seconds=self.session_ttl)}"
+
+    def create_user(self, body):
+        try:
+            form = bind(body, {"username": ("str", True), "userEmail": ("str", False), "userPassword": ("str", True)})
+        except BindError:
+            return 400, err("INPUT_ERR", "incorrect schema for a new user", "A new user requires a username and password")
+        user_id = self._new_id(self.users)
+        self.users[user_id] = {"username": form["username"], "email": form["userEmail"],
+                               "password": form["userPassword"], "lastAuth": self.clock()}
+        return 201, user_id
+
+    # availability-service and booking-service share this check
+
+    def authorize(self, auth_header, must_be_admin):
+        username, user_id, ok = basic_auth(auth_header)
+        if not ok:
+            return err("MALFORMED", "basic auth is missing or malformed",
+                       "ensure that a username and/or password are provided")
+        if must_be_admin and username.lower() != "admin":
+            return err("UNAUTHORIZED", "Not an admin", "Only admin users can use this operation")
+        status, _ = self.validate_session(user_id) if user_id else (404, None)
+        if status != 200:
+            return err("SESSION EXPIRED", "user session has expired", "Please log in again and revalidate credentials")
+        return None
+
+    # availability-service
+
+    def create_space(self, auth_header, body):
+        denied = self.authorize(auth_header, True)
+        if denied:
+            return 400, denied
+        try:
+            form = bind(body, {"roomCode": ("int", True), "buildingCode": ("str", True), "capacity": ("int", False),
+                               "openTime": ("time", False), "closeTime": ("time", False)})
+        except BindError:
+            return 400, err("INPUT_ERR", "incorrect schema for a new space", "A new space requires a building and room")
+        space_id = f"{form['buildingCode']}-{form['roomCode']}".replace(" ", "_")
+        if space_id in self.spaces:
+            return 400, err("DUPLICATE", "Space already exists", "This space already exists")
+        self.spaces[space_id] = {"spaceID": space_id, **form}
+        return 201, space_id
+
+    def get_space(self, space_id):
+        space = self.spaces.get(space_id)
+        if space is None:
+            return 404, err("NOT_FOUND", "Space Not Found", "The provided space id does not exist")
+        return 200, {"spaceID": space["spaceID"], "roomCode": space["roomCode"],
+                     "buildingCode": space["buildingCode"], "capacity": space["capacity"],
+                     "openTime": format_time(space["openTime"]), "closeTime": format_time(space["closeTime"])}
+
+    # booking-service
+
+    def overlaps(self, booking, other):
+        start, end = booking["startTime"][0], booking["endTime"][0]
+        other_start, other_end = other["startTime"][0], other["endTime"][0]
+        if self.overlap == "map_db":
+            # map_db joins the two comparisons with ||, so nearly any booking clashes
+            return start < other_end or end > other_start
+        return start < other_end and end > other_start
+
+    def create_booking(self, auth_header, body):
+        denied = self.authorize(auth_header, False)
+        if denied:
+            return 400, denied
+        try:
+            form = bind(body, {"spaceID": ("str", True), "date": ("str", True), "userID": ("int", True),
+                               "occupants": ("int", True), "startTime": ("time", True), "endTime": ("time", True)})
+        except BindError:
+            return 400, err("INPUT_ERR", "incorrect schema for a new booking",
+                            "A new space requires a space, date, user, occupants, start, and end time")
+        if str(form["userID"]) != basic_auth(auth_header)[1]:
+            return 400, err("INPUT_ERR", "User ID does not match", "Can only create a reservation for yourself")
+        try:
+            if not _DATE.match(form["date"]):
+                raise ValueError
+            datetime.strptime(form["date"], "%Y-%m-%d")
+        except ValueError:
+            return 400, err("INPUT_ERR", "Date must be formatted as YYYY-MM-DD",
+                            f'parsing time "{form["date"]}" as "2006-01-02": cannot parse "{form["date"]}" as "2006"')
+
+        writer = basic_auth(auth_header)[1]
+        for other in self.space_bookings(form["date"], form["spaceID"], writer):
+            if self.overlaps(form, other):
+                return 400, err("CONFLICT", "Scheduling conflict", "Your booking overlaps with another")
+
+        invalid = self.validate_booking(form)
+        if invalid:
+            return 400, invalid
+        booking_id = self._new_id(self.bookings.get(form["date"], {}))
+        self.save_booking({"bookingID": booking_id, **form}, writer)
+        return 201, booking_id
+
+    def validate_booking(self, booking):
+        space = self.spaces.get(booking["spaceID"])
+        if space is None:
+            return err("INVALID SPACE", "Space ID is invalid", "Please provide a valid space id")
+        if booking["occupants"] > space["capacity"]:
+            return err("INVALID", "Too many occupants", "Space capacity exceeded")
+        if (not correct_time_order(space["openTime"][0], booking["startTime"][0])
+                and not correct_time_order(booking["endTime"][0], space["closeTime"][0])):
+            return err("INVALID", "Building not open", "Time constraints not met")
+        return None
+
+    def booking_json(self, booking):
+        return {"bookingID": booking["bookingID"], "spaceID": booking["spaceID"], "date": booking["date"],
+                "userID": booking["userID"], "occupants": booking["occupants"],
+                "startTime": format_time(booking["startTime"]), "endTime": format_time(booking["endTime"])}
+
+    def get_booking(self, date, id_text, reader=None):
+        booking_id, error = atoi(id_text)
+        if error:
+            return 400, err("INPUT_ERROR", "Unable to detect a booking id", error)
+        booking = self.load_booking(date, booking_id, reader)
+        if booking is None:
+            return 404, err("NOT_FOUND", "Booking Not Found", "The provided space id does not exist")
+        return 200, self.booking_json(booking)
+
+    def delete_booking(self, date, id_text, writer=None):
+        booking_id, error = atoi(id_text)
+        if error:
+            return 400, err("INPUT_ERROR", "Unable to detect a booking id", error)
+        if not self.has_date(date, writer):
+            return 404, err("NOT_FOUND", "Booking Date Not Found", "The provided date does not exist")
+        if self.drop_booking(date, booking_id, writer) is None:
+            return 404, err("NOT_FOUND", "Booking ID Not Found", "The provided booking id does not exist")
+        return 200, "Deleted"
+
+    # booking storage; reader/writer is the caller's user id, for stores that track sessions
+
+    def space_bookings(self, date, space_id, reader=None):
+        return self.by_space.get((date, space_id), {}).values()
+
+    def load_booking(self, date, booking_id, reader=None):
+        return self.bookings.get(date, {}).get(booking_id)
+
+    def has_date(self, date, reader=None):
+        return date in self.bookings
+
+    def save_booking(self, booking, writer=None):
+        self.bookings.setdefault(booking["date"], {})[booking["bookingID"]] = booking
+        self.by_space.setdefault((booking["date"], booking["spaceID"]), {})[booking["bookingID"]] = booking
+
+    def drop_booking(self, date, booking_id, writer=None):
+        booking = self.bookings.get(date, {}).pop(booking_id, None)
+        if booking is not None:
+            self.by_space.get((date, booking["spaceID"]), {}).pop(booking_id, None)
+        return booking
+
+    def route(self, method, path):
+        """(route name, handler taking (headers, body)) for a request, or (None, None)"""
+        parts = path.split("/")[1:]
+        service = parts[0] if parts else ""
+        if service == "user":
+            if len(parts) == 1 and method == "POST":
+                return "POST /user", lambda headers, body: self.create_user(body)
+            if len(parts) == 2 and parts[1]:
+                if parts[1] == "health" and method == "GET":
+                    return "GET /user/health", None
+                if method == "GET":
+                    return "GET /user/{id}", lambda headers, body: self.validate_session(parts[1])
+                if method == "POST":
+                    return "POST /user/{id}", lambda headers, body: self.login(parts[1], body)
+        elif service == "space":
+            if len(parts) == 1 and method == "POST":
+                return "POST /space", lambda headers, body: self.create_space(headers.get("authorization"), body)
+            if len(parts) == 2 and parts[1] and method == "GET":
+                if parts[1] == "health":
+                    return "GET /space/health", None
+                return "GET /space/{id}", lambda headers, body: self.get_space(parts[1])
+        elif service == "booking":
+            if len(parts) == 1 and method == "POST":
+                return "POST /booking", lambda headers, body: self.create_booking(headers.get("authorization"), body)
+            if len(parts) == 2 and parts[1] == "health" and method == "GET":
+                return "GET /booking/health", None
+            if len(parts) == 3 and parts[1] and parts[2]:
+                if method == "GET":
+                    return "GET /booking/{date}/{id}", lambda headers, body: self.get_booking(
+                        parts[1], parts[2], basic_auth(headers.get("authorization"))[1])
+                if method == "DELETE":
+                    return "DELETE /booking/{date}/{id}", lambda headers, body: self.delete_booking(
+                        parts[1], parts[2], basic_auth(headers.get("authorization"))[1])
+        return None, None
+
+
+def parse_latency(spec):
+    """A sampler (seconds) for const:MS, uniform:LO:HI, exp:MEAN or lognormal:MEDIAN:SIGMA"""
+    kind, *args = spec.split(":")
+    args = [float(arg) for arg in args]
+    if kind == "lognormal":
+        median, sigma = args[0] / 1000, args[1]
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    args = [arg / 1000 for arg in args]
+    if kind == "const":
+        return lambda: args[0]
+    if kind == "uniform":
+        return lambda: random.uniform(args[0], args[1])
+    if kind == "exp":
+        return lambda: random.expovariate(1 / args[0]) if args[0] else 0.0
+    raise ValueError(f"unknown latency distribution {kind!r}")
+
+
+def parse_fault(spec):
+    """(rate, status or "reset") from RATE:STATUS or RATE:reset"""
+    rate, action = spec.split(":")
+    return float(rate), action if action == "reset" else int(action)
+
+
+def _per_route(specs, parse):
+    table = {}
+    for spec in specs or []:
+        route, _, value = spec.rpartition("=")
+        table[route or "*"] = parse(value)
+    return table
+
+
+class StandinProtocol(asyncio.Protocol):
+    """Minimal HTTP/1.1 keep-alive server; pipelined responses stay in order"""
+
+    def __init__(self, server):
+        self.server = server
+        self.buffer = b""
+        self.transport = None
+        self.pending = deque()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+    def data_received(self, data):
+        self.buffer += data
+        while self.transport is not None:
+            head_end = self.buffer.find(b"\r\n\r\n")
+            if head_end < 0:
+                if len(self.buffer) > 65536:
+                    self._fail(431)
+                return
+            lines = self.buffer[:head_end].decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ")
+            except ValueError:
+                self._fail(400)
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                self._fail(411)
+                return
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY:
+                self._fail(413)
+                return
+            end = head_end + 4 + length
+            if len(self.buffer) < end:
+                return
+            body = self.buffer[head_end + 4:end]
+            self.buffer = self.buffer[end:]
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            self.server.handle(self, method, target, headers, body, keep_alive)
+
+    def _fail(self, status):
+        self.transport.write(f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                             "Content-Length: 0\r\nConnection: close\r\n\r\n".encode())
+        self.transport.close()
+        self.transport = None
+
+    def slot(self):
+        entry = [None, True]
+        self.pending.append(entry)
+        if len(self.pending) > 128 and self.transport is not None:
+            self.transport.pause_reading()
+        return entry
+
+    def fill(self, entry, data, keep_alive):
+        entry[0], entry[1] = data, keep_alive
+        while self.pending and self.pending[0][0] is not None:
+            data, keep_alive = self.pending.popleft()
+            if self.transport is None:
+                return
+            if data == b"":
+                self.transport.abort()
+                self.transport = None
+                return
+            self.transport.write(data)
+            if not keep_alive:
+                self.transport.close()
+                self.transport = None
+                return
+        if len(self.pending) <= 128 and self.transport is not None:
+            self.transport.resume_reading()
+
+
+class StandinServer:
+    """Dispatches parsed requests to Services, adding configured latency and faults"""
+
+    def __init__(self, services, latency=None, faults=None):
+        self.services = services
+        self.latency = latency or {}
+        self.faults = faults or {}
+        self.loop = None
+        self.counts = Counter()
+        self._date = (0, b"")
+
+    def date_header(self):
+        now = int(time.time())
+        if self._date[0] != now:
+            self._date = (now, formatdate(now, usegmt=True).encode())
+        return self._date[1]
+
+    def response(self, status, body, content_type, keep_alive):
+        return b"".join((
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n".encode(),
+            b"Date: ", self.date_header(), b"\r\n",
+            b"" if keep_alive else b"Connection: close\r\n",
+            b"\r\n", body,
+        ))
+
+    def answer(self, name, handler, headers, body, keep_alive):
+        """Response bytes for a routed request; b"" means reset the connection"""
+        fault = self.faults.get(name) or self.faults.get("*")
+        if fault and random.random() < fault[0]:
+            self.counts[(name, "fault")] += 1
+            if fault[1] == "reset":
+                return b""
+            return self.response(fault[1], go_json(err("INJECTED", "injected fault", f"{name} {fault[1]}")),
+                                 "application/json; charset=utf-8", keep_alive)
+        if handler is None:
+            if name is None:
+                return self.response(404, b"404 page not found", "text/plain", keep_alive)
+            return self.response(200, b"OK", "text/plain; charset=utf-8", keep_alive)
+        status, value = handler(headers, body)
+        self.counts[(name, status)] += 1
+        return self.response(status, go_json(value), "application/json; charset=utf-8", keep_alive)
+
+    def handle(self, protocol, method, target, headers, body, keep_alive):
+        path = unquote(target.split("?", 1)[0])
+        name, handler = self.services.route(method, path)
+        sampler = self.latency.get(name) or self.latency.get("*")
+        delay = sampler() if sampler is not None and name is not None else 0.0
+        if delay <= 0 and not protocol.pending:
+            data = self.answer(name, handler, headers, body, keep_alive)
+            protocol.fill(protocol.slot(), data, keep_alive)
+            return
+        entry = protocol.slot()
+        # The handler runs when the delay is over, so state changes land at response time
+        self.loop.call_later(max(delay, 0.0), lambda: protocol.fill(
+            entry, self.answer(name, handler, headers, body, keep_alive), keep_alive))
+
+    async def serve(self, host, port):
+        self.loop = asyncio.get_running_loop()
+        server = await self.loop.create_server(lambda: StandinProtocol(self), host, port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+def print_counts(counts):
+    print("\n=== Requests by route and status ===")
+    for (name, status), count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"{name:32}\t{status}\t{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the user, space and booking APIs locally")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--latency", action="append", metavar="[ROUTE=]SPEC",
+                        help='Latency per route, e.g. "POST /booking=lognormal:20:0.5" or "*=exp:2" (repeatable)')
+    parser.add_argument("--fault", action="append", metavar="[ROUTE=]RATE:STATUS",
+                        help='Injected errors per route, e.g. "POST /booking=0.01:500" or "*=0.001:reset"')
+    parser.add_argument("--session-ttl", type=float, default=SESSION_TTL, help="Seconds a login stays valid")
+    parser.add_argument("--overlap", choices=("map_db", "dynamo_db"), default="map_db",
+                        help="Booking conflict check to copy (map_db's || check or dynamo_db's interval check)")
+    args = parser.parse_args()
+
+    server = StandinServer(
+        Services(session_ttl=args.session_ttl, overlap=args.overlap),
+        latency=_per_route(args.latency, parse_latency),
+        faults=_per_route(args.fault, parse_fault),
+    )
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    print(f"Serving the stand-in on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    print_counts(server.counts)
+
+
+if __name__ == "__main__":
+    main()
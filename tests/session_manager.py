@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+session_manager.py - Shared session bookkeeping for Locust users
+
+The user service keeps a session alive for one hour after the last login
+(or after user creation). Logging in inline whenever a request comes back
+SESSION EXPIRED makes users that started together all re-login together,
+and that burst lands in the middle of the booking latencies.
+
+SessionManager tracks the expiry of each identity (username, userId) and
+renews it before it runs out, at a randomly jittered point so refreshes of
+identities created together spread out. Users sharing one identity share
+one login: whoever finds it due logs in, the others wait for that result.
+
+    sessions = SessionManager()
+    sessions.created("admin", user_id)                        # POST /user just succeeded
+    sessions.ensure(self.client, "admin", "password", user_id)  # before authenticated requests
+    sessions.expired("admin", user_id)                        # a response said SESSION EXPIRED
+
+Logins are reported as "POST /user/{id} (login: <reason>)", separate from
+the user traffic they serve, and counted in harness_logins_total.
+"""
+
+import random
+import time
+
+from gevent.event import AsyncResult
+
+import harness_counters
+
+
+SESSION_TTL = 3600
+SESSION_ERR_CODES = ("SESSION EXPIRED", "SESSION ERROR", "EXPIRED")
+
+
+class _Session:
+    __slots__ = ("refresh_at", "expires_at", "retry_at", "pending", "started")
+
+    def __init__(self):
+        self.refresh_at = 0.0
+        self.expires_at = 0.0
+        self.retry_at = 0.0
+        self.pending = None
+        self.started = False
+
+
+class SessionManager:
+    """Expiry per identity, proactive jittered refresh and coalesced logins"""
+
+    def __init__(self, ttl=SESSION_TTL, margin=300, jitter=600):
+        self.ttl = ttl
+        self.margin = margin
+        self.jitter = jitter
+        self.sessions = {}
+
+    def _session(self, username, user_id):
+        key = (username, str(user_id))
+        session = self.sessions.get(key)
+        if session is None:
+            session = self.sessions[key] = _Session()
+        return session
+
+    def _started(self, session, at):
+        session.started = True
+        session.expires_at = at + self.ttl
+        # Renew somewhere in [expiry - margin - jitter, expiry - margin]
+        session.refresh_at = session.expires_at - self.margin - random.uniform(0, self.jitter)
+
+    def created(self, username, user_id, at=None):
+        """A user was just created; creation starts its first session"""
+        self._started(self._session(username, user_id), at or time.time())
+
+    def expired(self, username, user_id):
+        """The service rejected the session; the next ensure() logs in again"""
+        session = self._session(username, user_id)
+        session.refresh_at = session.expires_at = 0.0
+
+    def ensure(self, client, username, password, user_id):
+        """Log in if the session is due for renewal; return False if a needed login failed"""
+        session = self._session(username, user_id)
+        now = time.time()
+        if now < session.refresh_at:
+            return True
+        if session.pending is not None:
+            # Someone else is already logging this identity in
+            return session.pending.get()
+        if now < session.retry_at:
+            # The last login failed; don't run the task without a session
+            return False
+        if not session.started:
+            reason = "initial"
+        else:
+            reason = "proactive" if now < session.expires_at else "expired"
+        return self.login(client, username, password, user_id, reason)
+
+    def login(self, client, username, password, user_id, reason="initial"):
+        """Log in now (coalesced with any login already in flight for the identity)"""
+        session = self._session(username, user_id)
+        if session.pending is not None:
+            return session.pending.get()
+        session.pending = pending = AsyncResult()
+        ok = False
+        try:
+            with client.post(
+                f"/user/{user_id}",
+                json={"username": username, "userPassword": password},
+                name=f"POST /user/{{id}} (login: {reason})",
+                catch_response=True,
+            ) as response:
+                ok = response.status_code == 200
+                if ok:
+                    self._started(session, time.time())
+                else:
+                    response.failure(f"Login failed: {response.status_code}")
+                    # Back off a little so a failing login isn't retried by every task;
+                    # kept apart from refresh_at, which expired() resets
+                    session.retry_at = time.time() + random.uniform(1, 5)
+            harness_counters.inc("harness_logins_total", reason=reason, ok=str(ok).lower())
+        finally:
+            session.pending = None
+            pending.set(ok)
+        return ok
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+bulk_import.py - Stream a CSV or NDJSON file of bookings into the booking service
+
+populate_bookings (booking.py) creates a handful of bookings one at a time.
+This importer reads any number of rows as a stream and keeps a fixed number
+of POST /booking requests in flight, each worker on its own keep-alive
+connection. Reading blocks while the workers are busy, so memory stays
+bounded however large the file is. Each user logs in once and is shared by
+every worker; a SESSION EXPIRED answer triggers one coalesced re-login and
+the row is sent again.
+
+    python bulk_import.py semester.csv --url http://your-alb-url --in-flight 64 --out semester_outcomes.csv
+    python bulk_import.py semester.ndjson --credentials test_credentials.json --resume --out semester_outcomes.csv
+
+Rows carry spaceID, date, userID, occupants, startTime and endTime as the
+service expects them; times may also be given as HH:MM on the row's date.
+Passwords come from username/password columns or from the credentials file
+written by setup.py. Every row's outcome is appended to --out as it
+completes (line, status, ErrCode, booking ID, latency, attempts), so the
+import can be checked afterwards and --resume skips the rows that already
+got a final answer. Connection errors and 5xx answers are retried; a retry
+answered with CONFLICT may mean the first attempt went through.
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import async_logging
+import payload_pool
+from session_manager import SESSION_ERR_CODES, SESSION_TTL
+
+
+ALB_URL = "http://CS6650L2-alb-243173383.us-east-1.elb.amazonaws.com"  # Update this
+OUTCOME_FIELDS = ["line", "spaceID", "date", "userID", "status", "err_code", "booking_id", "ms", "attempts", "error"]
+FLUSH_SECONDS = 1.0
+_DONE = object()
+
+
+def read_rows(path, fmt=None):
+    """Yield (line number, row dict) from a CSV (with header) or NDJSON file, lazily"""
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(path, newline="") as f:
+        if fmt == "csv":
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield line, row
+        else:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    yield line, json.loads(text)
+
+
+def _time(date, value):
+    value = str(value)
+    if "T" in value:
+        return value
+    return f"{date}T{value}:00Z" if value.count(":") == 1 else f"{date}T{value}Z"
+
+
+def booking_payload(row):
+    """The POST /booking body for a row; HH:MM times are placed on the row's date"""
+    date = row["date"]
+    return {
+        "spaceID": row["spaceID"],
+        "date": date,
+        "userID": int(row["userID"]),
+        "occupants": int(row["occupants"]),
+        "startTime": _time(date, row["startTime"]),
+        "endTime": _time(date, row["endTime"]),
+    }
+
+
+def final_lines(path):
+    """Lines of an outcome file that got a final answer (201, or a 4xx other than an expired session)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, newline="") as f:
+        for outcome in csv.DictReader(f):
+            status = int(outcome["status"] or 0)
+            if status == 201 or (400 <= status < 500 and outcome["err_code"] not in SESSION_ERR_CODES):
+                done.add(int(outcome["line"]))
+    return done
+
+
+class Logins:
+    """One session per user, shared by all workers; due logins are coalesced per user"""
+
+    def __init__(self, connect, credentials, margin=300):
+        self.connect = connect
+        self.credentials = credentials
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._users = {}
+
+    def _user(self, user_id):
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                user = self._users[user_id] = [threading.Lock(), 0.0]
+            return user
+
+    def username(self, user_id, row):
+        if row.get("username"):
+            return row["username"]
+        known = self.credentials.get(user_id)
+        return known[0] if known else None
+
+    def ensure(self, connection, user_id, row):
+        """Log the user in unless its session is still fresh; False if that failed"""
+        username = self.username(user_id, row)
+        password = row.get("password") or (self.credentials.get(user_id) or (None, None))[1]
+        if not username or not password:
+            return False
+        user = self._user(user_id)
+        with user[0]:
+            if time.time() < user[1]:
+                return True
+            connection.request("POST", f"/user/{user_id}",
+                               body=json.dumps({"username": username, "userPassword": password}),
+                               headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                return False
+            user[1] = time.time() + SESSION_TTL - self.margin
+            return True
+
+    def expired(self, user_id):
+        self._user(user_id)[1] = 0.0
+
+
+class Importer:
+    """Bounded-concurrency POST /booking for a stream of rows"""
+
+    def __init__(self, base_url, in_flight=32, credentials=None, retries=2, timeout=30):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.in_flight = in_flight
+        self.retries = retries
+        self.timeout = timeout
+        self.logins = Logins(self._connect, credentials or {})
+        # Twice the workers: they never wait for a row, the reader waits for them
+        self.rows = queue.Queue(maxsize=in_flight * 2)
+        self.outcomes = queue.Queue(maxsize=in_flight * 4)
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _post(self, connection, row):
+        """Send one row; returns (status, err_code, booking_id, attempts, error)"""
+        try:
+            user_id = int(row["userID"])
+            body = json.dumps(booking_payload(row)).encode()
+        except (KeyError, TypeError, ValueError) as e:
+            return 0, "", "", 0, f"bad row: {type(e).__name__} {e}"
+        headers = payload_pool.auth_headers(self.logins.username(user_id, row) or "user", user_id)
+        status, err_code, booking_id, error = 0, "", "", ""
+        attempts = 0
+        relogged = False
+        while attempts <= self.retries:
+            attempts += 1
+            try:
+                if not self.logins.ensure(connection, user_id, row):
+                    return 0, "", "", attempts, "login failed"
+                connection.request("POST", "/booking", body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                status, err_code, error = 0, "", type(e).__name__
+                time.sleep(0.1 * attempts)
+                continue
+            status, error = response.status, ""
+            if status == 201:
+                return status, "", data.decode().strip().strip('"'), attempts, ""
+            try:
+                err_code = json.loads(data).get("ErrCode", "")
+            except (ValueError, AttributeError):
+                err_code = ""
+            if err_code in SESSION_ERR_CODES and not relogged:
+                self.logins.expired(user_id)
+                relogged = True
+                attempts -= 1
+                continue
+            if status < 500:
+                break
+            time.sleep(0.1 * attempts)
+        return status, err_code, booking_id, attempts, error
+
+    def _worker(self):
+        connection = self._connect()
+        while True:
+            item = self.rows.get()
+            if item is _DONE:
+                break
+            line, row = item
+            started = time.perf_counter()
+            status, err_code, booking_id, attempts, error = self._post(connection, row)
+            self.outcomes.put([line, row.get("spaceID", ""), row.get("date", ""), row.get("userID", ""), status,
+                               err_code, booking_id, f"{(time.perf_counter() - started) * 1000:.1f}", attempts, error])
+        connection.close()
+
+    def _writer(self, path, append, counts, progress):
+        with open(path, "a" if append else "w", newline="") as f:
+            writer = csv.writer(f)
+            if not append:
+                writer.writerow(OUTCOME_FIELDS)
+            flushed = time.monotonic()
+            while True:
+                outcome = self.outcomes.get()
+                if outcome is _DONE:
+                    break
+                writer.writerow(outcome)
+                status, err_code, error = outcome[4], outcome[5], outcome[9]
+                key = "created" if status == 201 else err_code or error or str(status)
+                counts[key] += 1
+                progress.tick(key)
+                if time.monotonic() - flushed >= FLUSH_SECONDS:
+                    f.flush()
+                    flushed = time.monotonic()
+
+    def run(self, rows, out_path, skip=frozenset()):
+        """Import rows ((line, row) pairs) and return outcome counts"""
+        counts = Counter()
+        progress = async_logging.Progress("import", interval=5)
+        writer = threading.Thread(target=self._writer, args=(out_path, bool(skip), counts, progress), daemon=True)
+        writer.start()
+        workers = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.in_flight)]
+        for worker in workers:
+            worker.start()
+        skipped = 0
+        for line, row in rows:
+            if line in skip:
+                skipped += 1
+                continue
+            self.rows.put((line, row))
+        for _ in workers:
+            self.rows.put(_DONE)
+        for worker in workers:
+            worker.join()
+        self.outcomes.put(_DONE)
+        writer.join()
+        progress.close()
+        if skipped:
+            counts["skipped (resumed)"] = skipped
+        return counts
+
+
+def load_credentials(path):
+    """{user_id: (username, password)} from setup.py's test_credentials.json"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    users = list(data.get("test_users", []))
+    if data.get("admin"):
+        users.append(data["admin"])
+    return {int(user["user_id"]): (user["username"], user["password"]) for user in users}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream bookings from CSV/NDJSON into POST /booking")
+    parser.add_argument("input", help="CSV with a header row, or NDJSON (.ndjson/.jsonl)")
+    parser.add_argument("--url", default=ALB_URL, help="ALB URL for the system")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="Input format (default: from the extension)")
+    parser.add_argument("--in-flight", type=int, default=32, help="Concurrent requests (one connection each)")
+    parser.add_argument("--credentials", default="test_credentials.json",
+                        help="setup.py credentials for rows without username/password columns")
+    parser.add_argument("--out", default="import_outcomes.csv", help="Per-row outcome CSV, appended as rows finish")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip rows with a final outcome in --out and append to it")
+    parser.add_argument("--retries", type=int, default=2, help="Retries for connection errors and 5xx answers")
+    args = parser.parse_args()
+
+    skip = final_lines(args.out) if args.resume else frozenset()
+    importer = Importer(args.url, args.in_flight, load_credentials(args.credentials), args.retries)
+    started = time.monotonic()
+    counts = importer.run(read_rows(args.input, args.format), args.out, skip)
+    elapsed = time.monotonic() - started
+
+    sent = sum(count for key, count in counts.items() if key != "skipped (resumed)")
+    print(f"\nImported {sent} rows in {elapsed:.1f}s ({sent / elapsed if elapsed else 0:,.0f}/s), outcomes in {args.out}")
+    for key, count in counts.most_common():
+        print(f"  {key:30} {count:>9}")
+
+
+if __name__ == "__main__":
+    main()
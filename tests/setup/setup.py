@@ -13,6 +13,13 @@ import logging
 from dataclasses import dataclass
 from colorama import init, Fore, Style
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import async_logging
+import contention
+import fixture_cache
+import payload_pool
 
 # Initialize colorama for colored output
 init(autoreset=True)
@@ -22,16 +29,13 @@ ALB_URL = "http://CS6650L2-alb-243173383.us-east-1.elb.amazonaws.com"  # Update
 ADMIN_PASSWORD = "admin123"
 RATE_LIMIT_DELAY = 0.5  # Seconds between requests
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'baseline_population_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
-        logging.StreamHandler()
-    ]
+# Setup logging: every operation goes to the log file from a background thread;
+# the console gets a periodic progress line and the failures
+logger = async_logging.install(
+    logging.getLogger(__name__),
+    stream=None,
+    log_file=f'baseline_population_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log',
 )
-logger = logging.getLogger(__name__)
 
 @dataclass
 class User:
@@ -60,6 +64,11 @@ class StudyReservationPopulator:
         self.created_spaces: List[Space] = []
         self.failed_operations: List[str] = []
         self.admin_user: Optional[User] = None
+        self.progress: Optional[async_logging.Progress] = None
+
+    def _tick(self, name: str):
+        if self.progress:
+            self.progress.tick(name)
         
     def create_user(self, username: str, password: str, email: str = "", user_type: str = "student") -> Optional[User]:
         """Create a new user"""
@@ -76,17 +85,17 @@ class StudyReservationPopulator:
                 user_id = int(response.text.strip('"'))
                 user = User(username, user_id, password, payload["userEmail"], user_type)
                 self.created_users.append(user)
-                print(f"{Fore.GREEN}✓{Style.RESET_ALL} Created user: {username} (ID: {user_id})")
-                logger.info(f"Created user: {username} with ID: {user_id}")
+                self._tick("users created")
+                logger.info("Created user: %s with ID: %s", username, user_id)
                 return user
             else:
                 print(f"{Fore.RED}✗{Style.RESET_ALL} Failed to create user: {username} (HTTP {response.status_code})")
-                logger.error(f"Failed to create user {username}: {response.text}")
+                logger.error("Failed to create user %s: %s", username, response.text)
                 self.failed_operations.append(f"User: {username}")
                 return None
         except Exception as e:
             print(f"{Fore.RED}✗{Style.RESET_ALL} Error creating user {username}: {str(e)}")
-            logger.error(f"Exception creating user {username}: {str(e)}")
+            logger.error("Exception creating user %s: %s", username, e)
             self.failed_operations.append(f"User: {username} (Exception)")
             return None
     
@@ -101,16 +110,16 @@ class StudyReservationPopulator:
         try:
             response = self.session.post(url, json=payload)
             if response.status_code == 200:
-                print(f"{Fore.GREEN}✓{Style.RESET_ALL} Logged in user: {user.username}")
-                logger.info(f"Successfully logged in user: {user.username}")
+                self._tick("logins")
+                logger.info("Successfully logged in user: %s", user.username)
                 return True
             else:
                 print(f"{Fore.YELLOW}⚠{Style.RESET_ALL} Failed to login user: {user.username}")
-                logger.warning(f"Failed to login user {user.username}: {response.text}")
+                logger.warning("Failed to login user %s: %s", user.username, response.text)
                 return False
         except Exception as e:
             print(f"{Fore.RED}✗{Style.RESET_ALL} Error logging in user {user.username}: {str(e)}")
-            logger.error(f"Exception logging in user {user.username}: {str(e)}")
+            logger.error("Exception logging in user %s: %s", user.username, e)
             return False
     
     def create_space(self, room_code: int, building: str, capacity: int) -> Optional[Space]:
@@ -135,21 +144,21 @@ class StudyReservationPopulator:
                 space_id = response.text.strip('"')
                 space = Space(space_id, building, room_code, capacity)
                 self.created_spaces.append(space)
-                print(f"{Fore.GREEN}✓{Style.RESET_ALL} Created space: {space_id} (Capacity: {capacity})")
-                logger.info(f"Created space: {space_id}")
+                self._tick("spaces created")
+                logger.info("Created space: %s", space_id)
                 return space
             elif response.status_code == 400 and "already exists" in response.text:
-                print(f"{Fore.YELLOW}⚠{Style.RESET_ALL} Space already exists: {building}-{room_code}")
-                logger.warning(f"Space already exists: {building}-{room_code}")
+                self._tick("spaces existing")
+                logger.warning("Space already exists: %s-%s", building, room_code)
                 return None
             else:
                 print(f"{Fore.RED}✗{Style.RESET_ALL} Failed to create space: {building}-{room_code} (HTTP {response.status_code})")
-                logger.error(f"Failed to create space {building}-{room_code}: {response.text}")
+                logger.error("Failed to create space %s-%s: %s", building, room_code, response.text)
                 self.failed_operations.append(f"Space: {building}-{room_code}")
                 return None
         except Exception as e:
             print(f"{Fore.RED}✗{Style.RESET_ALL} Error creating space {building}-{room_code}: {str(e)}")
-            logger.error(f"Exception creating space {building}-{room_code}: {str(e)}")
+            logger.error("Exception creating space %s-%s: %s", building, room_code, e)
             self.failed_operations.append(f"Space: {building}-{room_code} (Exception)")
             return None
     
@@ -280,7 +289,7 @@ class StudyReservationPopulator:
         ]
         
         for room_code, building, capacity, description in special_spaces:
-            print(f"  Creating {description}...")
+            logger.info("Creating %s...", description)
             self.create_space(room_code, building, capacity)
             time.sleep(RATE_LIMIT_DELAY)
     
@@ -362,6 +371,15 @@ class StudyReservationPopulator:
             json.dump(credentials, f, indent=2)
         
         print(f"{Fore.GREEN}Test credentials saved to: {creds_file}{Style.RESET_ALL}")
+        
+        # Let later runs against this URL reuse them instead of populating again
+        cache = fixture_cache.FixtureCache(self.base_url)
+        for u in self.created_users:
+            cache.add_user("baseline", u.username, u.password, u.user_id, admin=u.user_type == "admin")
+        cache.add_spaces("baseline", [s.space_id for s in self.created_spaces])
+        cache.save()
+        cache.close()
+        print(f"{Fore.GREEN}Fixtures cached in: {cache.path}{Style.RESET_ALL}")
     
     def print_summary(self):
         """Print population summary"""
@@ -404,9 +422,11 @@ class StudyReservationPopulator:
         print(f"{Fore.CYAN}ALB URL: {self.base_url}{Style.RESET_ALL}")
         print(f"{Fore.CYAN}{'='*60}{Style.RESET_ALL}")
         
+        self.progress = async_logging.Progress("populate", interval=5)
         try:
             self.populate_users()
             self.populate_spaces()
+            self.progress.close()
             self.verify_system()
             self.save_results()
             self.print_summary()
@@ -414,10 +434,12 @@ class StudyReservationPopulator:
             print(f"\n{Fore.GREEN}Population completed successfully!{Style.RESET_ALL}")
             
         except KeyboardInterrupt:
+            self.progress.close()
             print(f"\n{Fore.YELLOW}Population interrupted by user{Style.RESET_ALL}")
             self.save_results()
             self.print_summary()
         except Exception as e:
+            self.progress.close()
             print(f"\n{Fore.RED}Population failed with error: {str(e)}{Style.RESET_ALL}")
             logger.error(f"Population failed: {str(e)}", exc_info=True)
             self.save_results()
@@ -426,9 +448,12 @@ class StudyReservationPopulator:
 class TestRunner:
     """Run tests with populated data"""
     
-    def __init__(self, base_url: str, credentials_file: str = "test_credentials.json"):
+    def __init__(self, base_url: str, credentials_file: str = "test_credentials.json",
+                 contenders: int = 50, slots: int = 10):
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        self.contenders = contenders
+        self.slots = slots
         
         # Load credentials
         with open(credentials_file, 'r') as f:
@@ -485,80 +510,49 @@ class TestRunner:
             print(f"{Fore.RED}✗{Style.RESET_ALL} Error testing booking: {str(e)}")
     
     def test_concurrent_bookings(self):
-        """Test concurrent booking attempts"""
+        """Storm the same slot with many contenders, over many slots"""
         print(f"\n{Fore.CYAN}Testing Concurrent Bookings{Style.RESET_ALL}")
         print("-" * 50)
         
-        if len(self.credentials['test_users']) < 2:
-            print(f"{Fore.YELLOW}Need at least 2 users for concurrent test{Style.RESET_ALL}")
+        users = self.credentials['test_users']
+        if not users:
+            print(f"{Fore.YELLOW}Need at least 1 user for concurrent test{Style.RESET_ALL}")
             return
         
-        import threading
-        
-        results = []
-        
-        def attempt_booking(user, space_id, results):
-            booking_date = (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d")
-            start_time = f"{booking_date}T10:00:00Z"
-            end_time = f"{booking_date}T12:00:00Z"
-            
-            url = f"{self.base_url}/booking"
+        test_space = self.credentials['test_spaces'][0] if self.credentials['test_spaces'] else "Library-101"
+        # One-hour slots from 08:00, starting three days out, each contended once
+        first_day = datetime.now() + timedelta(days=3)
+        slots = []
+        for n in range(self.slots):
+            booking_date = (first_day + timedelta(days=n // 12)).strftime("%Y-%m-%d")
+            hour = 8 + n % 12
+            slots.append((booking_date, f"{booking_date}T{hour:02d}:00:00Z", f"{booking_date}T{hour + 1:02d}:00:00Z"))
+        
+        def attempt_booking(contender, slot):
+            # Contenders beyond the number of users reuse identities; a second win is still a double booking
+            user = users[contender % len(users)]
+            booking_date, start_time, end_time = slots[slot]
             payload = {
-                "spaceID": space_id,
+                "spaceID": test_space,
                 "date": booking_date,
                 "startTime": start_time,
                 "endTime": end_time,
                 "occupants": 2,
                 "userID": user['user_id']
             }
-            
-            auth = (user['username'], str(user['user_id']))
-            
-            try:
-                response = requests.post(url, json=payload, auth=auth)
-                results.append({
-                    "user": user['username'],
-                    "status": response.status_code,
-                    "success": response.status_code in [200, 201]
-                })
-            except Exception as e:
-                results.append({
-                    "user": user['username'],
-                    "status": 0,
-                    "success": False,
-                    "error": str(e)
-                })
-        
-        # Create threads for concurrent requests
-        threads = []
-        test_space = self.credentials['test_spaces'][0] if self.credentials['test_spaces'] else "Library-101"
-        
-        for user in self.credentials['test_users'][:2]:
-            thread = threading.Thread(target=attempt_booking, args=(user, test_space, results))
-            threads.append(thread)
+            return "POST", "/booking", payload, payload_pool.auth_headers(user['username'], user['user_id'])
         
-        # Start all threads simultaneously
-        for thread in threads:
-            thread.start()
+        storm = contention.ContentionStorm(self.base_url, self.contenders, warm_path="/booking/health")
+        rounds = storm.run(len(slots), attempt_booking)
+        summary = contention.print_report(rounds, f"{test_space}, {len(slots)} slots")
         
-        # Wait for completion
-        for thread in threads:
-            thread.join()
-        
-        # Check results
-        successful = sum(1 for r in results if r['success'])
-        
-        if successful == 1:
-            print(f"{Fore.GREEN}✓{Style.RESET_ALL} Correctly prevented double booking (1 success, 1 failure)")
-        elif successful == 0:
-            print(f"{Fore.YELLOW}⚠{Style.RESET_ALL} Both bookings failed")
+        doubled = sum(1 for winners in summary['winners'] if winners > 1)
+        if doubled:
+            print(f"{Fore.RED}✗{Style.RESET_ALL} Double booking occurred in {doubled} of {len(slots)} slots!")
+        elif all(winners == 1 for winners in summary['winners']):
+            print(f"{Fore.GREEN}✓{Style.RESET_ALL} Correctly prevented double booking (1 success per slot)")
         else:
-            print(f"{Fore.RED}✗{Style.RESET_ALL} Both bookings succeeded - double booking occurred!")
-        
-        for result in results:
-            status_icon = "✓" if result['success'] else "✗"
-            status_color = Fore.GREEN if result['success'] else Fore.RED
-            print(f"  {status_color}{status_icon}{Style.RESET_ALL} {result['user']}: Status {result['status']}")
+            print(f"{Fore.YELLOW}⚠{Style.RESET_ALL} Some slots had no successful booking")
     
     def run_all_tests(self):
         """Run all tests"""
@@ -579,6 +573,8 @@ def main():
     parser.add_argument('--url', default=ALB_URL, help='ALB URL for the system')
     parser.add_argument('--test', action='store_true', help='Run tests after population')
     parser.add_argument('--test-only', action='store_true', help='Only run tests (skip population)')
+    parser.add_argument('--contenders', type=int, default=50, help='Concurrent bookings per slot in the contention test')
+    parser.add_argument('--slots', type=int, default=10, help='Slots contended in the contention test')
     
     args = parser.parse_args()
     
@@ -590,7 +586,7 @@ def main():
     if args.test or args.test_only:
         # Run tests
         try:
-            tester = TestRunner(args.url)
+            tester = TestRunner(args.url, contenders=args.contenders, slots=args.slots)
             tester.run_all_tests()
         except FileNotFoundError:
             print(f"{Fore.RED}No test credentials found. Run population first.{Style.RESET_ALL}")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+slot_allocator.py - Client-side index of booked slots for conflict-rate targeting
+
+The allocator remembers, per (space, date), every slot this run has booked
+(or is about to book) in a sorted interval list. Tasks can then ask for a
+slot that is guaranteed free of our own bookings, or for one that overlaps
+a confirmed booking on purpose (never a slot that is only reserved, whose
+booking may still be rejected), and mix the two to hit a target conflict rate:
+
+    kind, space_id, start, end = allocator.choose(space_ids, date, conflict_rate=0.05)
+    # send the booking, then
+    allocator.confirm(space_id, date, start, end, booking_id)  # 201 for a "free" slot
+    allocator.release(space_id, date, start, end)              # anything else for a "free" slot
+    allocator.release_booking(booking_id)                      # after a successful DELETE
+
+The index is per process: with several Locust workers give each worker its
+own spaces, otherwise another worker's booking can turn a free slot into a
+conflict.
+"""
+
+import random
+from bisect import bisect_right
+
+
+class SpaceSchedule:
+    """Non-overlapping [start, end) minute intervals for one space and date"""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def is_free(self, start, end):
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            return False
+        return i == len(self.starts) or self.starts[i] >= end
+
+    def add(self, start, end):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+    def remove(self, start, end):
+        i = bisect_right(self.starts, start) - 1
+        while i >= 0 and self.starts[i] == start:
+            if self.ends[i] == end:
+                del self.starts[i]
+                del self.ends[i]
+                return True
+            i -= 1
+        return False
+
+    def gaps(self, open_minute, close_minute):
+        """Yield the free (start, end) stretches between open and close"""
+        cursor = open_minute
+        for start, end in zip(self.starts, self.ends):
+            if start > cursor:
+                yield cursor, start
+            cursor = max(cursor, end)
+        if cursor < close_minute:
+            yield cursor, close_minute
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class SlotAllocator:
+    """Hands out free or deliberately conflicting booking slots"""
+
+    def __init__(self, open_hour=8, close_hour=22, step_minutes=15, durations=(60, 120), attempts=8):
+        self.open_minute = open_hour * 60
+        self.close_minute = close_hour * 60
+        self.step = step_minutes
+        self.durations = durations
+        self.attempts = attempts
+        self.schedules = {}
+        # Confirmed booking IDs per (space, date), and the keys that have any
+        self.confirmed = {}
+        self.booked_keys = []
+        self.bookings = {}
+
+    def _schedule(self, space_id, date):
+        key = (space_id, date)
+        schedule = self.schedules.get(key)
+        if schedule is None:
+            schedule = self.schedules[key] = SpaceSchedule()
+        return schedule
+
+    def free_slot(self, space_id, date, duration=None):
+        """Reserve and return a (start, end) in minutes that overlaps none of our bookings, or None"""
+        duration = duration or random.choice(self.durations)
+        schedule = self._schedule(space_id, date)
+        last_start = self.close_minute - duration
+        if last_start < self.open_minute:
+            return None
+
+        # Random probes are cheap while the day is sparse ...
+        for _ in range(self.attempts):
+            start = self.open_minute + random.randrange(0, last_start - self.open_minute + 1, self.step)
+            if schedule.is_free(start, start + duration):
+                break
+        else:
+            # ... fall back to scanning the gaps once it fills up
+            fits = [gap for gap in schedule.gaps(self.open_minute, self.close_minute) if gap[1] - gap[0] >= duration]
+            if not fits:
+                return None
+            gap_start, gap_end = random.choice(fits)
+            start = gap_start + (-(gap_start - self.open_minute) % self.step)
+            if start + duration > gap_end:
+                start = gap_start
+
+        schedule.add(start, start + duration)
+        return start, start + duration
+
+    def conflicting_slot(self, space_id=None, date=None):
+        """Return (space_id, date, start, end) overlapping one of our confirmed bookings, or None"""
+        if space_id is not None:
+            keys = [(space_id, date)]
+        else:
+            keys = [random.choice(self.booked_keys)] if self.booked_keys else []
+        for key in keys:
+            booking_ids = self.confirmed.get(key)
+            if not booking_ids:
+                continue
+            _, _, start, end = self.bookings[random.choice(booking_ids)]
+            # Shift by less than half the booking (and less than the new duration)
+            # so exact and partial overlaps both occur
+            duration = random.choice(self.durations)
+            limit = max(1, min((end - start) // 2, duration))
+            shift = random.randrange(0, limit, self.step) * random.choice((-1, 1))
+            new_start = min(max(self.open_minute, start + shift), self.close_minute - duration)
+            return key[0], key[1], new_start, new_start + duration
+        return None
+
+    def choose(self, space_ids, date, conflict_rate=0.0):
+        """Pick ("free" | "conflict", space_id, start, end) aiming for conflict_rate conflicts"""
+        if random.random() < conflict_rate:
+            candidates = [key for key in self.booked_keys if key[1] == date and key[0] in space_ids]
+            if candidates:
+                space_id, _ = random.choice(candidates)
+                slot = self.conflicting_slot(space_id, date)
+                if slot is not None:
+                    return "conflict", slot[0], slot[2], slot[3]
+
+        for _ in range(self.attempts):
+            space_id = random.choice(space_ids)
+            slot = self.free_slot(space_id, date)
+            if slot is not None:
+                return "free", space_id, slot[0], slot[1]
+        return None
+
+    def confirm(self, space_id, date, start, end, booking_id):
+        """A reserved free slot was accepted; remember it so a delete can release it"""
+        self.bookings[booking_id] = (space_id, date, start, end)
+        key = (space_id, date)
+        booking_ids = self.confirmed.get(key)
+        if booking_ids is None:
+            booking_ids = self.confirmed[key] = []
+            self.booked_keys.append(key)
+        booking_ids.append(booking_id)
+
+    def release(self, space_id, date, start, end):
+        """Forget a slot: its booking was rejected or has been deleted"""
+        schedule = self.schedules.get((space_id, date))
+        if schedule is None:
+            return False
+        removed = schedule.remove(start, end)
+        if removed and not len(schedule):
+            del self.schedules[(space_id, date)]
+        return removed
+
+    def release_booking(self, booking_id):
+        """Release the slot of a confirmed booking that has been deleted"""
+        slot = self.bookings.pop(booking_id, None)
+        if slot is None:
+            return False
+        key = slot[:2]
+        booking_ids = self.confirmed[key]
+        booking_ids.remove(booking_id)
+        if not booking_ids:
+            del self.confirmed[key]
+            self.booked_keys.remove(key)
+        return self.release(*slot)
+
+
+def minute_to_iso(date, minute):
+    """Format a minute of the day on date as the RFC 3339 time the services expect"""
+    return f"{date}T{minute // 60:02d}:{minute % 60:02d}:00Z"